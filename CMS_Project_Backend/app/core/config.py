@@ -43,15 +43,114 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "120"))
 
+    # Cache user untuk get_current_user (per proses)
+    USER_CACHE_ENABLED: bool = _env_bool("USER_CACHE_ENABLED", default=True)
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "2048"))
+
+    # Mode auth stateless: role/is_active/token_version dibawa di JWT,
+    # get_current_user tidak query tabel users per request.
+    AUTH_STATELESS: bool = _env_bool("AUTH_STATELESS", default=False)
+    TOKEN_VERSION_REFRESH_SECONDS: int = int(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
+
+    # Executor untuk kerja blocking di handler async
+    # CPU_EXECUTOR: "process" (default, fallback ke thread kalau platform tidak support) / "thread"
+    CPU_EXECUTOR: str = os.getenv("CPU_EXECUTOR", "process").strip().lower()
+    CPU_EXECUTOR_WORKERS: int = int(os.getenv("CPU_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+    IO_EXECUTOR_WORKERS: int = int(os.getenv("IO_EXECUTOR_WORKERS", "32"))
 
     # Supabase
     SUPABASE_URL: Optional[str] = os.getenv("SUPABASE_URL")
     SUPABASE_ANON_KEY: Optional[str] = os.getenv("SUPABASE_ANON_KEY")
     SUPABASE_SERVICE_ROLE_KEY: Optional[str] = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+    # Read replica (opsional): daftar URL API replica, pisah koma.
+    # Query read-only katalog/riwayat diarahkan ke sini (round-robin + failover ke primary).
+    SUPABASE_READ_REPLICA_URLS_RAW: str = os.getenv("SUPABASE_READ_REPLICA_URLS", "").strip()
+    READ_REPLICA_COOLDOWN_SECONDS: float = float(os.getenv("READ_REPLICA_COOLDOWN_SECONDS", "30"))
+
+    # HTTP pool ke Supabase (dipakai bareng oleh PostgREST + Storage)
+    SUPABASE_HTTP2: bool = _env_bool("SUPABASE_HTTP2", default=True)
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_HTTP_TIMEOUT: float = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "20"))
+
+    # Accounting call upstream per request (Server-Timing + histogram per route)
+    UPSTREAM_METRICS_ENABLED: bool = _env_bool("UPSTREAM_METRICS_ENABLED", default=True)
+    SERVER_TIMING_ENABLED: bool = _env_bool("SERVER_TIMING_ENABLED", default=True)
+
+    # Serialisasi response: orjson sebagai default response class (kalau terpasang) +
+    # jalur trusted (row DB tidak divalidasi ulang, hanya dipangkas ke field response_model)
+    JSON_FAST_RESPONSE: bool = _env_bool("JSON_FAST_RESPONSE", default=True)
+    TRUSTED_ROWS_FAST_PATH: bool = _env_bool("TRUSTED_ROWS_FAST_PATH", default=False)
+
+    # Kompresi response (gzip / brotli kalau terpasang), lihat app/utils/compression.py
+    COMPRESSION_ENABLED: bool = _env_bool("COMPRESSION_ENABLED", default=True)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    # prefix path yang tidak dikompres (csv), contoh: "/docs,/openapi.json"
+    COMPRESSION_EXCLUDE_PATHS_RAW: str = os.getenv("COMPRESSION_EXCLUDE_PATHS", "")
+
+    # Master data (status order/pembayaran, jenis pembayaran, genre) di memory, dimuat ulang tiap TTL
+    MASTER_DATA_TTL_SECONDS: int = int(os.getenv("MASTER_DATA_TTL_SECONDS", "300"))
+    # cek master data saat startup (1 query): off | verify (log yang kurang) | seed (seed yang kurang saja)
+    MASTER_DATA_STARTUP_CHECK: str = os.getenv("MASTER_DATA_STARTUP_CHECK", "verify")
+
     # Storage
     SUPABASE_STORAGE_BUCKET: str = os.getenv("SUPABASE_STORAGE_BUCKET", "book-covers")
 
+    # Cache response katalog (/books, /genres, /payment-methods) + ETag/304
+    CATALOG_CACHE_ENABLED: bool = _env_bool("CATALOG_CACHE_ENABLED", default=True)
+    CATALOG_CACHE_TTL_SECONDS: int = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
+    CATALOG_CACHE_MAX_SIZE: int = int(os.getenv("CATALOG_CACHE_MAX_SIZE", "512"))
+    CATALOG_CACHE_CONTROL: str = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+
+    # Snapshot katalog statis (shard JSON + gzip/brotli di Supabase Storage, lihat catalog_snapshot.py)
+    CATALOG_SNAPSHOT_ENABLED: bool = _env_bool("CATALOG_SNAPSHOT_ENABLED", default=False)
+    CATALOG_SNAPSHOT_BUCKET: str = os.getenv("CATALOG_SNAPSHOT_BUCKET", "") or os.getenv(
+        "SUPABASE_STORAGE_BUCKET", "book-covers"
+    )
+    CATALOG_SNAPSHOT_PREFIX: str = os.getenv("CATALOG_SNAPSHOT_PREFIX", "catalog-snapshot")
+    CATALOG_SNAPSHOT_SHARD_SIZE: int = int(os.getenv("CATALOG_SNAPSHOT_SHARD_SIZE", "500"))
+    CATALOG_SNAPSHOT_MANIFEST_MAX_AGE: int = int(os.getenv("CATALOG_SNAPSHOT_MANIFEST_MAX_AGE", "60"))
+
+    # Search katalog default: basic (ilike judul) | fulltext (RPC search_books, sql/002_books_search.sql)
+    BOOK_SEARCH_MODE: str = os.getenv("BOOK_SEARCH_MODE", "basic")
+
+    # Inverted index in-memory untuk /books/search
+    SEARCH_INDEX_ENABLED: bool = _env_bool("SEARCH_INDEX_ENABLED", default=True)
+    SEARCH_INDEX_BUILD_ON_STARTUP: bool = _env_bool("SEARCH_INDEX_BUILD_ON_STARTUP", default=True)
+    SEARCH_INDEX_MAX_AGE_SECONDS: int = int(os.getenv("SEARCH_INDEX_MAX_AGE_SECONDS", "600"))
+    SEARCH_INDEX_PAGE_SIZE: int = int(os.getenv("SEARCH_INDEX_PAGE_SIZE", "1000"))
+    SEARCH_INDEX_MAX_PREFIX_TERMS: int = int(os.getenv("SEARCH_INDEX_MAX_PREFIX_TERMS", "200"))
+    # /books/facets: batas bucket harga (csv, rupiah) -> <50rb, 50-100rb, ..., >=500rb
+    BOOK_FACET_PRICE_BUCKETS: str = os.getenv("BOOK_FACET_PRICE_BUCKETS", "50000,100000,200000,500000")
+    # /books/suggest: umur maksimal struktur prefix (ranking penjualan ikut diperbarui),
+    # panjang prefix yang top-N nya dihitung saat build, dan jumlah saran maksimal
+    BOOK_SUGGEST_MAX_AGE_SECONDS: int = int(os.getenv("BOOK_SUGGEST_MAX_AGE_SECONDS", "300"))
+    BOOK_SUGGEST_SHORT_PREFIX: int = int(os.getenv("BOOK_SUGGEST_SHORT_PREFIX", "4"))
+    BOOK_SUGGEST_MAX_RESULTS: int = int(os.getenv("BOOK_SUGGEST_MAX_RESULTS", "20"))
+    # /books/{id}/related: umur maksimal matriks co-purchase, minimal jumlah order bersama,
+    # tetangga yang disimpan per buku, dan jumlah rekomendasi maksimal
+    RELATED_MAX_AGE_SECONDS: int = int(os.getenv("RELATED_MAX_AGE_SECONDS", "3600"))
+    RELATED_MIN_SUPPORT: int = int(os.getenv("RELATED_MIN_SUPPORT", "2"))
+    RELATED_MAX_NEIGHBORS: int = int(os.getenv("RELATED_MAX_NEIGHBORS", "50"))
+    RELATED_MAX_RESULTS: int = int(os.getenv("RELATED_MAX_RESULTS", "20"))
+
+    # Paging: default count_mode (exact|planned|estimated|cached) + cache total per filter
+    PAGED_COUNT_MODE: str = os.getenv("PAGED_COUNT_MODE", "exact")
+    PAGED_COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("PAGED_COUNT_CACHE_TTL_SECONDS", "60"))
+    PAGED_COUNT_CACHE_MAX_SIZE: int = int(os.getenv("PAGED_COUNT_CACHE_MAX_SIZE", "1024"))
+
+    # Export katalog (NDJSON/CSV streaming): ukuran chunk keyset + level gzip (1-9)
+    BOOK_EXPORT_CHUNK_SIZE: int = int(os.getenv("BOOK_EXPORT_CHUNK_SIZE", "1000"))
+    BOOK_EXPORT_GZIP_LEVEL: int = int(os.getenv("BOOK_EXPORT_GZIP_LEVEL", "6"))
+
+    # /books/batch: maksimal id per request (1 query in_)
+    BOOK_BATCH_MAX_IDS: int = int(os.getenv("BOOK_BATCH_MAX_IDS", "300"))
+
     @property
     def FRONTEND_ORIGINS(self) -> List[str]:
         """
@@ -63,6 +162,14 @@ class Settings:
             return ["*"]
         return _split_csv(self.FRONTEND_ORIGINS_RAW)
 
+    @property
+    def SUPABASE_READ_REPLICA_URLS(self) -> List[str]:
+        return [u.rstrip("/") for u in _split_csv(self.SUPABASE_READ_REPLICA_URLS_RAW)]
+
+    @property
+    def COMPRESSION_EXCLUDE_PATHS(self) -> List[str]:
+        return _split_csv(self.COMPRESSION_EXCLUDE_PATHS_RAW)
+
     def validate(self) -> None:
         """
         Validasi minimal agar startup fail-fast.
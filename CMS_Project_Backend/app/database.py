@@ -1,19 +1,75 @@
 # app/database.py
 
+import itertools
 import logging
+import threading
+import time
 from functools import lru_cache
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from supabase import Client, create_client
+import httpx
+from postgrest import APIError
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, create_client
 
 from app.core.config import settings
+from app.utils.upstream_metrics import AsyncInstrumentedTransport, InstrumentedTransport
 
 logger = logging.getLogger(__name__)
 
 
-@lru_cache(maxsize=4)
+def _http_pool_kwargs() -> Dict[str, Any]:
+    """
+    Setting pool HTTP (keep-alive + limit koneksi) yang sama untuk client sync & async.
+    """
+    kwargs: Dict[str, Any] = {
+        "limits": httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": False,
+    }
+    if settings.SUPABASE_HTTP2:
+        try:
+            import h2  # noqa: F401  (httpx butuh paket h2 untuk HTTP/2)
+            kwargs["http2"] = True
+        except ImportError:
+            logger.warning("SUPABASE_HTTP2=true tapi paket 'h2' belum terpasang, pakai HTTP/1.1")
+    return kwargs
+
+
+def _make_sync_http_client() -> httpx.Client:
+    # transport dibungkus supaya tiap round trip tercatat (Server-Timing / metrics)
+    return httpx.Client(
+        transport=InstrumentedTransport(httpx.HTTPTransport(**_http_pool_kwargs())),
+        timeout=httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT),
+        follow_redirects=True,
+    )
+
+
+def _make_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=AsyncInstrumentedTransport(httpx.AsyncHTTPTransport(**_http_pool_kwargs())),
+        timeout=httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT),
+        follow_redirects=True,
+    )
+
+
+@lru_cache(maxsize=16)
 def _make_client(url: str, key: str) -> Client:
-    return create_client(url, key)
+    options = ClientOptions(httpx_client=_make_sync_http_client())
+    return create_client(url, key, options=options)
+
+
+_async_http_clients: List[httpx.AsyncClient] = []
+
+
+@lru_cache(maxsize=16)
+def _make_async_client(url: str, key: str) -> AsyncClient:
+    # 1 pool httpx.AsyncClient per client: koneksi keep-alive dipakai ulang lintas request
+    http_client = _make_async_http_client()
+    _async_http_clients.append(http_client)
+    return AsyncClient(url, key, AsyncClientOptions(httpx_client=http_client))
 
 
 def _pick_key(prefer_service: bool = True) -> str:
@@ -50,6 +106,10 @@ supabase_public: Client = _make_client(SUPABASE_URL, SUPABASE_ANON_KEY) if SUPAB
 # Jadi kita set default supabase = admin client
 supabase: Client = supabase_admin
 
+# Client async (PostgREST/Storage non-blocking) untuk router yang sudah `async def`.
+# Hidup berdampingan dengan client sync selama migrasi.
+supabase_async: AsyncClient = _make_async_client(SUPABASE_URL, SUPABASE_ADMIN_KEY)
+
 
 # -------------------------
 # Helpers (opsional tapi kepakai untuk upload avatar/cover)
@@ -63,6 +123,112 @@ def get_client(prefer_admin: bool = True) -> Client:
     return supabase_admin if prefer_admin else supabase_public
 
 
+def get_async_client(prefer_admin: bool = True) -> AsyncClient:
+    """
+    Versi async dari get_client().
+    """
+    if prefer_admin or not SUPABASE_ANON_KEY:
+        return supabase_async
+    return _make_async_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+
+async def close_async_clients() -> None:
+    """
+    Tutup pool httpx async (dipanggil saat shutdown app).
+    """
+    for http_client in _async_http_clients:
+        if not http_client.is_closed:
+            await http_client.aclose()
+
+
+# -------------------------
+# Read replica routing
+# -------------------------
+# kode error PostgREST kalau koneksi ke DB bermasalah (bukan salah query)
+_REPLICA_FAILOVER_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+
+class _ReplicaPool:
+    """
+    Round-robin antar replica + tandai replica "down" selama cooldown kalau gagal.
+    Primary selalu jadi kandidat terakhir.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self._rr = itertools.count()
+        self._down_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[str]:
+        if not self.urls:
+            return [SUPABASE_URL]
+        start = next(self._rr) % len(self.urls)
+        ordered = self.urls[start:] + self.urls[:start]
+        now = time.monotonic()
+        with self._lock:
+            healthy = [u for u in ordered if self._down_until.get(u, 0) <= now]
+        return healthy + [SUPABASE_URL]
+
+    def mark_down(self, url: str) -> None:
+        with self._lock:
+            self._down_until[url] = time.monotonic() + settings.READ_REPLICA_COOLDOWN_SECONDS
+        logger.warning("Read replica %s gagal, dialihkan selama %ss", url, settings.READ_REPLICA_COOLDOWN_SECONDS)
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [{"url": u, "healthy": self._down_until.get(u, 0) <= now} for u in self.urls]
+
+
+_replicas = _ReplicaPool(settings.SUPABASE_READ_REPLICA_URLS)
+
+
+def _should_failover(e: Exception) -> bool:
+    if isinstance(e, httpx.TransportError):
+        return True
+    if isinstance(e, APIError):
+        code = e.code
+        if isinstance(code, int):
+            return code >= 500
+        return str(code or "") in _REPLICA_FAILOVER_CODES
+    return False
+
+
+def run_read(build: Callable[[Client], Any]) -> Any:
+    """
+    Eksekusi query read-only di read replica (kalau dikonfigurasi).
+    `build` menerima client dan mengembalikan query builder, contoh:
+        run_read(lambda db: db.table("penulis").select("*").order("nama_penulis"))
+    Replica error koneksi -> coba replica berikutnya, terakhir primary.
+    Catatan: replica bisa sedikit tertinggal (replication lag) dari primary.
+    """
+    for url in _replicas.candidates():
+        try:
+            return build(_make_client(url, SUPABASE_ADMIN_KEY)).execute()
+        except Exception as e:
+            if url == SUPABASE_URL or not _should_failover(e):
+                raise
+            _replicas.mark_down(url)
+
+
+async def arun_read(build: Callable[[AsyncClient], Any]) -> Any:
+    """
+    Versi async dari run_read().
+    """
+    for url in _replicas.candidates():
+        try:
+            return await build(_make_async_client(url, SUPABASE_ADMIN_KEY)).execute()
+        except Exception as e:
+            if url == SUPABASE_URL or not _should_failover(e):
+                raise
+            _replicas.mark_down(url)
+
+
+def read_replica_status() -> List[Dict[str, Any]]:
+    return _replicas.status()
+
+
 def storage_public_url(bucket: str, object_path: str) -> str:
     """
     Generate public URL untuk file di Supabase Storage bucket (PUBLIC).
@@ -7,15 +7,49 @@ from typing import Any, Dict, Iterable, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
-from app.database import supabase
+from app.core.config import settings
+from app.database import supabase_async
+from app.services import token_version_service
+from app.utils.ttl_cache import TTLCache
 
 load_dotenv()
 
 security = HTTPBearer(auto_error=False)
 
+# Cache user per proses (key: id_user). Wajib di-invalidate oleh endpoint yang
+# mengubah role / is_active / profil, lihat invalidate_cached_user().
+_user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_cached_user(id_user: Any) -> None:
+    try:
+        _user_cache.invalidate(int(id_user))
+    except (TypeError, ValueError):
+        pass
+
+
+def revoke_user_tokens(id_user: Any) -> Optional[int]:
+    """
+    Dipanggil saat role / is_active user berubah.
+    - selalu buang cache user
+    - mode AUTH_STATELESS: naikkan token_version (token lama ditolak), return versi baru
+    """
+    invalidate_cached_user(id_user)
+    if settings.AUTH_STATELESS:
+        return token_version_service.bump_token_version(int(id_user))
+    return None
+
+
+def user_cache_stats() -> Dict[str, Any]:
+    return {"enabled": settings.USER_CACHE_ENABLED, **_user_cache.stats()}
+
 
 def sanitize_user(user: Optional[dict]) -> Optional[dict]:
     """
@@ -94,6 +128,76 @@ def _token_from_cookie(request: Request) -> Optional[str]:
     return None
 
 
+async def _fetch_user(id_user: Optional[int], email: Optional[str]) -> dict:
+    try:
+        q = supabase_async.table("users").select("*")
+        if id_user is not None:
+            q = q.eq("id_user", id_user)
+        elif email is not None:
+            q = q.eq("email", email)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token tidak valid atau kadaluarsa",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        user_res = await q.limit(1).execute()
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Gagal memverifikasi user")
+
+    if not user_res.data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token tidak valid atau kadaluarsa",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user_res.data[0]
+
+
+# isi user mode stateless (lihat _user_from_claims)
+_CLAIM_KEYS = frozenset(("id_user", "email", "nama", "role", "is_active"))
+
+
+async def _user_from_claims(payload: Dict[str, Any], id_user: int) -> dict:
+    """
+    Mode AUTH_STATELESS: percaya claim JWT yang sudah terverifikasi.
+    Revocation lewat token_version (tabel versi in-memory, refresh bulk).
+    Tabel belum pernah berhasil dimuat -> cek token_version per user ke DB (tidak fail-open).
+    """
+    if token_version_service.is_stale():
+        # gagal di-log + backoff di dalam refresh_versions; tabel lama tetap dipakai
+        await run_in_threadpool(token_version_service.refresh_versions)
+
+    if not token_version_service.is_loaded():
+        user = await _fetch_user(id_user, None)
+        current = int(user.get("token_version") or 0)
+    else:
+        user = None
+        current = token_version_service.current_version(id_user)
+
+    if int(payload.get("tv") or 0) < current:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sesi sudah tidak berlaku, silakan login ulang",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if user is not None:
+        # role / is_active dari DB (lebih baru dari claim)
+        return user
+
+    return {
+        "id_user": id_user,
+        "email": payload.get("sub") or payload.get("email"),
+        "nama": payload.get("nama"),
+        "role": payload.get("role") or "customer",
+        "is_active": payload.get("is_active", True),
+    }
+
+
 async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -101,6 +205,7 @@ async def get_current_user(
     """
     - Prioritas token: Authorization Bearer
     - Fallback: cookie token
+    - AUTH_STATELESS=true: identitas diambil dari claim JWT (tanpa query users)
     """
     token = None
     if credentials is not None and credentials.credentials:
@@ -119,33 +224,16 @@ async def get_current_user(
     payload = _decode_token(token)
     id_user, email = _extract_identity(payload)
 
-    try:
-        q = supabase.table("users").select("*")
-        if id_user is not None:
-            q = q.eq("id_user", id_user)
-        elif email is not None:
-            q = q.eq("email", email)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token tidak valid atau kadaluarsa",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    stateless = settings.AUTH_STATELESS and id_user is not None and "tv" in payload
+    use_cache = settings.USER_CACHE_ENABLED and id_user is not None and not stateless
+    user = _user_cache.get(id_user) if use_cache else None
 
-        user_res = q.limit(1).execute()
-    except HTTPException:
-        raise
-    except Exception:
-        raise HTTPException(status_code=500, detail="Gagal memverifikasi user")
-
-    if not user_res.data:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token tidak valid atau kadaluarsa",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    user = user_res.data[0]
+    if stateless:
+        user = await _user_from_claims(payload, id_user)
+    elif user is None:
+        user = await _fetch_user(id_user, email)
+        if use_cache:
+            _user_cache.set(id_user, sanitize_user(user))
 
     if user.get("is_active") is False:
         raise HTTPException(
@@ -157,6 +245,24 @@ async def get_current_user(
     return sanitize_user(user) or {}
 
 
+async def get_current_user_profile(user: dict = Depends(get_current_user)) -> dict:
+    """
+    User + semua kolom profil (avatar_url, no_hp, alamat, timestamp) untuk endpoint profil seperti /auth/me.
+    Mode AUTH_STATELESS: get_current_user hanya berisi claim JWT -> baris users dimuat di sini
+    (lewat cache user). Cek otorisasi cukup pakai get_current_user.
+    """
+    if not set(user) <= _CLAIM_KEYS:
+        return user
+
+    id_user = int(user["id_user"])
+    full = _user_cache.get(id_user) if settings.USER_CACHE_ENABLED else None
+    if full is None:
+        full = sanitize_user(await _fetch_user(id_user, None))
+        if settings.USER_CACHE_ENABLED:
+            _user_cache.set(id_user, full)
+    return sanitize_user(full) or {}
+
+
 def _role_in(user: dict, roles: Iterable[str]) -> bool:
     role = str(user.get("role") or "customer").lower().strip()
     allow = {r.lower().strip() for r in roles}
@@ -1,4 +1,6 @@
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from dotenv import load_dotenv
 
@@ -8,6 +10,14 @@ from fastapi.middleware.cors import CORSMiddleware
 load_dotenv()
 
 from app.routers import auth, books, orders, authors, users, cart, admin  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.database import close_async_clients  # noqa: E402
+from app.services import search_index  # noqa: E402
+from app.services.seed_service import startup_self_check  # noqa: E402
+from app.utils.compression import CompressionMiddleware  # noqa: E402
+from app.utils.executors import get_io_executor, shutdown_executors  # noqa: E402
+from app.utils.fast_json import default_response_class  # noqa: E402
+from app.utils.upstream_metrics import UpstreamMetricsMiddleware  # noqa: E402
 
 APP_TITLE = os.getenv("APP_TITLE", "CMS E-Commerce Buku")
 APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
@@ -25,11 +35,28 @@ openapi_tags = [
     {"name": "Admin - Books", "description": "CMS buku (CRUD, bulk update, toggle)"},
 ]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # master data (status, jenis pembayaran, genre) dimuat sekali di background + self-check seed
+    get_io_executor().submit(startup_self_check)
+    # index pencarian dibangun di background, request tidak menunggu startup
+    if settings.SEARCH_INDEX_ENABLED and settings.SEARCH_INDEX_BUILD_ON_STARTUP:
+        search_index.schedule_rebuild()
+    yield
+    # tutup pool executor (bcrypt / I/O blocking) + pool HTTP async saat shutdown
+    shutdown_executors()
+    await close_async_clients()
+
+
 app = FastAPI(
     title=APP_TITLE,
     description=APP_DESCRIPTION,
     version=APP_VERSION,
     openapi_tags=openapi_tags,
+    lifespan=lifespan,
+    # orjson (kalau terpasang) untuk semua response dict/list
+    default_response_class=default_response_class(),
 )
 
 # CORS
@@ -49,6 +76,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip / brotli untuk response JSON besar (threshold + opt-out per route, aman untuk streaming)
+app.add_middleware(CompressionMiddleware)
+
+# Hitung round trip Supabase per request -> header Server-Timing + histogram per route
+app.add_middleware(UpstreamMetricsMiddleware)
+
 # Routers
 app.include_router(auth.router)
 app.include_router(users.router)
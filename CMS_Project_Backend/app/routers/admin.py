@@ -7,12 +7,17 @@ from typing import Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks
 from pydantic import BaseModel
 
-from app.database import supabase
-from app.dependencies import get_current_admin
+from app.database import read_replica_status, run_read, supabase
+from app.dependencies import get_current_admin, revoke_user_tokens, user_cache_stats
 from app.utils.csv_reader import read_csv_upload
 from app.services.import_job_service import create_job, run_books_import_job
 from app.services.seed_service import seed_master_data
+from app.services import catalog_cache, catalog_snapshot, master_data, related_books, search_index, suggest_index
+from app.services.catalog_events import notify_changed
 from app.core.config import settings
+from app.utils import compression, upstream_metrics
+from app.utils.executors import run_io
+from app.utils.pagination import count_cache_stats, fetch_page, normalize_count_mode, sanitize_paging
 
 from app.services.audit_service import log_event
 
@@ -62,16 +67,15 @@ def _now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _sanitize_paging(page: int, limit: int, max_limit: int = 100):
-    if page < 1:
-        page = 1
-    if limit < 1:
-        limit = 20
-    if limit > max_limit:
-        limit = max_limit
-    start = (page - 1) * limit
-    end = start + limit - 1
-    return page, limit, start, end
+def _paged_meta(page: int, limit: int, total: int, count_mode: str, **extra) -> Dict[str, Any]:
+    return {
+        "page": page,
+        "limit": limit,
+        "total": total,
+        "total_pages": (total + limit - 1) // limit,
+        **extra,
+        "count_mode": count_mode,
+    }
 
 
 def _sanitize_sort(sort_by: str, order: str, allowed: set, default_sort: str):
@@ -110,26 +114,11 @@ def _safe_count(resp: Any) -> int:
     return 0
 
 
-_status_cache: Dict[str, int] = {}
-
-
 def _get_status_pembayaran_id(nama_status: str) -> Optional[int]:
-    if nama_status in _status_cache:
-        return _status_cache[nama_status]
     try:
-        res = (
-            supabase.table("status_pembayaran")
-            .select("id_status_pembayaran")
-            .eq("nama_status", nama_status)
-            .limit(1)
-            .execute()
-        )
-        if res.data:
-            _status_cache[nama_status] = int(res.data[0]["id_status_pembayaran"])
-            return _status_cache[nama_status]
+        return master_data.get_id("status_pembayaran", nama_status)
     except Exception:
         return None
-    return None
 
 
 # ===========================
@@ -250,6 +239,7 @@ def create_genre(data: GenreInput, admin: dict = Depends(get_current_admin)):
 
         res = supabase.table("genre").insert(data.dict()).execute()
         created = res.data[0]
+        notify_changed("genre", [created.get("id_genre")])
         _safe_audit(admin, "CREATE_GENRE", entity="genre", entity_id=created.get("id_genre"), metadata={"slug": data.slug})
         return {"message": "Genre berhasil ditambahkan", "data": created}
     except HTTPException:
@@ -263,6 +253,7 @@ def create_author(data: PenulisInput, admin: dict = Depends(get_current_admin)):
     try:
         res = supabase.table("penulis").insert(data.dict(exclude_unset=True)).execute()
         created = res.data[0]
+        notify_changed("penulis", [created.get("id_penulis")])
         _safe_audit(admin, "CREATE_AUTHOR", entity="penulis", entity_id=created.get("id_penulis"), metadata={"nama_penulis": created.get("nama_penulis")})
         return {"message": "Penulis berhasil ditambahkan", "data": created}
     except Exception as e:
@@ -273,43 +264,51 @@ def create_author(data: PenulisInput, admin: dict = Depends(get_current_admin)):
 # 2B) PAGED LIST (Dropdown pro)
 # ===========================
 @router.get("/genres/paged")
-def admin_list_genres_paged(page: int = 1, limit: int = 20, q: Optional[str] = None, admin: dict = Depends(get_current_admin)):
+def admin_list_genres_paged(
+    page: int = 1,
+    limit: int = 20,
+    q: Optional[str] = None,
+    count_mode: Optional[str] = None,
+    admin: dict = Depends(get_current_admin),
+):
     try:
-        page, limit, start, end = _sanitize_paging(page, limit, max_limit=100)
-
-        count_q = supabase.table("genre").select("id_genre", count="exact")
-        data_q = supabase.table("genre").select("*")
-
-        if q and q.strip():
-            s = q.strip()
-            count_q = count_q.ilike("nama_genre", f"%{s}%")
-            data_q = data_q.ilike("nama_genre", f"%{s}%")
-
-        total = (count_q.execute().count) or 0
-        res = data_q.order("nama_genre").range(start, end).execute()
-
-        return {"meta": {"page": page, "limit": limit, "total": total, "total_pages": (total + limit - 1) // limit}, "data": res.data or []}
+        page, limit, start, end = sanitize_paging(page, limit, max_limit=100)
+        count_mode = normalize_count_mode(count_mode)
+        q_norm = (q or "").strip().lower() or None
+
+        def _build(db, count):
+            query = db.table("genre").select("*", count=count)
+            if q_norm:
+                query = query.ilike("nama_genre", f"%{q_norm}%")
+            return query.order("nama_genre")
+
+        rows, total = fetch_page(_build, start=start, end=end, count_mode=count_mode, cache_key=("genre", q_norm))
+        return {"meta": _paged_meta(page, limit, total, count_mode), "data": rows}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/authors/paged")
-def admin_list_authors_paged(page: int = 1, limit: int = 20, q: Optional[str] = None, admin: dict = Depends(get_current_admin)):
+def admin_list_authors_paged(
+    page: int = 1,
+    limit: int = 20,
+    q: Optional[str] = None,
+    count_mode: Optional[str] = None,
+    admin: dict = Depends(get_current_admin),
+):
     try:
-        page, limit, start, end = _sanitize_paging(page, limit, max_limit=100)
-
-        count_q = supabase.table("penulis").select("id_penulis", count="exact")
-        data_q = supabase.table("penulis").select("*")
-
-        if q and q.strip():
-            s = q.strip()
-            count_q = count_q.ilike("nama_penulis", f"%{s}%")
-            data_q = data_q.ilike("nama_penulis", f"%{s}%")
-
-        total = (count_q.execute().count) or 0
-        res = data_q.order("nama_penulis").range(start, end).execute()
-
-        return {"meta": {"page": page, "limit": limit, "total": total, "total_pages": (total + limit - 1) // limit}, "data": res.data or []}
+        page, limit, start, end = sanitize_paging(page, limit, max_limit=100)
+        count_mode = normalize_count_mode(count_mode)
+        q_norm = (q or "").strip().lower() or None
+
+        def _build(db, count):
+            query = db.table("penulis").select("*", count=count)
+            if q_norm:
+                query = query.ilike("nama_penulis", f"%{q_norm}%")
+            return query.order("nama_penulis")
+
+        rows, total = fetch_page(_build, start=start, end=end, count_mode=count_mode, cache_key=("penulis", q_norm))
+        return {"meta": _paged_meta(page, limit, total, count_mode), "data": rows}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -320,8 +319,7 @@ def admin_list_authors_paged(page: int = 1, limit: int = 20, q: Optional[str] =
 @router.get("/master/status-order")
 def master_status_order(admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("status_order").select("*").order("urutan_status").execute()
-        return res.data or []
+        return master_data.rows("status_order")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -329,20 +327,27 @@ def master_status_order(admin: dict = Depends(get_current_admin)):
 @router.get("/master/status-pembayaran")
 def master_status_pembayaran(admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("status_pembayaran").select("*").order("id_status_pembayaran").execute()
-        return res.data or []
+        return master_data.rows("status_pembayaran")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/master/stats")
+def admin_master_data_stats(admin: dict = Depends(get_current_admin)):
+    """
+    Versi & umur registry master data di instance ini.
+    """
+    return master_data.stats()
+
+
 # ===========================
 # PAYMENT METHODS (ADMIN)
 # ===========================
 @router.get("/payment-methods")
 def admin_get_payment_methods(admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("jenis_pembayaran").select("*").order("id_jenis_pembayaran", desc=True).execute()
-        return res.data or []
+        # terbaru dulu (registry urut id naik)
+        return master_data.rows("jenis_pembayaran")[::-1]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -355,30 +360,29 @@ def admin_get_payment_methods_paged(
     is_active: Optional[bool] = None,
     sort_by: str = "id_jenis_pembayaran",
     order: str = "desc",
+    count_mode: Optional[str] = None,
     admin: dict = Depends(get_current_admin),
 ):
     try:
-        page, limit, start, end = _sanitize_paging(page, limit, max_limit=100)
+        page, limit, start, end = sanitize_paging(page, limit, max_limit=100)
         sort_by, order = _sanitize_sort(sort_by, order, {"id_jenis_pembayaran", "nama_pembayaran", "is_active"}, "id_jenis_pembayaran")
-
-        count_q = supabase.table("jenis_pembayaran").select("id_jenis_pembayaran", count="exact")
-        data_q = supabase.table("jenis_pembayaran").select("*")
-
-        if q and q.strip():
-            s = q.strip()
-            data_q = data_q.ilike("nama_pembayaran", f"%{s}%")
-            count_q = count_q.ilike("nama_pembayaran", f"%{s}%")
-
-        if is_active is not None:
-            data_q = data_q.eq("is_active", is_active)
-            count_q = count_q.eq("is_active", is_active)
-
-        total = (count_q.execute().count) or 0
-        res = data_q.order(sort_by, desc=(order == "desc")).range(start, end).execute()
-
+        count_mode = normalize_count_mode(count_mode)
+        q_norm = (q or "").strip().lower() or None
+
+        def _build(db, count):
+            query = db.table("jenis_pembayaran").select("*", count=count)
+            if q_norm:
+                query = query.ilike("nama_pembayaran", f"%{q_norm}%")
+            if is_active is not None:
+                query = query.eq("is_active", is_active)
+            return query.order(sort_by, desc=(order == "desc"))
+
+        rows, total = fetch_page(
+            _build, start=start, end=end, count_mode=count_mode, cache_key=("jenis_pembayaran", q_norm, is_active)
+        )
         return {
-            "meta": {"page": page, "limit": limit, "total": total, "total_pages": (total + limit - 1) // limit, "sort_by": sort_by, "order": order},
-            "data": res.data or [],
+            "meta": _paged_meta(page, limit, total, count_mode, sort_by=sort_by, order=order),
+            "data": rows,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -393,6 +397,7 @@ def admin_create_payment_method(data: PaymentMethodInput, admin: dict = Depends(
 
         res = supabase.table("jenis_pembayaran").insert(data.dict()).execute()
         created = res.data[0]
+        notify_changed("jenis_pembayaran", [created.get("id_jenis_pembayaran")])
         _safe_audit(admin, "CREATE_PAYMENT_METHOD", entity="jenis_pembayaran", entity_id=created.get("id_jenis_pembayaran"), metadata={"nama": data.nama_pembayaran})
         return {"message": "Metode pembayaran berhasil ditambahkan", "data": created}
     except HTTPException:
@@ -412,6 +417,7 @@ def admin_update_payment_method(pm_id: int, data: PaymentMethodUpdate, admin: di
         if not res.data:
             raise HTTPException(status_code=404, detail="Metode pembayaran tidak ditemukan")
 
+        notify_changed("jenis_pembayaran", [pm_id])
         _safe_audit(admin, "UPDATE_PAYMENT_METHOD", entity="jenis_pembayaran", entity_id=pm_id, metadata={"changes": payload})
         return {"message": "Metode pembayaran berhasil diupdate", "data": res.data[0]}
     except HTTPException:
@@ -427,6 +433,7 @@ def admin_toggle_payment_method(pm_id: int, is_active: bool, admin: dict = Depen
         if not res.data:
             raise HTTPException(status_code=404, detail="Metode pembayaran tidak ditemukan")
 
+        notify_changed("jenis_pembayaran", [pm_id])
         _safe_audit(admin, "TOGGLE_PAYMENT_METHOD", entity="jenis_pembayaran", entity_id=pm_id, metadata={"is_active": is_active})
         return {"message": "Status metode pembayaran diperbarui", "data": res.data[0]}
     except HTTPException:
@@ -438,16 +445,53 @@ def admin_toggle_payment_method(pm_id: int, is_active: bool, admin: dict = Depen
 # ===========================
 # UPLOAD COVER BUKU (buku.cover_image)
 # ===========================
+def _select_one(table: str, cols: str, key: str, value: int) -> Optional[dict]:
+    res = supabase.table(table).select(cols).eq(key, value).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+def _replace_image(
+    *,
+    table: str,
+    key: str,
+    row_id: int,
+    column: str,
+    new_path: str,
+    old_path: Optional[str],
+    content: bytes,
+    content_type: str,
+    extra: Optional[dict] = None,
+) -> Optional[str]:
+    """
+    Upload file baru, update kolom URL, lalu hapus file lama (best effort).
+    Sync (blocking) -> dipanggil lewat run_io dari handler async.
+    Return public_url, atau None kalau update DB tidak mengembalikan row.
+    """
+    _storage_upload(new_path, content, content_type)
+    public_url = supabase.storage.from_(BUCKET).get_public_url(new_path)
+
+    upd = supabase.table(table).update({column: public_url, **(extra or {})}).eq(key, row_id).execute()
+    if not upd.data:
+        return None
+
+    if old_path and old_path != new_path:
+        try:
+            supabase.storage.from_(BUCKET).remove([old_path])
+        except Exception:
+            pass
+    return public_url
+
+
 @router.post("/books/{book_id}/cover", status_code=201)
 async def upload_book_cover(book_id: int, file: UploadFile = File(...), admin: dict = Depends(get_current_admin)):
     if file.content_type not in ALLOWED_CT:
         raise HTTPException(status_code=400, detail="File harus gambar: jpg/png/webp")
 
-    book_res = supabase.table("buku").select("id_buku, cover_image").eq("id_buku", book_id).limit(1).execute()
-    if not book_res.data:
+    book = await run_io(_select_one, "buku", "id_buku, cover_image", "id_buku", book_id)
+    if not book:
         raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
 
-    old_url = book_res.data[0].get("cover_image")
+    old_url = book.get("cover_image")
     old_path = _infer_storage_path_from_public_url(old_url)
 
     content = await file.read()
@@ -460,20 +504,23 @@ async def upload_book_cover(book_id: int, file: UploadFile = File(...), admin: d
     new_path = f"books/{book_id}/{uuid.uuid4().hex}.{ext}"
 
     try:
-        _storage_upload(new_path, content, file.content_type)
-        public_url = supabase.storage.from_(BUCKET).get_public_url(new_path)
-
-        upd = supabase.table("buku").update({"cover_image": public_url, "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
-        if not upd.data:
+        public_url = await run_io(
+            _replace_image,
+            table="buku",
+            key="id_buku",
+            row_id=book_id,
+            column="cover_image",
+            new_path=new_path,
+            old_path=old_path,
+            content=content,
+            content_type=file.content_type,
+            extra={"updated_at": _now_utc_iso()},
+        )
+        if not public_url:
             raise HTTPException(status_code=500, detail="Gagal update cover di database")
 
-        if old_path and old_path != new_path:
-            try:
-                supabase.storage.from_(BUCKET).remove([old_path])
-            except Exception:
-                pass
-
-        _safe_audit(admin, "UPLOAD_BOOK_COVER", entity="buku", entity_id=book_id, metadata={"path": new_path})
+        notify_changed("buku", [book_id])
+        await run_io(_safe_audit, admin, "UPLOAD_BOOK_COVER", entity="buku", entity_id=book_id, metadata={"path": new_path})
         return {"message": "Cover berhasil diupload", "book_id": book_id, "cover_image": public_url, "path": new_path}
     except HTTPException:
         raise
@@ -501,6 +548,7 @@ def delete_book_cover(book_id: int, admin: dict = Depends(get_current_admin)):
                 pass
 
         supabase.table("buku").update({"cover_image": None, "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
+        notify_changed("buku", [book_id])
         _safe_audit(admin, "DELETE_BOOK_COVER", entity="buku", entity_id=book_id, metadata={"path": path})
         return {"message": "Cover berhasil dihapus"}
     except Exception as e:
@@ -515,11 +563,11 @@ async def upload_author_photo(author_id: int, file: UploadFile = File(...), admi
     if file.content_type not in ALLOWED_CT:
         raise HTTPException(status_code=400, detail="File harus gambar: jpg/png/webp")
 
-    author_res = supabase.table("penulis").select("id_penulis, foto_penulis").eq("id_penulis", author_id).limit(1).execute()
-    if not author_res.data:
+    author = await run_io(_select_one, "penulis", "id_penulis, foto_penulis", "id_penulis", author_id)
+    if not author:
         raise HTTPException(status_code=404, detail="Penulis tidak ditemukan")
 
-    old_url = author_res.data[0].get("foto_penulis")
+    old_url = author.get("foto_penulis")
     old_path = _infer_storage_path_from_public_url(old_url)
 
     content = await file.read()
@@ -532,20 +580,22 @@ async def upload_author_photo(author_id: int, file: UploadFile = File(...), admi
     new_path = f"authors/{author_id}/{uuid.uuid4().hex}.{ext}"
 
     try:
-        _storage_upload(new_path, content, file.content_type)
-        public_url = supabase.storage.from_(BUCKET).get_public_url(new_path)
-
-        upd = supabase.table("penulis").update({"foto_penulis": public_url}).eq("id_penulis", author_id).execute()
-        if not upd.data:
+        public_url = await run_io(
+            _replace_image,
+            table="penulis",
+            key="id_penulis",
+            row_id=author_id,
+            column="foto_penulis",
+            new_path=new_path,
+            old_path=old_path,
+            content=content,
+            content_type=file.content_type,
+        )
+        if not public_url:
             raise HTTPException(status_code=500, detail="Gagal update foto_penulis")
 
-        if old_path and old_path != new_path:
-            try:
-                supabase.storage.from_(BUCKET).remove([old_path])
-            except Exception:
-                pass
-
-        _safe_audit(admin, "UPLOAD_AUTHOR_PHOTO", entity="penulis", entity_id=author_id, metadata={"path": new_path})
+        notify_changed("penulis", [author_id])
+        await run_io(_safe_audit, admin, "UPLOAD_AUTHOR_PHOTO", entity="penulis", entity_id=author_id, metadata={"path": new_path})
         return {"message": "Foto penulis berhasil diupload", "author_id": author_id, "foto_penulis": public_url, "path": new_path}
     except HTTPException:
         raise
@@ -573,6 +623,7 @@ def delete_author_photo(author_id: int, admin: dict = Depends(get_current_admin)
                 pass
 
         supabase.table("penulis").update({"foto_penulis": None}).eq("id_penulis", author_id).execute()
+        notify_changed("penulis", [author_id])
         _safe_audit(admin, "DELETE_AUTHOR_PHOTO", entity="penulis", entity_id=author_id, metadata={"path": path})
         return {"message": "Foto penulis berhasil dihapus"}
     except Exception as e:
@@ -600,26 +651,38 @@ def import_books_csv(background_tasks: BackgroundTasks, file: UploadFile = File(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/import-jobs/{job_id}")
-def get_import_job(job_id: int, admin: dict = Depends(get_current_admin)):
-    res = supabase.table("import_jobs").select("*").eq("id", job_id).limit(1).execute()
-    if not res.data:
-        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
-    return res.data[0]
-
-
 @router.get("/import-jobs")
 def list_import_jobs(admin: dict = Depends(get_current_admin)):
-    res = supabase.table("import_jobs").select("*").order("created_at", desc=True).execute()
+    res = run_read(lambda db: db.table("import_jobs").select("*").order("created_at", desc=True))
     return res.data or []
 
 
 @router.get("/import-jobs/paged")
-def list_import_jobs_paged(page: int = 1, limit: int = 20, admin: dict = Depends(get_current_admin)):
-    page, limit, start, end = _sanitize_paging(page, limit, max_limit=100)
-    total = (supabase.table("import_jobs").select("id", count="exact").execute().count) or 0
-    res = supabase.table("import_jobs").select("*").order("created_at", desc=True).range(start, end).execute()
-    return {"meta": {"page": page, "limit": limit, "total": total, "total_pages": (total + limit - 1) // limit}, "data": res.data or []}
+def list_import_jobs_paged(
+    page: int = 1,
+    limit: int = 20,
+    count_mode: Optional[str] = None,
+    admin: dict = Depends(get_current_admin),
+):
+    page, limit, start, end = sanitize_paging(page, limit, max_limit=100)
+    count_mode = normalize_count_mode(count_mode)
+    rows, total = fetch_page(
+        lambda db, count: db.table("import_jobs").select("*", count=count).order("created_at", desc=True),
+        start=start,
+        end=end,
+        count_mode=count_mode,
+        cache_key=("import_jobs",),
+    )
+    return {"meta": _paged_meta(page, limit, total, count_mode), "data": rows}
+
+
+# dideklarasikan setelah /import-jobs/paged supaya "paged" tidak ketangkap sebagai job_id
+@router.get("/import-jobs/{job_id}")
+def get_import_job(job_id: int, admin: dict = Depends(get_current_admin)):
+    res = supabase.table("import_jobs").select("*").eq("id", job_id).limit(1).execute()
+    if not res.data:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return res.data[0]
 
 
 # ===========================
@@ -627,14 +690,13 @@ def list_import_jobs_paged(page: int = 1, limit: int = 20, admin: dict = Depends
 # ===========================
 @router.get("/orders")
 def get_all_orders(admin: dict = Depends(get_current_admin)):
-    res = (
-        supabase.table("orders")
+    res = run_read(
+        lambda db: db.table("orders")
         .select(
             "*, users(nama, email), status_order(nama_status), status_pembayaran(nama_status), "
             "order_item(id_order_item, id_order, id_buku, jumlah, harga_satuan, subtotal, created_at, buku(judul, cover_image))"
         )
         .order("created_at", desc=True)
-        .execute()
     )
     return res.data or []
 
@@ -700,7 +762,7 @@ def update_order_status(id_order: int, status: StatusUpdate, admin: dict = Depen
 # ===========================
 @router.get("/users")
 def admin_list_users(admin: dict = Depends(get_current_admin)):
-    res = supabase.table("users").select("id_user, nama, email, role, is_active, created_at").order("id_user", desc=True).execute()
+    res = run_read(lambda db: db.table("users").select("id_user, nama, email, role, is_active, created_at").order("id_user", desc=True))
     return res.data or []
 
 
@@ -709,6 +771,7 @@ def admin_toggle_user(id_user: int, is_active: bool, admin: dict = Depends(get_c
     res = supabase.table("users").update({"is_active": is_active}).eq("id_user", id_user).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    revoke_user_tokens(id_user)
 
     _safe_audit(admin, "TOGGLE_USER_ACTIVE", entity="users", entity_id=id_user, metadata={"is_active": is_active})
     return {"message": "Status user diperbarui", "data": res.data[0]}
@@ -723,17 +786,105 @@ def admin_set_user_role(id_user: int, payload: UserRoleUpdate, admin: dict = Dep
     res = supabase.table("users").update({"role": role}).eq("id_user", id_user).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    revoke_user_tokens(id_user)
 
     return {"message": "Role user berhasil diubah", "data": res.data[0]}
 
 
+# ===========================
+# CACHE STATS
+# ===========================
+@router.get("/cache-stats")
+def admin_cache_stats(admin: dict = Depends(get_current_admin)):
+    """
+    Hit/miss cache per proses (berguna untuk lihat berapa query DB yang dihemat).
+    """
+    return {
+        "users": user_cache_stats(),
+        "catalog": catalog_cache.stats(),
+        "paged_counts": count_cache_stats(),
+        "read_replicas": read_replica_status(),
+    }
+
+
+@router.get("/search-index/stats")
+def admin_search_index_stats(admin: dict = Depends(get_current_admin)):
+    """
+    Ukuran index pencarian in-memory (jumlah dokumen/term, estimasi byte) + waktu build terakhir.
+    """
+    return {**search_index.stats(), "suggest": suggest_index.stats(), "related": related_books.stats()}
+
+
+@router.post("/search-index/rebuild")
+async def admin_search_index_rebuild(admin: dict = Depends(get_current_admin)):
+    try:
+        stats = await run_io(search_index.rebuild)
+        stats["suggest"] = await run_io(suggest_index.rebuild)
+        stats["related"] = await run_io(related_books.rebuild)
+        await run_io(_safe_audit, admin, "REBUILD_SEARCH_INDEX", metadata={"docs": stats.get("docs")})
+        return {"message": "Search index dibangun ulang", "stats": stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gagal membangun search index: {str(e)}")
+
+
+@router.get("/catalog-snapshot/stats")
+def admin_catalog_snapshot_stats(admin: dict = Depends(get_current_admin)):
+    return catalog_snapshot.stats()
+
+
+@router.post("/catalog-snapshot/rebuild")
+async def admin_catalog_snapshot_rebuild(admin: dict = Depends(get_current_admin)):
+    """
+    Build penuh snapshot katalog ke storage (shard yang isinya tidak berubah tidak di-upload ulang).
+    """
+    try:
+        manifest = await run_io(catalog_snapshot.rebuild)
+        await run_io(
+            _safe_audit,
+            admin,
+            "REBUILD_CATALOG_SNAPSHOT",
+            metadata={"version": manifest.get("version"), "books": manifest.get("books", {}).get("count")},
+        )
+        return {"message": "Snapshot katalog diterbitkan", "stats": catalog_snapshot.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gagal membangun snapshot katalog: {str(e)}")
+
+
+@router.get("/metrics/upstream")
+def admin_upstream_metrics(admin: dict = Depends(get_current_admin)):
+    """
+    Histogram jumlah & durasi call Supabase per route (deteksi N+1 / regresi).
+    """
+    return upstream_metrics.snapshot()
+
+
+@router.delete("/metrics/upstream")
+def admin_reset_upstream_metrics(admin: dict = Depends(get_current_admin)):
+    upstream_metrics.reset()
+    return {"message": "Metrics upstream di-reset"}
+
+
+@router.get("/metrics/compression")
+def admin_compression_metrics(admin: dict = Depends(get_current_admin)):
+    """
+    Byte sebelum/sesudah kompresi + CPU kompresi per encoding & per route, dan alasan response dilewati.
+    """
+    return compression.snapshot()
+
+
+@router.delete("/metrics/compression")
+def admin_reset_compression_metrics(admin: dict = Depends(get_current_admin)):
+    compression.reset()
+    return {"message": "Metrics kompresi di-reset"}
+
+
 # ===========================
 # AUDIT LOGS (opsional)
 # ===========================
 @router.get("/audit-logs")
 def admin_get_audit_logs(admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("audit_logs").select("*").order("created_at", desc=True).limit(200).execute()
+        res = run_read(lambda db: db.table("audit_logs").select("*").order("created_at", desc=True).limit(200))
         return res.data or []
     except Exception:
         return []
@@ -745,8 +896,10 @@ def admin_get_audit_logs(admin: dict = Depends(get_current_admin)):
 @router.post("/seed", status_code=201)
 def seed(admin: dict = Depends(get_current_admin)):
     try:
-        seed_master_data()
-        _safe_audit(admin, "SEED_MASTER_DATA", metadata={})
-        return {"message": "Seed master data selesai"}
+        sent = seed_master_data()
+        notify_changed("genre")
+        notify_changed("jenis_pembayaran")
+        _safe_audit(admin, "SEED_MASTER_DATA", metadata={"rows": sent})
+        return {"message": "Seed master data selesai", "rows": sent}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -6,15 +6,15 @@ from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from jose import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
 from app.database import supabase
 from app.schemas import LoginRequest, RegisterRequest, TokenResponse
-from app.dependencies import get_current_user, sanitize_user
+from app.dependencies import get_current_user_profile, sanitize_user
+from app.utils.executors import run_cpu, run_io
+from app.utils.passwords import hash_password, verify_password
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ACCESS_TOKEN_EXPIRES_MINUTES = int(
     (getattr(settings, "ACCESS_TOKEN_EXPIRES_MINUTES", None) or 120)
@@ -43,7 +43,16 @@ def _clean_optional_str(v: Optional[str]) -> Optional[str]:
     return s if s else None
 
 
-def _create_access_token(*, id_user: int, email: str, role: str, expires_minutes: int) -> str:
+def _create_access_token(
+    *,
+    id_user: int,
+    email: str,
+    role: str,
+    expires_minutes: int,
+    nama: Optional[str] = None,
+    is_active: bool = True,
+    token_version: int = 0,
+) -> str:
     if not settings.SECRET_KEY:
         raise RuntimeError("SECRET_KEY belum diset")
 
@@ -56,9 +65,56 @@ def _create_access_token(*, id_user: int, email: str, role: str, expires_minutes
         "jti": str(uuid.uuid4()),
         "exp": int((now + timedelta(minutes=expires_minutes)).timestamp()),
     }
+
+    # mode stateless: claim ini dipercaya get_current_user tanpa query users
+    if settings.AUTH_STATELESS:
+        payload["nama"] = nama
+        payload["is_active"] = bool(is_active)
+        payload["tv"] = int(token_version or 0)
+
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+def issue_access_token(user: Dict[str, Any]) -> str:
+    """
+    Buat access token dari row users (dipakai login & endpoint ganti role).
+    """
+    return _create_access_token(
+        id_user=int(user["id_user"]),
+        email=user["email"],
+        role=user.get("role", "customer"),
+        expires_minutes=ACCESS_TOKEN_EXPIRES_MINUTES,
+        nama=user.get("nama"),
+        is_active=user.get("is_active") is not False,
+        token_version=int(user.get("token_version") or 0),
+    )
+
+
+# ===========================
+# DB HELPERS (sync, dijalankan lewat run_io)
+# ===========================
+def _email_exists(email: str) -> bool:
+    res = supabase.table("users").select("id_user").eq("email", email).limit(1).execute()
+    return bool(res.data)
+
+
+def _insert_user(user_data: Dict[str, Any]) -> None:
+    supabase.table("users").insert(user_data).execute()
+
+
+def _get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    res = supabase.table("users").select("*").eq("email", email).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+def _touch_last_login(id_user: int) -> None:
+    # jangan gagalkan login kalau gagal
+    try:
+        supabase.table("users").update({"last_login": _now_utc().isoformat()}).eq("id_user", id_user).execute()
+    except Exception:
+        pass
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(user: RegisterRequest):
     email = _normalize_email(user.email)
@@ -74,11 +130,11 @@ async def register(user: RegisterRequest):
     alamat = _clean_optional_str(getattr(user, "alamat", None))
 
     # Cek duplikasi email
-    existing = supabase.table("users").select("id_user").eq("email", email).limit(1).execute()
-    if existing.data:
+    if await run_io(_email_exists, email):
         raise HTTPException(status_code=400, detail="Email sudah terdaftar")
 
-    hashed_password = pwd_context.hash(user.password)
+    # bcrypt di executor -> event loop tidak ke-block
+    hashed_password = await run_cpu(hash_password, user.password)
 
     user_data = _to_dict(user)
     user_data["nama"] = nama
@@ -94,7 +150,7 @@ async def register(user: RegisterRequest):
     user_data["is_active"] = True
 
     try:
-        supabase.table("users").insert(user_data).execute()
+        await run_io(_insert_user, user_data)
         return {"message": "Registrasi berhasil, silakan login"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gagal register: {str(e)}")
@@ -104,8 +160,7 @@ async def register(user: RegisterRequest):
 async def login(creds: LoginRequest):
     email = _normalize_email(creds.email)
 
-    res = supabase.table("users").select("*").eq("email", email).limit(1).execute()
-    user = res.data[0] if res.data else None
+    user = await run_io(_get_user_by_email, email)
 
     if not user:
         raise HTTPException(status_code=401, detail="Email atau Password salah")
@@ -113,27 +168,16 @@ async def login(creds: LoginRequest):
     if user.get("is_active") is False:
         raise HTTPException(status_code=403, detail="Akun dinonaktifkan. Hubungi admin.")
 
-    # verify password dengan aman
-    try:
-        ok = pwd_context.verify(creds.password, user.get("password") or "")
-    except Exception:
-        ok = False
+    # verify password dengan aman (bcrypt di executor)
+    ok = await run_cpu(verify_password, creds.password, user.get("password") or "")
 
     if not ok:
         raise HTTPException(status_code=401, detail="Email atau Password salah")
 
-    # Update last_login (jangan gagalkan login kalau gagal)
-    try:
-        supabase.table("users").update({"last_login": _now_utc().isoformat()}).eq("id_user", user["id_user"]).execute()
-    except Exception:
-        pass
+    # Update last_login
+    await run_io(_touch_last_login, int(user["id_user"]))
 
-    token = _create_access_token(
-        id_user=int(user["id_user"]),
-        email=user["email"],
-        role=user.get("role", "customer"),
-        expires_minutes=ACCESS_TOKEN_EXPIRES_MINUTES,
-    )
+    token = issue_access_token(user)
 
     # TokenResponse.AuthUser punya alias id_user <- "id"
     return {
@@ -149,8 +193,8 @@ async def login(creds: LoginRequest):
 
 
 @router.get("/me")
-def me(current_user: dict = Depends(get_current_user)):
+def me(current_user: dict = Depends(get_current_user_profile)):
     """
-    Frontend pakai ini untuk cek sesi login dan role.
+    Frontend pakai ini untuk cek sesi login, role, dan profil (avatar_url, dll).
     """
     return sanitize_user(current_user)
\ No newline at end of file
@@ -3,8 +3,9 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel, Field
 
-from app.database import supabase
+from app.database import run_read, supabase
 from app.dependencies import get_current_admin
+from app.services.catalog_events import notify_changed
 
 router = APIRouter(prefix="/authors", tags=["Authors"])
 
@@ -18,10 +19,13 @@ class AuthorUpsert(BaseModel):
 @router.get("/")
 def list_authors(q: Optional[str] = None):
     try:
-        query = supabase.table("penulis").select("*")
-        if q and q.strip():
-            query = query.ilike("nama_penulis", f"%{q.strip()}%")
-        res = query.order("nama_penulis").execute()
+        def _build(db):
+            query = db.table("penulis").select("*")
+            if q and q.strip():
+                query = query.ilike("nama_penulis", f"%{q.strip()}%")
+            return query.order("nama_penulis")
+
+        res = run_read(_build)
         return res.data or []
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -47,6 +51,7 @@ def create_author(payload: AuthorUpsert, admin: dict = Depends(get_current_admin
         res = supabase.table("penulis").insert(payload.dict(exclude_unset=True)).execute()
         if not res.data:
             raise HTTPException(status_code=500, detail="Gagal membuat penulis")
+        notify_changed("penulis", [res.data[0].get("id_penulis")])
         return {"message": "Penulis berhasil dibuat", "data": res.data[0]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -58,6 +63,7 @@ def update_author(author_id: int, payload: AuthorUpsert, admin: dict = Depends(g
         res = supabase.table("penulis").update(payload.dict(exclude_unset=True)).eq("id_penulis", author_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Penulis tidak ditemukan")
+        notify_changed("penulis", [author_id])
         return {"message": "Penulis berhasil diupdate", "data": res.data[0]}
     except HTTPException:
         raise
@@ -72,6 +78,7 @@ def delete_author(author_id: int, admin: dict = Depends(get_current_admin)):
         res = supabase.table("penulis").delete().eq("id_penulis", author_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Penulis tidak ditemukan")
+        notify_changed("penulis", [author_id])
         return {"message": "Penulis berhasil dihapus"}
     except HTTPException:
         raise
@@ -1,17 +1,42 @@
 # app/routers/books.py
 
+import json
+import time
 from datetime import datetime, timezone
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple, Union
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.database import supabase
+from app.core.config import settings
+from app.database import arun_read, supabase_async
 from app.dependencies import get_current_admin
+from app.services import book_export, catalog_cache, catalog_snapshot, master_data
+from app.services import related_books, search_index, suggest_index
+from app.services.catalog_events import notify_changed
+from app.utils.compression import no_compression
+from app.utils.executors import run_io
+from app.utils.fast_json import ResponseSerializer
+from app.utils.http_cache import etag_json_response
+from app.utils.pagination import (
+    InvalidCursor,
+    acount_only,
+    afetch_page,
+    decode_cursor,
+    keyset_filter,
+    keyset_order,
+    keyset_page,
+    normalize_count_mode,
+    sanitize_paging,
+)
 from app.schemas import (
     BookCreate,
     BookUpdate,
     BookResponse,
+    BookCardResponse,
+    BookFieldsResponse,
+    BookSearchHit,
     GenreResponse,
     PaymentMethodResponse,
 )
@@ -29,6 +54,11 @@ class PagingMeta(BaseModel):
     total_pages: int
     sort_by: str
     order: str
+    # mode cursor (opt-in): kirim balik next_cursor sebagai ?cursor= untuk halaman berikutnya
+    paging: str = "offset"
+    next_cursor: Optional[str] = None
+    # exact | planned | estimated | cached (planned/estimated -> total bisa perkiraan)
+    count_mode: str = "exact"
 
 
 class BooksPagedResponse(BaseModel):
@@ -36,23 +66,205 @@ class BooksPagedResponse(BaseModel):
     data: List[BookResponse]
 
 
+class BooksSearchPagedResponse(BooksPagedResponse):
+    data: List[BookSearchHit]
+
+
+class BooksCardPagedResponse(BooksPagedResponse):
+    data: List[BookCardResponse]
+
+
+class BooksFieldsPagedResponse(BooksPagedResponse):
+    data: List[BookFieldsResponse]
+
+
+class BookBatchRequest(BaseModel):
+    ids: List[int]
+    view: Optional[str] = None
+
+
+class BookBatchResponse(BaseModel):
+    # urutan data = urutan ids yang diminta; id yang tidak ada / nonaktif masuk missing
+    data: List[BookResponse]
+    missing: List[int]
+
+
+class BookCardBatchResponse(BookBatchResponse):
+    data: List[BookCardResponse]
+
+
+class IndexSearchCard(BaseModel):
+    id_buku: int
+    judul: Optional[str] = None
+    isbn: Optional[str] = None
+    harga: Optional[float] = None
+    stok: Optional[int] = None
+    cover_image: Optional[str] = None
+    id_genre: Optional[int] = None
+    id_penulis: Optional[int] = None
+    nama_penulis: Optional[str] = None
+    nama_genre: Optional[str] = None
+    created_at: Optional[datetime] = None
+    score: int
+
+
+class IndexSearchMeta(BaseModel):
+    q: str
+    total: int
+    limit: int
+    offset: int
+    took_ms: float
+    index_age_seconds: Optional[float] = None
+
+
+class IndexSearchResponse(BaseModel):
+    meta: IndexSearchMeta
+    data: List[IndexSearchCard]
+
+
+class SuggestTitle(BaseModel):
+    id_buku: int
+    judul: Optional[str] = None
+    cover_image: Optional[str] = None
+    nama_penulis: Optional[str] = None
+    terjual: int = 0
+
+
+class SuggestAuthor(BaseModel):
+    id_penulis: int
+    nama_penulis: Optional[str] = None
+    jumlah_buku: int = 0
+    terjual: int = 0
+
+
+class SuggestMeta(BaseModel):
+    q: str
+    limit: int
+    ranked_by: Optional[str] = None  # sales | recency
+    took_ms: float
+    index_age_seconds: Optional[float] = None
+
+
+class BookSuggestResponse(BaseModel):
+    meta: SuggestMeta
+    judul: List[SuggestTitle]
+    penulis: List[SuggestAuthor]
+
+
+class RelatedBookCard(IndexSearchCard):
+    alasan: str  # dibeli_bersama | penulis_sama | genre_sama
+
+
+class RelatedMeta(BaseModel):
+    id_buku: int
+    limit: int
+    source: str  # copurchase | mixed | fallback
+    took_ms: float
+    index_age_seconds: Optional[float] = None
+
+
+class BookRelatedResponse(BaseModel):
+    meta: RelatedMeta
+    data: List[RelatedBookCard]
+
+
+class GenreFacet(BaseModel):
+    id_genre: int
+    nama_genre: Optional[str] = None
+    count: int
+
+
+class PenulisFacet(BaseModel):
+    id_penulis: int
+    nama_penulis: Optional[str] = None
+    count: int
+
+
+class PriceFacet(BaseModel):
+    min: float
+    max: Optional[float] = None  # None = tanpa batas atas
+    count: int
+
+
+class StockFacet(BaseModel):
+    in_stock: int
+    out_of_stock: int
+
+
+class FacetsMeta(BaseModel):
+    q: Optional[str] = None
+    source: str  # precomputed | scan
+    took_ms: float
+    index_age_seconds: Optional[float] = None
+
+
+class BookFacetsResponse(BaseModel):
+    meta: FacetsMeta
+    total: int
+    genre: List[GenreFacet]
+    penulis: List[PenulisFacet]
+    harga: List[PriceFacet]
+    stok: StockFacet
+
+
 # ===========================
 # HELPERS
 # ===========================
-def _now_utc_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# serializer untuk response yang di-cache (byte JSON disimpan di catalog_cache)
+# TRUSTED_ROWS_FAST_PATH=true -> row DB tidak divalidasi ulang (lihat app/utils/fast_json.py)
+_BOOK_SERIALIZER = ResponseSerializer(BookResponse)
+_BOOK_CARD_SERIALIZER = ResponseSerializer(BookCardResponse)
+_BOOK_LIST_SERIALIZER = ResponseSerializer(List[BookResponse])
+_BOOKS_PAGED_SERIALIZER = ResponseSerializer(BooksPagedResponse)
+_SEARCH_HIT_LIST_SERIALIZER = ResponseSerializer(List[BookSearchHit])
+_SEARCH_PAGED_SERIALIZER = ResponseSerializer(BooksSearchPagedResponse)
+
+# view=detail (default, perilaku lama) | card (kolom kartu katalog) | fields (dari ?fields=)
+BOOK_VIEWS = ("detail", "card")
+_BOOK_SELECT_DETAIL = "*, penulis(*), genre(*)"
+_PENULIS_REF_SELECT = "penulis(id_penulis, nama_penulis)"
+_GENRE_REF_SELECT = "genre(id_genre, nama_genre, slug)"
+_BOOK_CARD_COLUMNS = (
+    "id_buku", "judul", "harga", "stok", "cover_image", "status", "id_genre", "id_penulis", "created_at",
+)
+_BOOK_FIELD_COLUMNS = (
+    "id_buku", "judul", "isbn", "harga", "stok", "berat", "deskripsi", "cover_image",
+    "status", "id_genre", "id_penulis", "created_at", "updated_at",
+)
+_BOOK_FIELD_EMBEDS = {"penulis": _PENULIS_REF_SELECT, "genre": _GENRE_REF_SELECT}
 
 
-def _sanitize_paging(page: int, limit: int, max_limit: int = 100):
-    if page < 1:
-        page = 1
-    if limit < 1:
-        limit = 20
-    if limit > max_limit:
-        limit = max_limit
-    start = (page - 1) * limit
-    end = start + limit - 1
-    return page, limit, start, end
+def _select_for(columns, embeds) -> str:
+    return ", ".join(list(columns) + [_BOOK_FIELD_EMBEDS[e] for e in embeds])
+
+
+_BOOK_SELECT_CARD = _select_for(_BOOK_CARD_COLUMNS, ("penulis", "genre"))
+
+_BOOK_LIST_SERIALIZERS = {
+    "detail": _BOOK_LIST_SERIALIZER,
+    "card": ResponseSerializer(List[BookCardResponse]),
+    "fields": ResponseSerializer(List[BookFieldsResponse]),
+}
+# response_model (dokumentasi OpenAPI) sesuai view / fields / search_mode
+_BOOK_LIST_MODEL = Union[List[BookResponse], List[BookCardResponse], List[BookFieldsResponse], List[BookSearchHit]]
+_BOOKS_PAGED_MODEL = Union[BooksPagedResponse, BooksCardPagedResponse, BooksFieldsPagedResponse, BooksSearchPagedResponse]
+_BOOK_BATCH_MODEL = Union[BookBatchResponse, BookCardBatchResponse]
+
+_BOOKS_PAGED_SERIALIZERS = {
+    "detail": _BOOKS_PAGED_SERIALIZER,
+    "card": ResponseSerializer(BooksCardPagedResponse),
+    "fields": ResponseSerializer(BooksFieldsPagedResponse),
+}
+
+SEARCH_MODES = ("basic", "fulltext")
+# /books (tanpa paging) di mode fulltext tetap dibatasi, hasil paling relevan duluan
+_FULLTEXT_LIST_LIMIT = 1000
+_GENRE_LIST_SERIALIZER = ResponseSerializer(List[GenreResponse])
+_PAYMENT_METHOD_LIST_SERIALIZER = ResponseSerializer(List[PaymentMethodResponse])
+
+
+def _now_utc_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
 
 
 def _sanitize_sort(sort_by: str, order: str, allowed: Set[str], default_sort: str):
@@ -64,6 +276,129 @@ def _sanitize_sort(sort_by: str, order: str, allowed: Set[str], default_sort: st
     return sort_by, order
 
 
+def _resolve_cursor(paging: str, cursor: Optional[str], sort_by: str, order: str):
+    """
+    Return (pakai_cursor, after). after=None artinya halaman pertama.
+    """
+    use_cursor = bool(cursor) or (paging or "").lower() == "cursor"
+    if not use_cursor:
+        return False, None
+    if not cursor:
+        return True, None
+    try:
+        return True, decode_cursor(cursor, sort_by, order)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _paged_meta(
+    page: int,
+    limit: int,
+    total: int,
+    sort_by: str,
+    order: str,
+    use_cursor: bool,
+    next_cursor: Optional[str],
+    count_mode: str,
+):
+    return {
+        "page": page,
+        "limit": limit,
+        "total": total,
+        "total_pages": (total + limit - 1) // limit if limit else 0,
+        "sort_by": sort_by,
+        "order": order,
+        "paging": "cursor" if use_cursor else "offset",
+        "next_cursor": next_cursor,
+        "count_mode": count_mode,
+    }
+
+
+def _resolve_projection(
+    view: Optional[str],
+    fields: Optional[str],
+    sort_by: Optional[str] = None,
+) -> Tuple[str, str, Optional[str]]:
+    """
+    Return (view, select PostgREST, fields_key). fields= mengalahkan view.
+    id_buku & kolom sort selalu ikut (dibutuhkan cursor / urutan stabil).
+    """
+    if fields and fields.strip():
+        wanted = []
+        for f in fields.split(","):
+            f = f.strip().lower()
+            if not f or f in wanted:
+                continue
+            if f not in _BOOK_FIELD_COLUMNS and f not in _BOOK_FIELD_EMBEDS:
+                raise HTTPException(status_code=400, detail=f"Field tidak dikenal: {f}")
+            wanted.append(f)
+        for required in ("id_buku", sort_by):
+            if required in _BOOK_FIELD_COLUMNS and required not in wanted:
+                wanted.append(required)
+        # urutan kanonik -> key cache sama walau urutan query beda
+        cols = [c for c in _BOOK_FIELD_COLUMNS if c in wanted]
+        embeds = [e for e in _BOOK_FIELD_EMBEDS if e in wanted]
+        return "fields", _select_for(cols, embeds), ",".join(cols + embeds)
+
+    view = (view or "detail").strip().lower()
+    if view not in BOOK_VIEWS:
+        raise HTTPException(status_code=400, detail=f"view tidak valid. Pilihan: {', '.join(BOOK_VIEWS)}")
+    if view == "card":
+        # kolom sort di luar kolom kartu (mis. updated_at) tetap di-select untuk next_cursor,
+        # tidak ikut dikirim (serializer card hanya kolom kartu)
+        if sort_by in _BOOK_FIELD_COLUMNS and sort_by not in _BOOK_CARD_COLUMNS:
+            return "card", _select_for(_BOOK_CARD_COLUMNS + (sort_by,), ("penulis", "genre")), None
+        return "card", _BOOK_SELECT_CARD, None
+    return "detail", _BOOK_SELECT_DETAIL, None
+
+
+async def _fetch_books_page(
+    filtered,
+    *,
+    start: int,
+    end: int,
+    limit: int,
+    sort_by: str,
+    order: str,
+    use_cursor: bool,
+    after,
+    count_mode: str,
+    cache_key: tuple,
+    select: str = _BOOK_SELECT_DETAIL,
+):
+    """
+    filtered(q) -> q + filter public/admin. Data + total lewat paging engine (1 round trip),
+    kecuali halaman cursor >1: total dihitung terpisah (biasanya kena cache di count_mode=cached).
+    Return (rows, total, next_cursor).
+    """
+    desc = order == "desc"
+
+    def _build(db, count):
+        q = filtered(db.table("buku").select(select, count=count))
+        if use_cursor:
+            q = keyset_filter(q, sort_by, desc, "id_buku", after)
+            return keyset_order(q, sort_by, desc, "id_buku")
+        return q.order(sort_by, desc=desc)
+
+    if not use_cursor:
+        rows, total = await afetch_page(_build, start=start, end=end, count_mode=count_mode, cache_key=cache_key)
+        return rows, total, None
+
+    # cursor: ambil limit+1 baris untuk tahu masih ada halaman berikutnya
+    if after is None:
+        rows, total = await afetch_page(_build, start=0, end=limit, count_mode=count_mode, cache_key=cache_key)
+    else:
+        total = await acount_only(
+            lambda db, count: filtered(db.table("buku").select("id_buku", count=count)),
+            count_mode=count_mode,
+            cache_key=cache_key,
+        )
+        rows, _ = await afetch_page(_build, start=0, end=limit, with_count=False)
+
+    rows, next_cursor = keyset_page(rows, limit, sort_by, order, "id_buku")
+    return rows, total, next_cursor
+
+
 def _validate_status(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
@@ -87,6 +422,219 @@ def _validate_non_negative_number(name: str, value: Optional[float]):
         raise HTTPException(status_code=400, detail=f"{name} tidak boleh negatif")
 
 
+def _normalize_search(search: Optional[str]) -> Optional[str]:
+    # ilike case-insensitive -> normalisasi supaya key cache tidak pecah karena spasi/kapital
+    s = (search or "").strip().lower()
+    return s or None
+
+
+def _resolve_search_mode(search_mode: Optional[str], search: Optional[str]) -> str:
+    mode = (search_mode or settings.BOOK_SEARCH_MODE or "basic").lower().strip()
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail="search_mode harus 'basic' atau 'fulltext'")
+    # tanpa kata kunci tidak ada yang di-rank -> listing biasa
+    if mode == "fulltext" and not (search or "").strip():
+        return "basic"
+    return mode
+
+
+async def _search_books_rpc(
+    search: str,
+    *,
+    genre_id: Optional[int] = None,
+    id_penulis: Optional[int] = None,
+    status_ok: Optional[str] = "aktif",
+    limit: int,
+    offset: int = 0,
+):
+    """
+    Full-text + fallback typo (RPC search_books). Return (rows, total), rows sudah urut relevansi.
+    """
+    def _call(p_limit: int, p_offset: int):
+        return arun_read(
+            lambda db: db.rpc(
+                "search_books",
+                {
+                    "p_query": search,
+                    "p_genre_id": genre_id,
+                    "p_id_penulis": id_penulis,
+                    "p_status": status_ok,
+                    "p_limit": p_limit,
+                    "p_offset": p_offset,
+                },
+            )
+        )
+
+    res = await _call(limit, offset)
+    rows = res.data or []
+    if not rows and offset > 0:
+        # halaman kelewat -> ambil total saja
+        rows_total = (await _call(1, 0)).data or []
+        return [], int(rows_total[0]["total_count"]) if rows_total else 0
+    total = int(rows[0]["total_count"]) if rows else 0
+    return [r["hit"] for r in rows], total
+
+
+def _export_projection(view: Optional[str], fields: Optional[str]):
+    """
+    Kolom export: (columns, embeds). Default = semua kolom buku + nama penulis/genre
+    (tanpa biografi / deskripsi genre).
+    """
+    view, _, fields_key = _resolve_projection(view, fields)
+    if view == "fields":
+        keys = fields_key.split(",")
+        return [k for k in keys if k in _BOOK_FIELD_COLUMNS], [k for k in keys if k in _BOOK_FIELD_EMBEDS]
+    if view == "card":
+        return list(_BOOK_CARD_COLUMNS), ["penulis", "genre"]
+    return list(_BOOK_FIELD_COLUMNS), ["penulis", "genre"]
+
+
+async def _export_response(
+    request: Request,
+    filtered,
+    *,
+    fmt: str,
+    view: Optional[str],
+    fields: Optional[str],
+    compress: bool,
+    filename: str,
+) -> StreamingResponse:
+    fmt = (fmt or "ndjson").strip().lower()
+    if fmt not in book_export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format tidak valid. Pilihan: {', '.join(book_export.EXPORT_FORMATS)}"
+        )
+    columns, embeds = _export_projection(view, fields)
+    select = _select_for(columns, embeds)
+
+    first = await book_export.first_chunk(filtered, select)
+    gzip_enabled = compress and "gzip" in (request.headers.get("accept-encoding") or "").lower()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if gzip_enabled:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        book_export.stream_export(
+            book_export.iter_chunks(filtered, select, first),
+            fmt=fmt,
+            columns=columns,
+            embeds=embeds,
+            gzip_enabled=gzip_enabled,
+        ),
+        media_type=book_export.MEDIA_TYPES[fmt],
+        headers=headers,
+    )
+
+
+def _parse_batch_ids(ids: List[int]) -> List[int]:
+    out: List[int] = []
+    seen: Set[int] = set()
+    for i in ids:
+        if i not in seen:
+            seen.add(i)
+            out.append(i)
+    if not out:
+        raise HTTPException(status_code=400, detail="ids wajib diisi")
+    if len(out) > settings.BOOK_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Maksimal {settings.BOOK_BATCH_MAX_IDS} id per request")
+    return out
+
+
+async def _batch_books_response(request: Request, ids: List[int], view: Optional[str]) -> Response:
+    """
+    Hydrate banyak buku sekaligus. Per id pakai entry catalog_cache yang sama dengan
+    GET /books/{id} (byte JSON per buku) -> sisanya diambil dengan 1 query in_,
+    lalu response dirangkai dari potongan JSON tanpa serialisasi ulang.
+    """
+    ids = _parse_batch_ids(ids)
+    view = (view or "detail").strip().lower()
+    if view not in BOOK_VIEWS:
+        raise HTTPException(status_code=400, detail=f"view tidak valid. Pilihan: {', '.join(BOOK_VIEWS)}")
+    if view == "card":
+        name, select, serializer = "book_card", _BOOK_SELECT_CARD, _BOOK_CARD_SERIALIZER
+    else:
+        name, select, serializer = "book_detail", _BOOK_SELECT_DETAIL, _BOOK_SERIALIZER
+    deps = catalog_cache.BOOK_DEPS
+
+    parts: Dict[int, bytes] = {}
+    misses: List[int] = []
+    # key (generation) diambil sebelum query, lihat catalog_cache.cache_key
+    keys = {book_id: catalog_cache.cache_key(name, deps, {"id_buku": book_id}) for book_id in ids}
+    for book_id in ids:
+        entry = catalog_cache.get_cached(keys[book_id])
+        if entry is not None:
+            parts[book_id] = entry[0]
+        else:
+            misses.append(book_id)
+
+    if misses:
+        res = await arun_read(
+            lambda db: db.table("buku").select(select).in_("id_buku", misses).eq("status", "aktif")
+        )
+        for row in res.data or []:
+            body = serializer.dump(row)
+            parts[row["id_buku"]] = catalog_cache.put_cached(keys[row["id_buku"]], body)[0]
+
+    missing = [i for i in ids if i not in parts]
+    body = b"".join(
+        (
+            b'{"data":[',
+            b",".join(parts[i] for i in ids if i in parts),
+            b'],"missing":',
+            json.dumps(missing).encode(),
+            b"}",
+        )
+    )
+    return etag_json_response(request, body)
+
+
+async def _ensure_search_index() -> None:
+    if not settings.SEARCH_INDEX_ENABLED:
+        raise HTTPException(status_code=503, detail="Search index tidak aktif")
+    try:
+        await run_io(search_index.ensure_ready)
+    except Exception as e:
+        raise _map_db_error(e)
+    if search_index.is_stale():
+        search_index.schedule_rebuild()
+
+
+def _json_response(serializer: ResponseSerializer, payload, exclude_unset: bool = False) -> Response:
+    return serializer.response(payload, exclude_unset=exclude_unset)
+
+
+def _public_book_filters(q, search: Optional[str], genre_id: Optional[int]):
+    q = q.eq("status", "aktif")
+    if search and search.strip():
+        q = q.ilike("judul", f"%{search.strip()}%")
+    if genre_id:
+        q = q.eq("id_genre", genre_id)
+    return q
+
+
+def _admin_book_filters(
+    q,
+    search: Optional[str],
+    id_genre: Optional[int],
+    id_penulis: Optional[int],
+    status_ok: Optional[str],
+):
+    if search and search.strip():
+        q = q.ilike("judul", f"%{search.strip()}%")
+    if id_genre is not None:
+        q = q.eq("id_genre", id_genre)
+    if id_penulis is not None:
+        q = q.eq("id_penulis", id_penulis)
+    if status_ok:
+        q = q.eq("status", status_ok)
+    return q
+
+
 def _map_db_error(e: Exception) -> HTTPException:
     msg = str(e).lower()
 
@@ -102,85 +650,372 @@ def _map_db_error(e: Exception) -> HTTPException:
 # ==========================================
 # 1) PUBLIC ENDPOINTS (Katalog)
 # ==========================================
-@router.get("/books", tags=["Books"], response_model=List[BookResponse])
-def get_all_books(search: Optional[str] = None, genre_id: Optional[int] = None):
-    try:
-        q = supabase.table("buku").select("*, penulis(*), genre(*)").eq("status", "aktif")
-
-        if search and search.strip():
-            q = q.ilike("judul", f"%{search.strip()}%")
-
-        if genre_id:
-            q = q.eq("id_genre", genre_id)
-
-        res = q.order("created_at", desc=True).execute()
+@router.get("/books", tags=["Books"], response_model=_BOOK_LIST_MODEL)
+async def get_all_books(
+    request: Request,
+    search: Optional[str] = None,
+    genre_id: Optional[int] = None,
+    search_mode: Optional[str] = None,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    search = _normalize_search(search)
+    search_mode = _resolve_search_mode(search_mode, search)
+    # fulltext: RPC search_books selalu balas row lengkap + rank/headline
+    view, select, fields_key = _resolve_projection(view, fields)
+    if search_mode == "fulltext":
+        view, fields_key = "detail", None
+
+    async def _load():
+        if search_mode == "fulltext":
+            rows, _ = await _search_books_rpc(search, genre_id=genre_id, limit=_FULLTEXT_LIST_LIMIT)
+            return rows
+        res = await arun_read(
+            lambda db: _public_book_filters(db.table("buku").select(select), search, genre_id)
+            .order("created_at", desc=True)
+        )
         return res.data or []
+
+    try:
+        return await catalog_cache.cached_json(
+            request,
+            name="books",
+            deps=catalog_cache.BOOK_DEPS,
+            params={
+                "search": search,
+                "genre_id": genre_id,
+                "search_mode": search_mode,
+                "view": view,
+                "fields": fields_key,
+            },
+            serializer=_SEARCH_HIT_LIST_SERIALIZER if search_mode == "fulltext" else _BOOK_LIST_SERIALIZERS[view],
+            loader=_load,
+            exclude_unset=view == "fields",
+        )
     except Exception as e:
         raise _map_db_error(e)
 
 
-@router.get("/books/paged", tags=["Books"], response_model=BooksPagedResponse)
-def get_all_books_paged(
+@router.get("/books/paged", tags=["Books"], response_model=_BOOKS_PAGED_MODEL)
+async def get_all_books_paged(
+    request: Request,
     search: Optional[str] = None,
     genre_id: Optional[int] = None,
     page: int = 1,
     limit: int = 20,
     sort_by: str = "created_at",
     order: str = "desc",
+    paging: str = "offset",
+    cursor: Optional[str] = None,
+    count_mode: Optional[str] = None,
+    search_mode: Optional[str] = None,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
     try:
-        page, limit, start, end = _sanitize_paging(page, limit, max_limit=100)
+        page, limit, start, end = sanitize_paging(page, limit, max_limit=100)
         sort_by, order = _sanitize_sort(
             sort_by,
             order,
-            allowed={"id_buku", "judul", "harga", "stok", "created_at"},
+            allowed={"id_buku", "judul", "harga", "stok", "created_at", "updated_at"},
             default_sort="created_at",
         )
-
-        count_q = supabase.table("buku").select("id_buku", count="exact").eq("status", "aktif")
-        data_q = supabase.table("buku").select("*, penulis(*), genre(*)").eq("status", "aktif")
-
-        if search and search.strip():
-            s = search.strip()
-            count_q = count_q.ilike("judul", f"%{s}%")
-            data_q = data_q.ilike("judul", f"%{s}%")
-
-        if genre_id:
-            count_q = count_q.eq("id_genre", genre_id)
-            data_q = data_q.eq("id_genre", genre_id)
-
-        total = (count_q.execute().count) or 0
-        data_res = data_q.order(sort_by, desc=(order == "desc")).range(start, end).execute()
-
-        return {
-            "meta": {
+        search = _normalize_search(search)
+        search_mode = _resolve_search_mode(search_mode, search)
+        use_cursor, after = _resolve_cursor(paging, cursor, sort_by, order)
+        count_mode = normalize_count_mode(count_mode)
+        view, select, fields_key = _resolve_projection(view, fields, sort_by)
+        if search_mode == "fulltext":
+            if use_cursor:
+                raise HTTPException(status_code=400, detail="paging=cursor belum didukung untuk search_mode=fulltext")
+            sort_by, order = "relevance", "desc"
+            view, fields_key = "detail", None
+
+        async def _load():
+            if search_mode == "fulltext":
+                rows, total = await _search_books_rpc(search, genre_id=genre_id, limit=limit, offset=start)
+                return {
+                    "meta": _paged_meta(page, limit, total, sort_by, order, False, None, "exact"),
+                    "data": rows,
+                }
+
+            rows, total, next_cursor = await _fetch_books_page(
+                lambda q: _public_book_filters(q, search, genre_id),
+                start=start,
+                end=end,
+                limit=limit,
+                sort_by=sort_by,
+                order=order,
+                use_cursor=use_cursor,
+                after=after,
+                count_mode=count_mode,
+                cache_key=("buku", "public", search, genre_id),
+                select=select,
+            )
+            return {
+                "meta": _paged_meta(page, limit, total, sort_by, order, use_cursor, next_cursor, count_mode),
+                "data": rows,
+            }
+
+        return await catalog_cache.cached_json(
+            request,
+            name="books_paged",
+            deps=catalog_cache.BOOK_DEPS,
+            params={
+                "search": search,
+                "genre_id": genre_id,
                 "page": page,
                 "limit": limit,
-                "total": total,
-                "total_pages": (total + limit - 1) // limit if limit else 0,
                 "sort_by": sort_by,
                 "order": order,
+                "cursor": (cursor or "") if use_cursor else None,
+                "count_mode": count_mode,
+                "search_mode": search_mode,
+                "view": view,
+                "fields": fields_key,
             },
-            "data": data_res.data or [],
-        }
+            serializer=_SEARCH_PAGED_SERIALIZER if search_mode == "fulltext" else _BOOKS_PAGED_SERIALIZERS[view],
+            loader=_load,
+            exclude_unset=view == "fields",
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise _map_db_error(e)
 
 
-@router.get("/books/{book_id}", tags=["Books"], response_model=BookResponse)
-def get_book_detail(book_id: int):
+# dideklarasikan sebelum /books/{book_id}
+@router.get("/books/batch", tags=["Books"], response_model=_BOOK_BATCH_MODEL)
+async def get_books_batch(request: Request, ids: str, view: Optional[str] = None):
+    """
+    ?ids=3,1,2 -> buku aktif sesuai urutan ids (1 query untuk id yang belum ada di cache).
+    """
     try:
-        res = (
-            supabase.table("buku")
+        parsed = [int(x) for x in ids.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids harus berupa angka dipisah koma")
+    try:
+        return await _batch_books_response(request, parsed, view)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _map_db_error(e)
+
+
+@router.post("/books/batch", tags=["Books"], response_model=_BOOK_BATCH_MODEL)
+async def post_books_batch(request: Request, payload: BookBatchRequest):
+    try:
+        return await _batch_books_response(request, payload.ids, payload.view)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _map_db_error(e)
+
+
+@router.get("/books/export", tags=["Books"], response_class=StreamingResponse)
+@no_compression  # gzip sendiri (param compress), jangan dikompres ulang
+async def export_books(
+    request: Request,
+    search: Optional[str] = None,
+    genre_id: Optional[int] = None,
+    format: str = "ndjson",
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+    compress: bool = True,
+):
+    """
+    Export katalog publik (buku aktif) streaming NDJSON / CSV, urut id_buku.
+    Pengganti GET /books untuk feed / tooling yang butuh seluruh katalog.
+    """
+    search = _normalize_search(search)
+    try:
+        return await _export_response(
+            request,
+            lambda q: _public_book_filters(q, search, genre_id),
+            fmt=format,
+            view=view,
+            fields=fields,
+            compress=compress,
+            filename=f"sibuku-books-{datetime.now(timezone.utc):%Y%m%d}",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _map_db_error(e)
+
+
+@router.get("/books/search", tags=["Books"], response_model=IndexSearchResponse)
+async def search_books_index(
+    q: str,
+    genre_id: Optional[int] = None,
+    id_penulis: Optional[int] = None,
+    min_harga: Optional[float] = None,
+    max_harga: Optional[float] = None,
+    in_stock: bool = False,
+    limit: int = 10,
+    offset: int = 0,
+):
+    """
+    Pencarian cepat dari index in-memory (tanpa round trip DB per ketikan).
+    Kata terakhir dicocokkan sebagai prefix -> cocok untuk typeahead.
+    """
+    limit = min(max(limit, 1), 50)
+    offset = max(offset, 0)
+    await _ensure_search_index()
+
+    started = time.perf_counter()
+    rows, total = search_index.search(
+        q,
+        genre_id=genre_id,
+        id_penulis=id_penulis,
+        min_harga=min_harga,
+        max_harga=max_harga,
+        in_stock=in_stock,
+        limit=limit,
+        offset=offset,
+    )
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    return {
+        "meta": {
+            "q": q,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "took_ms": took_ms,
+            "index_age_seconds": search_index.age_seconds(),
+        },
+        "data": rows,
+    }
+
+
+@router.get("/books/suggest", tags=["Books"], response_model=BookSuggestResponse)
+async def suggest_books(q: str, limit: int = 8):
+    """
+    Saran judul & penulis berawalan q (per awal kata), urut terlaris lalu terbaru.
+    Ringan untuk dipanggil tiap ketikan (tanpa query DB).
+    """
+    limit = min(max(limit, 1), settings.BOOK_SUGGEST_MAX_RESULTS)
+    await _ensure_search_index()
+    try:
+        await run_io(suggest_index.ensure_ready)
+    except Exception as e:
+        raise _map_db_error(e)
+    suggest_index.refresh_if_needed()
+
+    started = time.perf_counter()
+    result = suggest_index.suggest(q, limit)
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    return {
+        "meta": {
+            "q": q,
+            "limit": limit,
+            "ranked_by": suggest_index.ranked_by(),
+            "took_ms": took_ms,
+            "index_age_seconds": suggest_index.age_seconds(),
+        },
+        **result,
+    }
+
+
+@router.get("/books/facets", tags=["Books"], response_model=BookFacetsResponse)
+async def get_book_facets(
+    q: Optional[str] = None,
+    genre_id: Optional[int] = None,
+    id_penulis: Optional[int] = None,
+    min_harga: Optional[float] = None,
+    max_harga: Optional[float] = None,
+    in_stock: bool = False,
+    top: int = 20,
+):
+    """
+    Jumlah buku aktif per genre, penulis (top N, top=0 -> semua), bucket harga, dan stok
+    untuk pencarian saat ini.
+    Sumber: counter di search index (di-update incremental), bukan count per filter ke DB.
+    """
+    top = min(max(top, 0), 200)
+    await _ensure_search_index()
+
+    started = time.perf_counter()
+    facets, source = search_index.facets(
+        q,
+        genre_id=genre_id,
+        id_penulis=id_penulis,
+        min_harga=min_harga,
+        max_harga=max_harga,
+        in_stock=in_stock,
+        top=top,
+    )
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    return {
+        "meta": {
+            "q": q,
+            "source": source,
+            "took_ms": took_ms,
+            "index_age_seconds": search_index.age_seconds(),
+        },
+        **facets,
+    }
+
+
+@router.get("/books/{book_id}/related", tags=["Books"], response_model=BookRelatedResponse)
+async def get_related_books(book_id: int, limit: int = 8):
+    """
+    Buku yang sering dibeli bersama buku ini (score = jumlah order bersama).
+    Data order kurang -> dilengkapi buku penulis sama, lalu genre sama (score 0).
+    """
+    limit = min(max(limit, 1), settings.RELATED_MAX_RESULTS)
+    await _ensure_search_index()
+    try:
+        await run_io(related_books.ensure_ready)
+    except Exception as e:
+        raise _map_db_error(e)
+    related_books.refresh_if_needed()
+
+    started = time.perf_counter()
+    result = related_books.related(book_id, limit)
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
+    rows, source = result
+
+    return {
+        "meta": {
+            "id_buku": book_id,
+            "limit": limit,
+            "source": source,
+            "took_ms": took_ms,
+            "index_age_seconds": related_books.age_seconds(),
+        },
+        "data": rows,
+    }
+
+
+@router.get("/books/{book_id}", tags=["Books"], response_model=BookResponse)
+async def get_book_detail(request: Request, book_id: int):
+    async def _load():
+        res = await arun_read(
+            lambda db: db.table("buku")
             .select("*, penulis(*), genre(*)")
             .eq("id_buku", book_id)
             .eq("status", "aktif")
             .limit(1)
-            .execute()
         )
         if not res.data:
             raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
         return res.data[0]
+
+    try:
+        return await catalog_cache.cached_json(
+            request,
+            name="book_detail",
+            deps=catalog_cache.BOOK_DEPS,
+            params={"id_buku": book_id},
+            serializer=_BOOK_SERIALIZER,
+            loader=_load,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -191,46 +1026,76 @@ def get_book_detail(book_id: int):
 # 2) MASTER DATA (Dropdown Frontend)
 # ==========================================
 @router.get("/genres", tags=["Books"], response_model=List[GenreResponse])
-def get_all_genres():
+async def get_all_genres(request: Request):
+    async def _load():
+        return await run_io(master_data.rows, "genre")
+
     try:
-        res = supabase.table("genre").select("*").order("nama_genre").execute()
-        return res.data or []
+        return await catalog_cache.cached_json(
+            request, name="genres", deps=("genre",), params={}, serializer=_GENRE_LIST_SERIALIZER, loader=_load
+        )
     except Exception as e:
         raise _map_db_error(e)
 
 
 @router.get("/payment-methods", tags=["Books"], response_model=List[PaymentMethodResponse])
-def get_payment_methods():
+async def get_payment_methods(request: Request):
+    async def _load():
+        methods = await run_io(master_data.rows, "jenis_pembayaran")
+        return [m for m in methods if m.get("is_active")]
+
     try:
-        res = supabase.table("jenis_pembayaran").select("*").eq("is_active", True).order("id_jenis_pembayaran").execute()
-        return res.data or []
+        return await catalog_cache.cached_json(
+            request,
+            name="payment_methods",
+            deps=("jenis_pembayaran",),
+            params={},
+            serializer=_PAYMENT_METHOD_LIST_SERIALIZER,
+            loader=_load,
+        )
+    except Exception as e:
+        raise _map_db_error(e)
+
+
+@router.get("/catalog/manifest", tags=["Books"])
+async def get_catalog_manifest(request: Request):
+    """
+    Manifest snapshot katalog statis: daftar shard buku + genre + metode pembayaran
+    (URL storage per encoding: identity / gzip / br). Shard immutable -> bisa di-cache CDN selamanya.
+    """
+    try:
+        manifest = await run_io(catalog_snapshot.current_manifest)
     except Exception as e:
         raise _map_db_error(e)
+    if not manifest:
+        raise HTTPException(status_code=404, detail="Snapshot katalog belum tersedia")
+
+    body = json.dumps(catalog_snapshot.manifest_for_client(manifest), separators=(",", ":")).encode()
+    return etag_json_response(
+        request,
+        body,
+        cache_control=f"public, max-age={settings.CATALOG_SNAPSHOT_MANIFEST_MAX_AGE}",
+    )
 
 
 # ==========================================
 # 3) ADMIN ENDPOINTS (CMS BOOKS)
 # ==========================================
 @router.get("/admin/books", tags=["Admin - Books"], response_model=List[BookResponse])
-def admin_list_books(
+async def admin_list_books(
     status_filter: Optional[str] = None,
     search: Optional[str] = None,
     genre_id: Optional[int] = None,
     admin: dict = Depends(get_current_admin),
 ):
     try:
-        q = supabase.table("buku").select("*, penulis(*), genre(*)")
-
-        if status_filter:
-            q = q.eq("status", _validate_status(status_filter))
-
-        if search and search.strip():
-            q = q.ilike("judul", f"%{search.strip()}%")
-
-        if genre_id:
-            q = q.eq("id_genre", genre_id)
+        status_ok = _validate_status(status_filter) if status_filter else None
 
-        res = q.order("id_buku", desc=True).execute()
+        res = await arun_read(
+            lambda db: _admin_book_filters(
+                db.table("buku").select("*, penulis(*), genre(*)"), search, genre_id or None, None, status_ok
+            ).order("id_buku", desc=True)
+        )
         return res.data or []
     except HTTPException:
         raise
@@ -238,8 +1103,8 @@ def admin_list_books(
         raise _map_db_error(e)
 
 
-@router.get("/admin/books/paged", tags=["Admin - Books"], response_model=BooksPagedResponse)
-def admin_list_books_paged(
+@router.get("/admin/books/paged", tags=["Admin - Books"], response_model=_BOOKS_PAGED_MODEL)
+async def admin_list_books_paged(
     page: int = 1,
     limit: int = 20,
     q: Optional[str] = None,
@@ -248,10 +1113,16 @@ def admin_list_books_paged(
     status_filter: Optional[str] = None,
     sort_by: str = "created_at",
     order: str = "desc",
+    paging: str = "offset",
+    cursor: Optional[str] = None,
+    count_mode: Optional[str] = None,
+    search_mode: Optional[str] = None,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
     admin: dict = Depends(get_current_admin),
 ):
     try:
-        page, limit, start, end = _sanitize_paging(page, limit, max_limit=100)
+        page, limit, start, end = sanitize_paging(page, limit, max_limit=100)
         sort_by, order = _sanitize_sort(
             sort_by,
             order,
@@ -260,41 +1131,80 @@ def admin_list_books_paged(
         )
 
         status_ok = _validate_status(status_filter) if status_filter else None
+        use_cursor, after = _resolve_cursor(paging, cursor, sort_by, order)
+        count_mode = normalize_count_mode(count_mode)
+        search_mode = _resolve_search_mode(search_mode, q)
+        view, select, _ = _resolve_projection(view, fields, sort_by)
+
+        if search_mode == "fulltext":
+            if use_cursor:
+                raise HTTPException(status_code=400, detail="paging=cursor belum didukung untuk search_mode=fulltext")
+            rows, total = await _search_books_rpc(
+                q.strip(),
+                genre_id=id_genre,
+                id_penulis=id_penulis,
+                status_ok=status_ok,
+                limit=limit,
+                offset=start,
+            )
+            return _json_response(
+                _SEARCH_PAGED_SERIALIZER,
+                {"meta": _paged_meta(page, limit, total, "relevance", "desc", False, None, "exact"), "data": rows},
+            )
+
+        rows, total, next_cursor = await _fetch_books_page(
+            lambda qb: _admin_book_filters(qb, q, id_genre, id_penulis, status_ok),
+            start=start,
+            end=end,
+            limit=limit,
+            sort_by=sort_by,
+            order=order,
+            use_cursor=use_cursor,
+            after=after,
+            count_mode=count_mode,
+            cache_key=("buku", "admin", (q or "").strip().lower() or None, id_genre, id_penulis, status_ok),
+            select=select,
+        )
 
-        count_q = supabase.table("buku").select("id_buku", count="exact")
-        data_q = supabase.table("buku").select("*, penulis(*), genre(*)")
-
-        if q and q.strip():
-            s = q.strip()
-            count_q = count_q.ilike("judul", f"%{s}%")
-            data_q = data_q.ilike("judul", f"%{s}%")
-
-        if id_genre is not None:
-            count_q = count_q.eq("id_genre", id_genre)
-            data_q = data_q.eq("id_genre", id_genre)
-
-        if id_penulis is not None:
-            count_q = count_q.eq("id_penulis", id_penulis)
-            data_q = data_q.eq("id_penulis", id_penulis)
-
-        if status_ok:
-            count_q = count_q.eq("status", status_ok)
-            data_q = data_q.eq("status", status_ok)
+        return _json_response(
+            _BOOKS_PAGED_SERIALIZERS[view],
+            {
+                "meta": _paged_meta(page, limit, total, sort_by, order, use_cursor, next_cursor, count_mode),
+                "data": rows,
+            },
+            exclude_unset=view == "fields",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _map_db_error(e)
 
-        total = (count_q.execute().count) or 0
-        res = data_q.order(sort_by, desc=(order == "desc")).range(start, end).execute()
 
-        return {
-            "meta": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "total_pages": (total + limit - 1) // limit if limit else 0,
-                "sort_by": sort_by,
-                "order": order,
-            },
-            "data": res.data or [],
-        }
+@router.get("/admin/books/export", tags=["Admin - Books"], response_class=StreamingResponse)
+@no_compression  # gzip sendiri (param compress), jangan dikompres ulang
+async def admin_export_books(
+    request: Request,
+    q: Optional[str] = None,
+    id_genre: Optional[int] = None,
+    id_penulis: Optional[int] = None,
+    status_filter: Optional[str] = None,
+    format: str = "ndjson",
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+    compress: bool = True,
+    admin: dict = Depends(get_current_admin),
+):
+    try:
+        status_ok = _validate_status(status_filter) if status_filter else None
+        return await _export_response(
+            request,
+            lambda qb: _admin_book_filters(qb, q, id_genre, id_penulis, status_ok),
+            fmt=format,
+            view=view,
+            fields=fields,
+            compress=compress,
+            filename=f"sibuku-admin-books-{datetime.now(timezone.utc):%Y%m%d}",
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -302,9 +1212,9 @@ def admin_list_books_paged(
 
 
 @router.get("/admin/books/{book_id}", tags=["Admin - Books"], response_model=BookResponse)
-def admin_book_detail(book_id: int, admin: dict = Depends(get_current_admin)):
+async def admin_book_detail(book_id: int, admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("buku").select("*, penulis(*), genre(*)").eq("id_buku", book_id).limit(1).execute()
+        res = await supabase_async.table("buku").select("*, penulis(*), genre(*)").eq("id_buku", book_id).limit(1).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
         return res.data[0]
@@ -315,7 +1225,7 @@ def admin_book_detail(book_id: int, admin: dict = Depends(get_current_admin)):
 
 
 @router.post("/admin/books", tags=["Admin - Books"], status_code=status.HTTP_201_CREATED, response_model=BookResponse)
-def create_book(book: BookCreate, admin: dict = Depends(get_current_admin)):
+async def create_book(book: BookCreate, admin: dict = Depends(get_current_admin)):
     try:
         payload = book.dict(exclude_unset=True)
 
@@ -327,9 +1237,10 @@ def create_book(book: BookCreate, admin: dict = Depends(get_current_admin)):
         # biarkan created_at dari DB, kita set updated_at saja biar konsisten
         payload["updated_at"] = _now_utc_iso()
 
-        res = supabase.table("buku").insert(payload).execute()
+        res = await supabase_async.table("buku").insert(payload).execute()
         if not res.data:
             raise HTTPException(status_code=500, detail="Gagal membuat buku")
+        notify_changed("buku", [res.data[0].get("id_buku")])
         return res.data[0]
     except HTTPException:
         raise
@@ -338,7 +1249,7 @@ def create_book(book: BookCreate, admin: dict = Depends(get_current_admin)):
 
 
 @router.put("/admin/books/{book_id}", tags=["Admin - Books"])
-def update_book(book_id: int, book: BookUpdate, admin: dict = Depends(get_current_admin)):
+async def update_book(book_id: int, book: BookUpdate, admin: dict = Depends(get_current_admin)):
     try:
         payload = book.dict(exclude_unset=True)
         if not payload:
@@ -353,10 +1264,11 @@ def update_book(book_id: int, book: BookUpdate, admin: dict = Depends(get_curren
 
         payload["updated_at"] = _now_utc_iso()
 
-        res = supabase.table("buku").update(payload).eq("id_buku", book_id).execute()
+        res = await supabase_async.table("buku").update(payload).eq("id_buku", book_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
 
+        notify_changed("buku", [book_id])
         return {"message": "Buku berhasil diupdate", "data": res.data[0]}
     except HTTPException:
         raise
@@ -365,11 +1277,12 @@ def update_book(book_id: int, book: BookUpdate, admin: dict = Depends(get_curren
 
 
 @router.delete("/admin/books/{book_id}", tags=["Admin - Books"])
-def delete_book(book_id: int, admin: dict = Depends(get_current_admin)):
+async def delete_book(book_id: int, admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("buku").update({"status": "nonaktif", "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
+        res = await supabase_async.table("buku").update({"status": "nonaktif", "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
+        notify_changed("buku", [book_id])
         return {"message": "Buku berhasil dinonaktifkan", "data": res.data[0]}
     except HTTPException:
         raise
@@ -378,11 +1291,12 @@ def delete_book(book_id: int, admin: dict = Depends(get_current_admin)):
 
 
 @router.patch("/admin/books/{book_id}/restore", tags=["Admin - Books"])
-def restore_book(book_id: int, admin: dict = Depends(get_current_admin)):
+async def restore_book(book_id: int, admin: dict = Depends(get_current_admin)):
     try:
-        res = supabase.table("buku").update({"status": "aktif", "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
+        res = await supabase_async.table("buku").update({"status": "aktif", "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
+        notify_changed("buku", [book_id])
         return {"message": "Buku berhasil diaktifkan kembali", "data": res.data[0]}
     except HTTPException:
         raise
@@ -391,12 +1305,13 @@ def restore_book(book_id: int, admin: dict = Depends(get_current_admin)):
 
 
 @router.patch("/admin/books/{book_id}/toggle", tags=["Admin - Books"])
-def toggle_book(book_id: int, is_active: bool, admin: dict = Depends(get_current_admin)):
+async def toggle_book(book_id: int, is_active: bool, admin: dict = Depends(get_current_admin)):
     try:
         new_status = "aktif" if is_active else "nonaktif"
-        res = supabase.table("buku").update({"status": new_status, "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
+        res = await supabase_async.table("buku").update({"status": new_status, "updated_at": _now_utc_iso()}).eq("id_buku", book_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
+        notify_changed("buku", [book_id])
         return {"message": "Status buku diperbarui", "data": res.data[0]}
     except HTTPException:
         raise
@@ -416,11 +1331,12 @@ class BulkBookUpdatePayload(BaseModel):
 
 
 @router.patch("/admin/books/bulk", tags=["Admin - Books"])
-def bulk_update_books(payload: BulkBookUpdatePayload, admin: dict = Depends(get_current_admin)):
+async def bulk_update_books(payload: BulkBookUpdatePayload, admin: dict = Depends(get_current_admin)):
     if not payload.items:
         raise HTTPException(status_code=400, detail="items kosong")
 
     updated = 0
+    updated_ids: List[int] = []
     errors = []
 
     for item in payload.items:
@@ -440,9 +1356,10 @@ def bulk_update_books(payload: BulkBookUpdatePayload, admin: dict = Depends(get_
 
             data["updated_at"] = _now_utc_iso()
 
-            res = supabase.table("buku").update(data).eq("id_buku", book_id).execute()
+            res = await supabase_async.table("buku").update(data).eq("id_buku", book_id).execute()
             if res.data:
                 updated += 1
+                updated_ids.append(book_id)
             else:
                 errors.append({"id_buku": book_id, "error": "Buku tidak ditemukan"})
         except HTTPException as he:
@@ -450,4 +1367,7 @@ def bulk_update_books(payload: BulkBookUpdatePayload, admin: dict = Depends(get_
         except Exception as e:
             errors.append({"id_buku": item.id_buku, "error": str(e)})
 
+    if updated_ids:
+        notify_changed("buku", updated_ids)
+
     return {"message": "Bulk update selesai", "updated": updated, "errors": errors[:50]}
@@ -1,25 +1,49 @@
+import logging
+import re
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel, Field
 
-from app.database import supabase
+from app.database import supabase_async
 from app.dependencies import get_current_user
-from app.schemas import CartItemInput, CartResponse, MessageResponse, CheckoutRequest, CheckoutResult
+from app.services import related_books
+from app.services.catalog_events import notify_changed
+from app.schemas import (
+    CartBulkRequest,
+    CartItemInput,
+    CartResponse,
+    CartSummaryResponse,
+    MessageResponse,
+    CheckoutRequest,
+    CheckoutResult,
+)
+from app.utils.fast_json import ResponseSerializer
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
+logger = logging.getLogger(__name__)
+
+_CART_SERIALIZER = ResponseSerializer(CartResponse)
+
+# keranjang aktif + item + buku dalam 1 query (embedded select)
+_CART_SELECT = (
+    "id_keranjang, status_keranjang, created_at, "
+    "keranjang_item(*, buku(judul, harga, cover_image, berat, status))"
+)
+_EMPTY_CART = {"id_keranjang": None, "status_keranjang": None, "summary": {"total_qty": 0, "total_price": 0}, "items": []}
 
 
 class UpdateQtyPayload(BaseModel):
     jumlah: int = Field(..., ge=1)
 
 
-def _get_active_cart_id_or_none(id_user: int) -> Optional[int]:
-    cek = (
-        supabase.table("keranjang")
+async def _get_active_cart_id_or_none(id_user: int) -> Optional[int]:
+    cek = await (
+        supabase_async.table("keranjang")
         .select("id_keranjang")
         .eq("id_user", id_user)
         .eq("status_keranjang", "aktif")
+        .order("id_keranjang")
         .limit(1)
         .execute()
     )
@@ -28,16 +52,16 @@ def _get_active_cart_id_or_none(id_user: int) -> Optional[int]:
     return None
 
 
-def _get_or_create_active_cart_id(id_user: int) -> int:
-    cid = _get_active_cart_id_or_none(id_user)
+async def _get_or_create_active_cart_id(id_user: int) -> int:
+    cid = await _get_active_cart_id_or_none(id_user)
     if cid:
         return cid
-    new_cart = supabase.table("keranjang").insert({"id_user": id_user, "status_keranjang": "aktif"}).execute()
+    new_cart = await supabase_async.table("keranjang").insert({"id_user": id_user, "status_keranjang": "aktif"}).execute()
     return int(new_cart.data[0]["id_keranjang"])
 
 
-def _get_book_realtime(id_buku: int) -> Dict[str, Any]:
-    res = supabase.table("buku").select("id_buku, judul, harga, stok, status").eq("id_buku", id_buku).limit(1).execute()
+async def _get_book_realtime(id_buku: int) -> Dict[str, Any]:
+    res = await supabase_async.table("buku").select("id_buku, judul, harga, stok, status").eq("id_buku", id_buku).limit(1).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="Buku tidak ditemukan")
     return res.data[0]
@@ -75,7 +99,7 @@ def _raise_mapped_rpc_error(msg: str):
     raise HTTPException(status_code=400, detail=m or "Terjadi kesalahan")
 
 
-def _rpc_create_order_atomic(
+async def _rpc_create_order_atomic(
     *,
     id_user: int,
     alamat_pengiriman: str,
@@ -84,7 +108,7 @@ def _rpc_create_order_atomic(
     items_payload: List[Dict[str, int]],
 ) -> Dict[str, Any]:
     try:
-        rpc_res = supabase.rpc(
+        rpc_res = await supabase_async.rpc(
             "create_order_atomic",
             {
                 "p_id_user": id_user,
@@ -98,6 +122,10 @@ def _rpc_create_order_atomic(
         data = _normalize_rpc_data(rpc_res.data)
         if not data:
             raise HTTPException(status_code=500, detail="Gagal checkout (RPC tidak mengembalikan data)")
+        # stok buku berkurang -> cache katalog harus ikut
+        notify_changed("buku", [it["id_buku"] for it in items_payload])
+        # pasangan buku di order ini langsung masuk rekomendasi "dibeli bersama"
+        related_books.record_order(it["id_buku"] for it in items_payload)
         return data
     except HTTPException:
         raise
@@ -105,84 +133,131 @@ def _rpc_create_order_atomic(
         _raise_mapped_rpc_error(str(e))
 
 
-@router.get("/", response_model=CartResponse)
-def get_my_cart(user: dict = Depends(get_current_user)):
-    try:
-        id_keranjang = _get_active_cart_id_or_none(user["id_user"])
-        if not id_keranjang:
-            return {"id_keranjang": None, "status_keranjang": None, "summary": {"total_qty": 0, "total_price": 0}, "items": []}
+async def _load_active_cart(id_user: int) -> Optional[Dict[str, Any]]:
+    res = await (
+        supabase_async.table("keranjang")
+        .select(_CART_SELECT)
+        .eq("id_user", id_user)
+        .eq("status_keranjang", "aktif")
+        .order("id_keranjang")
+        .order("created_at", foreign_table="keranjang_item")
+        .limit(1)
+        .execute()
+    )
+    return res.data[0] if res.data else None
 
-        items_res = (
-            supabase.table("keranjang_item")
-            .select("*, buku(judul, harga, cover_image, berat, status)")
-            .eq("id_keranjang", id_keranjang)
-            .order("created_at")
-            .execute()
-        )
-        items = items_res.data or []
 
-        cart_res = supabase.table("keranjang").select("id_keranjang, status_keranjang, created_at").eq("id_keranjang", id_keranjang).limit(1).execute()
-        cart_row = (cart_res.data or [{}])[0]
+async def _cart_response(id_user: int):
+    cart = await _load_active_cart(id_user)
+    if not cart:
+        return _EMPTY_CART
 
-        return {
-            "id_keranjang": cart_row.get("id_keranjang"),
-            "status_keranjang": cart_row.get("status_keranjang"),
-            "created_at": cart_row.get("created_at"),
+    items = cart.get("keranjang_item") or []
+    return _CART_SERIALIZER.response(
+        {
+            "id_keranjang": cart.get("id_keranjang"),
+            "status_keranjang": cart.get("status_keranjang"),
+            "created_at": cart.get("created_at"),
             "summary": _cart_summary(items),
             "items": items,
         }
+    )
+
+
+@router.get("/", response_model=CartResponse)
+async def get_my_cart(user: dict = Depends(get_current_user)):
+    try:
+        return await _cart_response(user["id_user"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/items", status_code=201, response_model=MessageResponse)
-def add_to_cart(item: CartItemInput, user: dict = Depends(get_current_user)):
+@router.get("/summary", response_model=CartSummaryResponse)
+async def get_my_cart_summary(user: dict = Depends(get_current_user)):
+    """
+    Jumlah item & total keranjang aktif (badge header). Dihitung di view v_keranjang_summary (sql/007).
+    """
     try:
-        buku = _get_book_realtime(item.id_buku)
-        if buku.get("status") != "aktif":
-            raise HTTPException(status_code=400, detail="Buku sedang tidak aktif")
+        try:
+            res = await (
+                supabase_async.table("v_keranjang_summary")
+                .select("id_keranjang, item_count, total_qty, total_price")
+                .eq("id_user", user["id_user"])
+                .order("id_keranjang")
+                .limit(1)
+                .execute()
+            )
+            row = res.data[0] if res.data else None
+        except Exception as e:
+            if not _schema_missing(e):
+                raise
+            # view belum dipasang -> hitung dari keranjang lengkap
+            cart = await _load_active_cart(user["id_user"])
+            items = (cart or {}).get("keranjang_item") or []
+            row = {"id_keranjang": (cart or {}).get("id_keranjang"), "item_count": len(items), **_cart_summary(items)}
+
+        if not row:
+            return {"id_keranjang": None, "item_count": 0, "total_qty": 0, "total_price": 0}
+        return {
+            "id_keranjang": row.get("id_keranjang"),
+            "item_count": int(row.get("item_count") or 0),
+            "total_qty": int(row.get("total_qty") or 0),
+            "total_price": float(row.get("total_price") or 0),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        stok = int(buku.get("stok") or 0)
-        if stok <= 0:
-            raise HTTPException(status_code=400, detail="Stok buku habis")
-        if int(item.jumlah) > stok:
-            raise HTTPException(status_code=400, detail=f"Stok tidak cukup. Sisa stok: {stok}")
 
-        id_keranjang = _get_or_create_active_cart_id(user["id_user"])
-        harga_satuan = float(buku["harga"])
+# ===========================
+# MUTASI ITEM (RPC sql/006 & sql/008, 1 round trip)
+# ===========================
+def _schema_missing(e: Exception) -> bool:
+    # migration sql/006 / sql/007 belum dipasang (fungsi / view tidak ada) -> pakai jalur lama
+    m = str(e)
+    return any(code in m for code in ("PGRST202", "PGRST205", "42P01", "Could not find the"))
 
-        cek_item = (
-            supabase.table("keranjang_item")
-            .select("id_keranjang_item, jumlah")
-            .eq("id_keranjang", id_keranjang)
-            .eq("id_buku", item.id_buku)
-            .limit(1)
-            .execute()
-        )
 
-        if cek_item.data:
-            row = cek_item.data[0]
-            id_item = int(row["id_keranjang_item"])
-            jumlah_baru = int(row["jumlah"]) + int(item.jumlah)
-            if jumlah_baru > stok:
-                raise HTTPException(status_code=400, detail=f"Stok tidak cukup. Sisa stok: {stok}")
+def _raise_cart_rpc_error(msg: str):
+    m = (msg or "").strip()
+    # "(id_buku N)" ikut dikirim untuk operasi bulk (sql/008)
+    match = re.search(r"(Buku|Keranjang|Item) tidak ditemukan( \(id_buku \d+\))?", m)
+    if match:
+        raise HTTPException(status_code=404, detail=match.group(0))
+    match = re.search(
+        r"Buku sedang tidak aktif( \(id_buku \d+\))?|Stok buku habis|Jumlah minimal 1"
+        r"|Stok tidak cukup( \(id_buku \d+\))?\. Sisa stok: \d+|Operasi keranjang kosong",
+        m,
+    )
+    if match:
+        raise HTTPException(status_code=400, detail=match.group(0))
+    raise HTTPException(status_code=500, detail=m or "Terjadi kesalahan")
 
-            supabase.table("keranjang_item").update(
-                {"jumlah": jumlah_baru, "harga_satuan": harga_satuan, "subtotal": harga_satuan * jumlah_baru}
-            ).eq("id_keranjang_item", id_item).execute()
 
-            return {"message": "Jumlah barang diperbarui"}
+async def _rpc_cart(fn: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Return data RPC, None kalau fungsi belum ada di database.
+    """
+    try:
+        res = await supabase_async.rpc(fn, params).execute()
+    except Exception as e:
+        if _schema_missing(e):
+            logger.warning("%s belum ada (sql/006 / sql/008), mutasi keranjang pakai jalur lama", fn)
+            return None
+        _raise_cart_rpc_error(str(e))
+    return _normalize_rpc_data(res.data)
 
-        supabase.table("keranjang_item").insert(
-            {
-                "id_keranjang": id_keranjang,
-                "id_buku": item.id_buku,
-                "jumlah": int(item.jumlah),
-                "harga_satuan": harga_satuan,
-                "subtotal": harga_satuan * int(item.jumlah),
-            }
-        ).execute()
 
+@router.post("/items", status_code=201, response_model=MessageResponse)
+async def add_to_cart(item: CartItemInput, user: dict = Depends(get_current_user)):
+    try:
+        data = await _rpc_cart(
+            "cart_add_item",
+            {"p_id_user": user["id_user"], "p_id_buku": item.id_buku, "p_jumlah": int(item.jumlah)},
+        )
+        if data is None:
+            return await _legacy_add_to_cart(item, user["id_user"])
+        if data.get("action") == "updated":
+            return {"message": "Jumlah barang diperbarui"}
         return {"message": "Barang berhasil masuk keranjang"}
     except HTTPException:
         raise
@@ -191,40 +266,14 @@ def add_to_cart(item: CartItemInput, user: dict = Depends(get_current_user)):
 
 
 @router.patch("/items/{item_id}", response_model=MessageResponse)
-def update_cart_item_qty(item_id: int, payload: UpdateQtyPayload, user: dict = Depends(get_current_user)):
+async def update_cart_item_qty(item_id: int, payload: UpdateQtyPayload, user: dict = Depends(get_current_user)):
     try:
-        id_keranjang = _get_active_cart_id_or_none(user["id_user"])
-        if not id_keranjang:
-            raise HTTPException(status_code=404, detail="Keranjang tidak ditemukan")
-
-        cek_item = (
-            supabase.table("keranjang_item")
-            .select("id_keranjang_item, id_buku")
-            .eq("id_keranjang", id_keranjang)
-            .eq("id_keranjang_item", item_id)
-            .limit(1)
-            .execute()
+        data = await _rpc_cart(
+            "cart_update_item_qty",
+            {"p_id_user": user["id_user"], "p_id_keranjang_item": item_id, "p_jumlah": int(payload.jumlah)},
         )
-        if not cek_item.data:
-            raise HTTPException(status_code=404, detail="Item tidak ditemukan")
-
-        id_buku = int(cek_item.data[0]["id_buku"])
-        buku = _get_book_realtime(id_buku)
-
-        if buku.get("status") != "aktif":
-            raise HTTPException(status_code=400, detail="Buku sedang tidak aktif")
-
-        stok = int(buku.get("stok") or 0)
-        if int(payload.jumlah) > stok:
-            raise HTTPException(status_code=400, detail=f"Stok tidak cukup. Sisa stok: {stok}")
-
-        harga_satuan = float(buku["harga"])
-        subtotal = harga_satuan * int(payload.jumlah)
-
-        supabase.table("keranjang_item").update(
-            {"jumlah": int(payload.jumlah), "harga_satuan": harga_satuan, "subtotal": subtotal}
-        ).eq("id_keranjang_item", item_id).execute()
-
+        if data is None:
+            await _legacy_update_cart_item_qty(item_id, int(payload.jumlah), user["id_user"])
         return {"message": "Item berhasil diupdate"}
     except HTTPException:
         raise
@@ -232,25 +281,30 @@ def update_cart_item_qty(item_id: int, payload: UpdateQtyPayload, user: dict = D
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.delete("/items/{item_id}", response_model=MessageResponse)
-def remove_cart_item(item_id: int, user: dict = Depends(get_current_user)):
+@router.patch("/items", response_model=CartResponse)
+async def apply_cart_ops(payload: CartBulkRequest, user: dict = Depends(get_current_user)):
+    """
+    Banyak perubahan keranjang sekaligus (diproses berurutan), 1 transaksi: gagal 1 -> tidak ada yang berubah.
+    Return keranjang terbaru (sama dengan GET /cart).
+    """
+    ops = [op.model_dump() for op in payload.items]
     try:
-        id_keranjang = _get_active_cart_id_or_none(user["id_user"])
-        if not id_keranjang:
-            raise HTTPException(status_code=404, detail="Keranjang tidak ditemukan")
+        data = await _rpc_cart("cart_apply_ops", {"p_id_user": user["id_user"], "p_ops": ops})
+        if data is None:
+            await _legacy_apply_cart_ops(ops, user["id_user"])
+        return await _cart_response(user["id_user"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        cek = (
-            supabase.table("keranjang_item")
-            .select("id_keranjang_item")
-            .eq("id_keranjang", id_keranjang)
-            .eq("id_keranjang_item", item_id)
-            .limit(1)
-            .execute()
-        )
-        if not cek.data:
-            raise HTTPException(status_code=404, detail="Item tidak ditemukan")
 
-        supabase.table("keranjang_item").delete().eq("id_keranjang_item", item_id).execute()
+@router.delete("/items/{item_id}", response_model=MessageResponse)
+async def remove_cart_item(item_id: int, user: dict = Depends(get_current_user)):
+    try:
+        data = await _rpc_cart("cart_remove_item", {"p_id_user": user["id_user"], "p_id_keranjang_item": item_id})
+        if data is None:
+            await _legacy_remove_cart_item(item_id, user["id_user"])
         return {"message": "Item dihapus dari keranjang"}
     except HTTPException:
         raise
@@ -258,33 +312,217 @@ def remove_cart_item(item_id: int, user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ===========================
+# JALUR LAMA (tanpa sql/006 / sql/008, tidak race-safe)
+# ===========================
+async def _legacy_add_to_cart(item: CartItemInput, id_user: int) -> Dict[str, str]:
+    buku = await _get_book_realtime(item.id_buku)
+    if buku.get("status") != "aktif":
+        raise HTTPException(status_code=400, detail="Buku sedang tidak aktif")
+
+    stok = int(buku.get("stok") or 0)
+    if stok <= 0:
+        raise HTTPException(status_code=400, detail="Stok buku habis")
+    if int(item.jumlah) > stok:
+        raise HTTPException(status_code=400, detail=f"Stok tidak cukup. Sisa stok: {stok}")
+
+    id_keranjang = await _get_or_create_active_cart_id(id_user)
+    harga_satuan = float(buku["harga"])
+
+    cek_item = await (
+        supabase_async.table("keranjang_item")
+        .select("id_keranjang_item, jumlah")
+        .eq("id_keranjang", id_keranjang)
+        .eq("id_buku", item.id_buku)
+        .limit(1)
+        .execute()
+    )
+
+    if cek_item.data:
+        row = cek_item.data[0]
+        id_item = int(row["id_keranjang_item"])
+        jumlah_baru = int(row["jumlah"]) + int(item.jumlah)
+        if jumlah_baru > stok:
+            raise HTTPException(status_code=400, detail=f"Stok tidak cukup. Sisa stok: {stok}")
+
+        await supabase_async.table("keranjang_item").update(
+            {"jumlah": jumlah_baru, "harga_satuan": harga_satuan, "subtotal": harga_satuan * jumlah_baru}
+        ).eq("id_keranjang_item", id_item).execute()
+
+        return {"message": "Jumlah barang diperbarui"}
+
+    await supabase_async.table("keranjang_item").insert(
+        {
+            "id_keranjang": id_keranjang,
+            "id_buku": item.id_buku,
+            "jumlah": int(item.jumlah),
+            "harga_satuan": harga_satuan,
+            "subtotal": harga_satuan * int(item.jumlah),
+        }
+    ).execute()
+
+    return {"message": "Barang berhasil masuk keranjang"}
+
+
+async def _legacy_update_cart_item_qty(item_id: int, jumlah: int, id_user: int) -> None:
+    id_keranjang = await _get_active_cart_id_or_none(id_user)
+    if not id_keranjang:
+        raise HTTPException(status_code=404, detail="Keranjang tidak ditemukan")
+
+    cek_item = await (
+        supabase_async.table("keranjang_item")
+        .select("id_keranjang_item, id_buku")
+        .eq("id_keranjang", id_keranjang)
+        .eq("id_keranjang_item", item_id)
+        .limit(1)
+        .execute()
+    )
+    if not cek_item.data:
+        raise HTTPException(status_code=404, detail="Item tidak ditemukan")
+
+    id_buku = int(cek_item.data[0]["id_buku"])
+    buku = await _get_book_realtime(id_buku)
+
+    if buku.get("status") != "aktif":
+        raise HTTPException(status_code=400, detail="Buku sedang tidak aktif")
+
+    stok = int(buku.get("stok") or 0)
+    if jumlah > stok:
+        raise HTTPException(status_code=400, detail=f"Stok tidak cukup. Sisa stok: {stok}")
+
+    harga_satuan = float(buku["harga"])
+    subtotal = harga_satuan * jumlah
+
+    await supabase_async.table("keranjang_item").update(
+        {"jumlah": jumlah, "harga_satuan": harga_satuan, "subtotal": subtotal}
+    ).eq("id_keranjang_item", item_id).execute()
+
+
+async def _legacy_remove_cart_item(item_id: int, id_user: int) -> None:
+    id_keranjang = await _get_active_cart_id_or_none(id_user)
+    if not id_keranjang:
+        raise HTTPException(status_code=404, detail="Keranjang tidak ditemukan")
+
+    cek = await (
+        supabase_async.table("keranjang_item")
+        .select("id_keranjang_item")
+        .eq("id_keranjang", id_keranjang)
+        .eq("id_keranjang_item", item_id)
+        .limit(1)
+        .execute()
+    )
+    if not cek.data:
+        raise HTTPException(status_code=404, detail="Item tidak ditemukan")
+
+    await supabase_async.table("keranjang_item").delete().eq("id_keranjang_item", item_id).execute()
+
+
+async def _legacy_apply_cart_ops(ops: List[Dict[str, Any]], id_user: int) -> None:
+    # hitung jumlah akhir per buku dulu, cek status & stok sekali (in_), baru tulis
+    ids = sorted({int(op["id_buku"]) for op in ops})
+    buku_res = await (
+        supabase_async.table("buku").select("id_buku, harga, stok, status").in_("id_buku", ids).execute()
+    )
+    buku_map = {int(b["id_buku"]): b for b in (buku_res.data or [])}
+    for id_buku in ids:
+        if id_buku not in buku_map:
+            raise HTTPException(status_code=404, detail=f"Buku tidak ditemukan (id_buku {id_buku})")
+
+    id_keranjang = await _get_active_cart_id_or_none(id_user)
+    existing: Dict[int, Dict[str, Any]] = {}
+    if id_keranjang:
+        items_res = await (
+            supabase_async.table("keranjang_item")
+            .select("id_keranjang_item, id_buku, jumlah")
+            .eq("id_keranjang", id_keranjang)
+            .in_("id_buku", ids)
+            .execute()
+        )
+        existing = {int(r["id_buku"]): r for r in (items_res.data or [])}
+
+    final = {id_buku: int(existing[id_buku]["jumlah"]) if id_buku in existing else 0 for id_buku in ids}
+    for op in ops:
+        id_buku, jumlah = int(op["id_buku"]), int(op.get("jumlah") or 0)
+        if op.get("op") == "remove":
+            final[id_buku] = 0
+        elif op.get("op") == "add":
+            final[id_buku] += jumlah
+        else:
+            final[id_buku] = jumlah
+
+    for id_buku in ids:
+        if final[id_buku] <= 0:
+            continue
+        buku = buku_map[id_buku]
+        if buku.get("status") != "aktif":
+            raise HTTPException(status_code=400, detail=f"Buku sedang tidak aktif (id_buku {id_buku})")
+        stok = int(buku.get("stok") or 0)
+        if final[id_buku] > stok:
+            raise HTTPException(status_code=400, detail=f"Stok tidak cukup (id_buku {id_buku}). Sisa stok: {stok}")
+
+    if not id_keranjang:
+        if not any(final[id_buku] > 0 for id_buku in ids):
+            return
+        id_keranjang = await _get_or_create_active_cart_id(id_user)
+
+    upserts: List[Dict[str, Any]] = []
+    deletes: List[int] = []
+    for id_buku in ids:
+        jumlah = final[id_buku]
+        row = existing.get(id_buku)
+        if jumlah <= 0:
+            if row:
+                deletes.append(int(row["id_keranjang_item"]))
+            continue
+        harga_satuan = float(buku_map[id_buku]["harga"])
+        data = {
+            "id_keranjang": id_keranjang,
+            "id_buku": id_buku,
+            "jumlah": jumlah,
+            "harga_satuan": harga_satuan,
+            "subtotal": harga_satuan * jumlah,
+        }
+        if row:
+            data["id_keranjang_item"] = int(row["id_keranjang_item"])
+        upserts.append(data)
+
+    if deletes:
+        await supabase_async.table("keranjang_item").delete().in_("id_keranjang_item", deletes).execute()
+    new_rows = [r for r in upserts if "id_keranjang_item" not in r]
+    old_rows = [r for r in upserts if "id_keranjang_item" in r]
+    if old_rows:
+        await supabase_async.table("keranjang_item").upsert(old_rows, on_conflict="id_keranjang_item").execute()
+    if new_rows:
+        await supabase_async.table("keranjang_item").insert(new_rows).execute()
+
+
 @router.delete("/", response_model=MessageResponse)
-def clear_cart(user: dict = Depends(get_current_user)):
+async def clear_cart(user: dict = Depends(get_current_user)):
     try:
-        id_keranjang = _get_active_cart_id_or_none(user["id_user"])
+        id_keranjang = await _get_active_cart_id_or_none(user["id_user"])
         if not id_keranjang:
             return {"message": "Keranjang sudah kosong"}
 
-        supabase.table("keranjang_item").delete().eq("id_keranjang", id_keranjang).execute()
+        await supabase_async.table("keranjang_item").delete().eq("id_keranjang", id_keranjang).execute()
         return {"message": "Keranjang dikosongkan"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/checkout", status_code=status.HTTP_201_CREATED, response_model=CheckoutResult)
-def checkout_cart(payload: CheckoutRequest, user: dict = Depends(get_current_user)):
+async def checkout_cart(payload: CheckoutRequest, user: dict = Depends(get_current_user)):
     try:
-        id_keranjang = _get_active_cart_id_or_none(user["id_user"])
+        id_keranjang = await _get_active_cart_id_or_none(user["id_user"])
         if not id_keranjang:
             raise HTTPException(status_code=400, detail="Keranjang belanja kosong")
 
-        items_res = supabase.table("keranjang_item").select("id_buku, jumlah").eq("id_keranjang", id_keranjang).execute()
+        items_res = await supabase_async.table("keranjang_item").select("id_buku, jumlah").eq("id_keranjang", id_keranjang).execute()
         if not items_res.data:
             raise HTTPException(status_code=400, detail="Keranjang belanja kosong")
 
         items_payload = [{"id_buku": int(x["id_buku"]), "jumlah": int(x["jumlah"])} for x in items_res.data]
 
-        data = _rpc_create_order_atomic(
+        data = await _rpc_create_order_atomic(
             id_user=user["id_user"],
             alamat_pengiriman=payload.alamat_pengiriman,
             catatan=payload.catatan,
@@ -293,8 +531,8 @@ def checkout_cart(payload: CheckoutRequest, user: dict = Depends(get_current_use
         )
 
         # clear items + tandai cart checkout (rapi sesuai kolom status_keranjang)
-        supabase.table("keranjang_item").delete().eq("id_keranjang", id_keranjang).execute()
-        supabase.table("keranjang").update({"status_keranjang": "checkout"}).eq("id_keranjang", id_keranjang).execute()
+        await supabase_async.table("keranjang_item").delete().eq("id_keranjang", id_keranjang).execute()
+        await supabase_async.table("keranjang").update({"status_keranjang": "checkout"}).eq("id_keranjang", id_keranjang).execute()
 
         return {
             "message": "Checkout berhasil!",
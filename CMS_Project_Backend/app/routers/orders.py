@@ -5,12 +5,19 @@ from fastapi import APIRouter, HTTPException, status, Depends, Query
 from pydantic import BaseModel, Field
 from fastapi.responses import Response
 
-from app.database import supabase
+from app.database import arun_read, supabase_async
 from app.dependencies import get_current_user
+from app.services import related_books
+from app.services.catalog_events import notify_changed
 from app.schemas import CartItemInput, OrderResponse, CheckoutResult
+from app.utils.fast_json import ResponseSerializer
 
 router = APIRouter()
 
+# riwayat order bisa panjang (order_item + buku nested) -> serialisasi langsung ke byte JSON
+_ORDER_SERIALIZER = ResponseSerializer(OrderResponse)
+_ORDER_LIST_SERIALIZER = ResponseSerializer(List[OrderResponse])
+
 
 class CreateOrderRequest(BaseModel):
     alamat_pengiriman: str
@@ -44,7 +51,7 @@ def _raise_mapped_rpc_error(msg: str):
     raise HTTPException(status_code=400, detail=m or "Terjadi kesalahan")
 
 
-def _rpc_create_order_atomic(
+async def _rpc_create_order_atomic(
     *,
     id_user: int,
     alamat_pengiriman: str,
@@ -53,7 +60,7 @@ def _rpc_create_order_atomic(
     items_payload: List[Dict[str, int]],
 ) -> Dict[str, Any]:
     try:
-        rpc_res = supabase.rpc(
+        rpc_res = await supabase_async.rpc(
             "create_order_atomic",
             {
                 "p_id_user": id_user,
@@ -67,6 +74,10 @@ def _rpc_create_order_atomic(
         data = _normalize_rpc_data(rpc_res.data)
         if not data:
             raise HTTPException(status_code=500, detail="Gagal membuat order (RPC tidak mengembalikan data)")
+        # stok buku berkurang -> cache katalog harus ikut
+        notify_changed("buku", [it["id_buku"] for it in items_payload])
+        # pasangan buku di order ini langsung masuk rekomendasi "dibeli bersama"
+        related_books.record_order(it["id_buku"] for it in items_payload)
         return data
     except HTTPException:
         raise
@@ -74,10 +85,10 @@ def _rpc_create_order_atomic(
         _raise_mapped_rpc_error(str(e))
 
 
-def _clear_active_cart_items_safe(id_user: int):
+async def _clear_active_cart_items_safe(id_user: int):
     try:
-        cart = (
-            supabase.table("keranjang")
+        cart = await (
+            supabase_async.table("keranjang")
             .select("id_keranjang")
             .eq("id_user", id_user)
             .eq("status_keranjang", "aktif")
@@ -87,7 +98,7 @@ def _clear_active_cart_items_safe(id_user: int):
         if not cart.data:
             return
         id_keranjang = int(cart.data[0]["id_keranjang"])
-        supabase.table("keranjang_item").delete().eq("id_keranjang", id_keranjang).execute()
+        await supabase_async.table("keranjang_item").delete().eq("id_keranjang", id_keranjang).execute()
     except Exception:
         pass
 
@@ -96,7 +107,7 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _try_archive_order(id_order: int, id_user: int) -> bool:
+async def _try_archive_order(id_order: int, id_user: int) -> bool:
     """
     Soft delete: set is_archived = true (dan archived_at jika kolom ada).
     Kalau kolom belum ada, return False agar caller bisa fallback.
@@ -104,8 +115,8 @@ def _try_archive_order(id_order: int, id_user: int) -> bool:
     try:
         # update is_archived (archived_at opsional)
         payload = {"is_archived": True, "archived_at": _now_iso()}
-        res = (
-            supabase.table("orders")
+        res = await (
+            supabase_async.table("orders")
             .update(payload)
             .eq("id_order", id_order)
             .eq("id_user", id_user)
@@ -117,13 +128,13 @@ def _try_archive_order(id_order: int, id_user: int) -> bool:
         # kemungkinan kolom is_archived/archived_at belum ada
         try:
             payload = {"is_archived": True}
-            supabase.table("orders").update(payload).eq("id_order", id_order).eq("id_user", id_user).execute()
+            await supabase_async.table("orders").update(payload).eq("id_order", id_order).eq("id_user", id_user).execute()
             return True
         except Exception:
             return False
 
 
-def _select_orders(user_id: int, include_archived: bool) -> List[Dict[str, Any]]:
+async def _select_orders(user_id: int, include_archived: bool) -> List[Dict[str, Any]]:
     """
     Aman: kalau kolom is_archived belum ada, otomatis fallback tanpa filter.
     """
@@ -132,30 +143,28 @@ def _select_orders(user_id: int, include_archived: bool) -> List[Dict[str, Any]]
         "order_item(id_order_item, id_order, id_buku, jumlah, harga_satuan, subtotal, created_at, buku(judul, cover_image))"
     )
 
-    base = (
-        supabase.table("orders")
-        .select(select_cols)
-        .eq("id_user", user_id)
-        .order("created_at", desc=True)
-    )
+    def _build(db, hide_archived: bool):
+        q = db.table("orders").select(select_cols).eq("id_user", user_id).order("created_at", desc=True)
+        return q.eq("is_archived", False) if hide_archived else q
 
+    # riwayat = read-only -> boleh dari read replica
     if include_archived:
-        return (base.execute().data) or []
+        return ((await arun_read(lambda db: _build(db, False))).data) or []
 
     # try filter is_archived=false, fallback kalau kolom belum ada
     try:
-        res = base.eq("is_archived", False).execute()
+        res = await arun_read(lambda db: _build(db, True))
         return res.data or []
     except Exception:
-        res = base.execute()
+        res = await arun_read(lambda db: _build(db, False))
         return res.data or []
 
 
 @router.post("/orders", tags=["Orders"], status_code=status.HTTP_201_CREATED, response_model=CheckoutResult)
-def create_order(payload: CreateOrderRequest, user: dict = Depends(get_current_user)):
+async def create_order(payload: CreateOrderRequest, user: dict = Depends(get_current_user)):
     items_payload = [{"id_buku": it.id_buku, "jumlah": it.jumlah} for it in payload.items]
 
-    data = _rpc_create_order_atomic(
+    data = await _rpc_create_order_atomic(
         id_user=user["id_user"],
         alamat_pengiriman=payload.alamat_pengiriman,
         catatan=payload.catatan,
@@ -163,7 +172,7 @@ def create_order(payload: CreateOrderRequest, user: dict = Depends(get_current_u
         items_payload=items_payload,
     )
 
-    _clear_active_cart_items_safe(user["id_user"])
+    await _clear_active_cart_items_safe(user["id_user"])
 
     return {
         "message": "Order berhasil dibuat!",
@@ -175,7 +184,7 @@ def create_order(payload: CreateOrderRequest, user: dict = Depends(get_current_u
 
 
 @router.get("/orders", tags=["Orders"], response_model=List[OrderResponse])
-def get_my_order_history(
+async def get_my_order_history(
     include_archived: bool = Query(False, description="Jika true, tampilkan juga order yang sudah di-archive"),
     user: dict = Depends(get_current_user),
 ):
@@ -187,16 +196,16 @@ def get_my_order_history(
     Default: sembunyikan order yang is_archived=true (kalau kolomnya ada).
     """
     try:
-        return _select_orders(user["id_user"], include_archived=include_archived)
+        return _ORDER_LIST_SERIALIZER.response(await _select_orders(user["id_user"], include_archived=include_archived))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/orders/{id_order}", tags=["Orders"], response_model=OrderResponse)
-def get_order_detail(id_order: int, user: dict = Depends(get_current_user)):
+async def get_order_detail(id_order: int, user: dict = Depends(get_current_user)):
     try:
-        res = (
-            supabase.table("orders")
+        res = await (
+            supabase_async.table("orders")
             .select(
                 "*, status_order(nama_status), status_pembayaran(nama_status), "
                 "order_item(id_order_item, id_order, id_buku, jumlah, harga_satuan, subtotal, created_at, buku(judul, cover_image))"
@@ -208,7 +217,7 @@ def get_order_detail(id_order: int, user: dict = Depends(get_current_user)):
         )
         if not res.data:
             raise HTTPException(status_code=404, detail="Order tidak ditemukan")
-        return res.data[0]
+        return _ORDER_SERIALIZER.response(res.data[0])
     except HTTPException:
         raise
     except Exception as e:
@@ -217,15 +226,15 @@ def get_order_detail(id_order: int, user: dict = Depends(get_current_user)):
 
 # ✅ ENDPOINT BARU: archive (soft delete) order milik user sendiri
 @router.patch("/orders/{id_order}/archive", tags=["Orders"], status_code=status.HTTP_204_NO_CONTENT)
-def archive_order(id_order: int, user: dict = Depends(get_current_user)):
+async def archive_order(id_order: int, user: dict = Depends(get_current_user)):
     """
     Soft delete (ecommerce-friendly):
     - set is_archived = true (opsional archived_at)
     - order tidak muncul lagi di GET /orders (default)
     """
     try:
-        check = (
-            supabase.table("orders")
+        check = await (
+            supabase_async.table("orders")
             .select("id_order, id_user")
             .eq("id_order", id_order)
             .eq("id_user", user["id_user"])
@@ -235,7 +244,7 @@ def archive_order(id_order: int, user: dict = Depends(get_current_user)):
         if not check.data:
             raise HTTPException(status_code=404, detail="Order tidak ditemukan")
 
-        ok = _try_archive_order(id_order, user["id_user"])
+        ok = await _try_archive_order(id_order, user["id_user"])
         if not ok:
             raise HTTPException(
                 status_code=400,
@@ -251,15 +260,15 @@ def archive_order(id_order: int, user: dict = Depends(get_current_user)):
 
 # ✅ ENDPOINT DELETE: hard delete, tapi fallback ke archive kalau FK error
 @router.delete("/orders/{id_order}", tags=["Orders"], status_code=status.HTTP_204_NO_CONTENT)
-def delete_order(id_order: int, user: dict = Depends(get_current_user)):
+async def delete_order(id_order: int, user: dict = Depends(get_current_user)):
     """
     Hapus order dari riwayat user.
     - Default: hard delete (hapus child order_item dulu).
     - Jika hard delete gagal karena FK, fallback: archive (soft delete) biar tidak error.
     """
     try:
-        check = (
-            supabase.table("orders")
+        check = await (
+            supabase_async.table("orders")
             .select("id_order, id_user")
             .eq("id_order", id_order)
             .eq("id_user", user["id_user"])
@@ -270,9 +279,9 @@ def delete_order(id_order: int, user: dict = Depends(get_current_user)):
             raise HTTPException(status_code=404, detail="Order tidak ditemukan")
 
         # hard delete: hapus item dulu (hindari FK error)
-        supabase.table("order_item").delete().eq("id_order", id_order).execute()
+        await supabase_async.table("order_item").delete().eq("id_order", id_order).execute()
 
-        supabase.table("orders").delete().eq("id_order", id_order).eq("id_user", user["id_user"]).execute()
+        await supabase_async.table("orders").delete().eq("id_order", id_order).eq("id_user", user["id_user"]).execute()
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     except HTTPException:
@@ -283,7 +292,7 @@ def delete_order(id_order: int, user: dict = Depends(get_current_user)):
         fk_like = "foreign key" in msg or "violates" in msg or "constraint" in msg
 
         if fk_like:
-            ok = _try_archive_order(id_order, user["id_user"])
+            ok = await _try_archive_order(id_order, user["id_user"])
             if ok:
                 return Response(status_code=status.HTTP_204_NO_CONTENT)
 
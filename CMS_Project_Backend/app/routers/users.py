@@ -10,9 +10,12 @@ from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.database import supabase
-from app.dependencies import get_current_user, sanitize_user
+from app.dependencies import get_current_user, invalidate_cached_user, revoke_user_tokens, sanitize_user
+from app.routers.auth import issue_access_token
 from app.schemas import UserResponse
+from app.utils.executors import run_io
 
 load_dotenv()
 
@@ -62,6 +65,21 @@ def _storage_upload(bucket: str, path: str, content: bytes, content_type: str):
         return storage.upload(path, content, {"content-type": content_type, "upsert": "true"})
 
 
+def _role_changed_response(message: str, user_id: int, user_row: dict) -> dict:
+    """
+    Setelah role berubah: cabut token lama (mode stateless) lalu terbitkan token baru
+    supaya sesi user yang sedang aktif tidak putus.
+    """
+    new_version = revoke_user_tokens(user_id)
+    out = {"message": message, "data": sanitize_user(user_row)}
+    if settings.AUTH_STATELESS:
+        row = dict(user_row)
+        if new_version is not None:
+            row["token_version"] = new_version
+        out["access_token"] = issue_access_token(row)
+    return out
+
+
 # ===========================
 # SCHEMAS
 # ===========================
@@ -94,6 +112,8 @@ class RoleUpdatePayload(BaseModel):
 class RoleUpdateResponse(BaseModel):
     message: str
     data: UserResponse
+    # diisi kalau AUTH_STATELESS aktif: token lama dicabut, frontend pakai token baru ini
+    access_token: Optional[str] = None
 
 
 # ===========================
@@ -135,6 +155,7 @@ def update_my_profile(payload: UserUpdatePayload, current_user: dict = Depends(g
 
     try:
         res = supabase.table("users").update(update_payload).eq("id_user", user_id).execute()
+        invalidate_cached_user(user_id)
         if not res.data:
             # fallback fetch (kadang update return kosong di beberapa setup)
             fresh = (
@@ -158,6 +179,58 @@ def update_my_profile(payload: UserUpdatePayload, current_user: dict = Depends(g
 # ===========================
 # 1b) CUSTOMER: UPLOAD AVATAR
 # ===========================
+def _save_avatar(user_id: int, path: str, content: bytes, ct: str) -> dict:
+    """
+    Upload ke storage + update users.avatar_url (blocking, dipanggil lewat run_io).
+    """
+    # upload ke bucket avatars (pakai konstanta)
+    supabase.storage.from_(AVATAR_BUCKET).upload(
+        path,
+        content,
+        {
+            "content-type": ct,
+            "upsert": "true",
+        },
+    )
+
+    pub = supabase.storage.from_(AVATAR_BUCKET).get_public_url(path)
+    avatar_url = ""
+    if isinstance(pub, dict):
+        avatar_url = pub.get("publicUrl") or pub.get("public_url") or ""
+    else:
+        avatar_url = str(pub or "")
+
+    if not avatar_url:
+        raise HTTPException(status_code=500, detail="Gagal membuat public URL avatar")
+
+    res = (
+        supabase.table("users")
+        .update(
+            {
+                "avatar_url": avatar_url,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        .eq("id_user", user_id)
+        .execute()
+    )
+    invalidate_cached_user(user_id)
+
+    if res.data:
+        return res.data[0]
+
+    fresh = (
+        supabase.table("users")
+        .select("*")
+        .eq("id_user", user_id)
+        .limit(1)
+        .execute()
+    )
+    if not fresh.data:
+        raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    return fresh.data[0]
+
+
 @router.post("/profile/avatar", response_model=ProfileUpdateResponse)
 async def upload_my_avatar(
     file: UploadFile = File(...),
@@ -181,52 +254,8 @@ async def upload_my_avatar(
     path = f"user-{user_id}/{uuid.uuid4().hex}{ext}"
 
     try:
-        # upload ke bucket avatars (pakai konstanta)
-        supabase.storage.from_(AVATAR_BUCKET).upload(
-            path,
-            content,
-            {
-                "content-type": ct,
-                "upsert": "true",
-            },
-        )
-
-        pub = supabase.storage.from_(AVATAR_BUCKET).get_public_url(path)
-        avatar_url = ""
-        if isinstance(pub, dict):
-            avatar_url = pub.get("publicUrl") or pub.get("public_url") or ""
-        else:
-            avatar_url = str(pub or "")
-
-        if not avatar_url:
-            raise HTTPException(status_code=500, detail="Gagal membuat public URL avatar")
-
-        res = (
-            supabase.table("users")
-            .update(
-                {
-                    "avatar_url": avatar_url,
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                }
-            )
-            .eq("id_user", user_id)
-            .execute()
-        )
-
-        if not res.data:
-            fresh = (
-                supabase.table("users")
-                .select("*")
-                .eq("id_user", user_id)
-                .limit(1)
-                .execute()
-            )
-            if not fresh.data:
-                raise HTTPException(status_code=404, detail="User tidak ditemukan")
-            return {"message": "Avatar berhasil diupload", "data": sanitize_user(fresh.data[0])}
-
-        return {"message": "Avatar berhasil diupload", "data": sanitize_user(res.data[0])}
-
+        user_row = await run_io(_save_avatar, user_id, path, content, ct)
+        return {"message": "Avatar berhasil diupload", "data": sanitize_user(user_row)}
     except HTTPException:
         raise
     except Exception as e:
@@ -243,6 +272,7 @@ def delete_my_avatar(current_user: dict = Depends(get_current_user)):
             .eq("id_user", user_id)
             .execute()
         )
+        invalidate_cached_user(user_id)
         fresh = (
             supabase.table("users")
             .select("*")
@@ -302,9 +332,11 @@ def upgrade_role(payload: RoleUpgradePayload, current_user: dict = Depends(get_c
             )
             if not fresh.data:
                 raise HTTPException(status_code=404, detail="User tidak ditemukan")
-            return {"message": "Role berhasil diubah", "data": sanitize_user(fresh.data[0])}
+            user_row = fresh.data[0]
+        else:
+            user_row = res.data[0]
 
-        return {"message": "Role berhasil diubah", "data": sanitize_user(res.data[0])}
+        return _role_changed_response("Role berhasil diubah", user_id, user_row)
     except HTTPException:
         raise
     except Exception:
@@ -327,9 +359,11 @@ def downgrade_role(current_user: dict = Depends(get_current_user)):
             )
             if not fresh.data:
                 raise HTTPException(status_code=404, detail="User tidak ditemukan")
-            return {"message": "Role dikembalikan ke customer", "data": sanitize_user(fresh.data[0])}
+            user_row = fresh.data[0]
+        else:
+            user_row = res.data[0]
 
-        return {"message": "Role dikembalikan ke customer", "data": sanitize_user(res.data[0])}
+        return _role_changed_response("Role dikembalikan ke customer", user_id, user_row)
     except HTTPException:
         raise
     except Exception:
@@ -389,7 +423,7 @@ def update_my_role(payload: RoleUpdatePayload, current_user: dict = Depends(get_
         else:
             user_row = res.data[0]
 
-        return {"message": f"Role berhasil diubah menjadi {target_role}", "data": sanitize_user(user_row)}
+        return _role_changed_response(f"Role berhasil diubah menjadi {target_role}", user_id, user_row)
     except HTTPException:
         raise
     except Exception as e:
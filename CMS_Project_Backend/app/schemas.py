@@ -1,6 +1,6 @@
 # app/schemas.py
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -147,6 +147,58 @@ class BookResponse(BookBase):
     updated_at: Optional[datetime] = None
 
 
+# --- sparse fieldset (view=card / fields=) untuk list ---
+class PenulisRef(BaseSchema):
+    id_penulis: int
+    nama_penulis: str
+
+
+class GenreRef(BaseSchema):
+    id_genre: int
+    nama_genre: str
+    slug: Optional[str] = None
+
+
+class BookCardResponse(BaseSchema):
+    # cukup untuk kartu katalog: tanpa deskripsi / biografi penulis
+    id_buku: int
+    judul: str
+    harga: float
+    stok: int
+    cover_image: Optional[str] = None
+    status: Optional[str] = None
+    id_genre: Optional[int] = None
+    id_penulis: Optional[int] = None
+    penulis: Optional[PenulisRef] = None
+    genre: Optional[GenreRef] = None
+    created_at: Optional[datetime] = None
+
+
+class BookFieldsResponse(BaseSchema):
+    # fields=...: hanya kolom yang diminta yang dikirim (dump pakai exclude_unset)
+    id_buku: int
+    judul: Optional[str] = None
+    isbn: Optional[str] = None
+    harga: Optional[float] = None
+    stok: Optional[int] = None
+    berat: Optional[float] = None
+    deskripsi: Optional[str] = None
+    cover_image: Optional[str] = None
+    status: Optional[str] = None
+    id_genre: Optional[int] = None
+    id_penulis: Optional[int] = None
+    penulis: Optional[PenulisRef] = None
+    genre: Optional[GenreRef] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class BookSearchHit(BookResponse):
+    # hanya diisi search_mode=fulltext (RPC search_books)
+    search_rank: Optional[float] = None
+    search_headline: Optional[str] = None
+
+
 # ===========================
 # CART (sesuai SQL: keranjang, keranjang_item)
 # ===========================
@@ -155,6 +207,17 @@ class CartItemInput(BaseSchema):
     jumlah: int = Field(..., ge=1)
 
 
+class CartBulkOp(BaseSchema):
+    # set: jumlah = nilai (0 -> hapus) | add: jumlah + nilai | remove: hapus item
+    id_buku: int
+    jumlah: int = Field(default=0, ge=0)
+    op: Literal["set", "add", "remove"] = "set"
+
+
+class CartBulkRequest(BaseSchema):
+    items: List[CartBulkOp] = Field(..., min_length=1, max_length=100)
+
+
 class CartBookInfo(BaseSchema):
     judul: Optional[str] = None
     harga: Optional[float] = None
@@ -187,6 +250,14 @@ class CartResponse(BaseSchema):
     items: List[CartItemResponse] = Field(default_factory=list)
 
 
+class CartSummaryResponse(BaseSchema):
+    # ringan untuk badge header (tanpa daftar item)
+    id_keranjang: Optional[int] = None
+    item_count: int = 0
+    total_qty: int = 0
+    total_price: float = 0
+
+
 class MessageResponse(BaseSchema):
     message: str
 
@@ -0,0 +1,133 @@
+# app/services/book_export.py
+#
+# Export katalog buku secara streaming (NDJSON / CSV), memory konstan:
+# - baca `buku` per chunk keyset (id_buku > last, urut id_buku) lewat read replica
+# - chunk berikutnya di-prefetch selagi chunk sekarang di-encode & dikirim (maks 2 chunk di memory)
+# - row dari PostgREST langsung di-encode (tanpa validasi Pydantic per row)
+# - gzip opsional, di-compress incremental per chunk
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.database import arun_read
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# relasi embed -> kolom datar di CSV
+_CSV_EMBED_COLUMNS = {"penulis": ("nama_penulis",), "genre": ("nama_genre",)}
+
+
+def _chunk_size() -> int:
+    return max(1, settings.BOOK_EXPORT_CHUNK_SIZE)
+
+
+async def _fetch_chunk(filtered: Callable, select: str, last_id: Optional[int], size: int) -> List[Dict[str, Any]]:
+    def _build(db):
+        q = filtered(db.table("buku").select(select))
+        if last_id is not None:
+            q = q.gt("id_buku", last_id)
+        return q.order("id_buku").limit(size)
+
+    res = await arun_read(_build)
+    return res.data or []
+
+
+async def first_chunk(filtered: Callable, select: str) -> List[Dict[str, Any]]:
+    """
+    Chunk pertama diambil sebelum response dimulai -> error DB masih bisa jadi HTTP error biasa.
+    """
+    return await _fetch_chunk(filtered, select, None, _chunk_size())
+
+
+async def iter_chunks(filtered: Callable, select: str, first: List[Dict[str, Any]]) -> AsyncIterator[List[Dict[str, Any]]]:
+    size = _chunk_size()
+    chunk = first
+    while chunk:
+        nxt = None
+        if len(chunk) >= size:
+            nxt = asyncio.ensure_future(_fetch_chunk(filtered, select, chunk[-1]["id_buku"], size))
+        try:
+            yield chunk
+        except BaseException:
+            if nxt is not None:
+                nxt.cancel()
+            raise
+        chunk = await nxt if nxt is not None else []
+
+
+def csv_columns(columns: Sequence[str], embeds: Sequence[str]) -> List[str]:
+    out = list(columns)
+    for e in embeds:
+        out.extend(_CSV_EMBED_COLUMNS.get(e, ()))
+    return out
+
+
+def _encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+    return ("\n".join(dumps(r) for r in rows) + "\n").encode("utf-8")
+
+
+def _encode_csv(rows: List[Dict[str, Any]], header: List[str], embeds: Sequence[str]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        flat = dict(r)
+        for e in embeds:
+            rel = flat.pop(e, None) or {}
+            for col in _CSV_EMBED_COLUMNS.get(e, ()):
+                flat[col] = rel.get(col)
+        writer.writerow(["" if flat.get(c) is None else flat.get(c) for c in header])
+    return buf.getvalue().encode("utf-8")
+
+
+async def stream_export(
+    chunks: AsyncIterator[List[Dict[str, Any]]],
+    *,
+    fmt: str,
+    columns: Sequence[str],
+    embeds: Sequence[str],
+    gzip_enabled: bool,
+) -> AsyncIterator[bytes]:
+    """
+    Encode tiap chunk (NDJSON / CSV) lalu (opsional) gzip incremental.
+    """
+    gz = zlib.compressobj(settings.BOOK_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if gzip_enabled else None
+
+    def _out(data: bytes) -> bytes:
+        return gz.compress(data) if gz is not None else data
+
+    header = csv_columns(columns, embeds)
+    if fmt == "csv":
+        # BOM -> Excel baca UTF-8 dengan benar
+        buf = io.StringIO()
+        csv.writer(buf).writerow(header)
+        data = _out(b"\xef\xbb\xbf" + buf.getvalue().encode("utf-8"))
+        if data:
+            yield data
+
+    total = 0
+    try:
+        async for chunk in chunks:
+            total += len(chunk)
+            body = _encode_csv(chunk, header, embeds) if fmt == "csv" else _encode_ndjson(chunk)
+            data = _out(body)
+            if data:
+                yield data
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        # header HTTP sudah terkirim -> tidak bisa ganti status, cukup putus stream + log
+        logger.exception("Export buku terputus setelah %s baris", total)
+        raise
+
+    if gz is not None:
+        yield gz.flush()
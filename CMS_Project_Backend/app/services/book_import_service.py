@@ -1,11 +1,12 @@
 from typing import Dict, List, Tuple, Any
 from app.database import supabase
 
-def _get_or_create_genre(nama_genre: str) -> int:
+def _get_or_create_genre(nama_genre: str) -> Tuple[int, bool]:
+    # return (id_genre, baru_dibuat)
     nama_genre = nama_genre.strip()
     res = supabase.table("genre").select("id_genre").ilike("nama_genre", nama_genre).execute()
     if res.data:
-        return res.data[0]["id_genre"]
+        return res.data[0]["id_genre"], False
 
     # create genre otomatis (slug bisa dibuat belakangan)
     ins = supabase.table("genre").insert({
@@ -13,19 +14,20 @@ def _get_or_create_genre(nama_genre: str) -> int:
         "deskripsi_genre": f"Auto-created: {nama_genre}",
         "slug": nama_genre.lower().replace(" ", "-")[:50]
     }).execute()
-    return ins.data[0]["id_genre"]
+    return ins.data[0]["id_genre"], True
 
-def _get_or_create_author(nama_penulis: str) -> int:
+def _get_or_create_author(nama_penulis: str) -> Tuple[int, bool]:
+    # return (id_penulis, baru_dibuat)
     nama_penulis = nama_penulis.strip()
     res = supabase.table("penulis").select("id_penulis").ilike("nama_penulis", nama_penulis).execute()
     if res.data:
-        return res.data[0]["id_penulis"]
+        return res.data[0]["id_penulis"], False
 
     ins = supabase.table("penulis").insert({
         "nama_penulis": nama_penulis,
         "biografi": "Auto-created"
     }).execute()
-    return ins.data[0]["id_penulis"]
+    return ins.data[0]["id_penulis"], True
 
 def _is_duplicate(isbn: str | None, judul: str, id_penulis: int) -> bool:
     if isbn:
@@ -37,10 +39,15 @@ def _is_duplicate(isbn: str | None, judul: str, id_penulis: int) -> bool:
     cek2 = supabase.table("buku").select("id_buku").ilike("judul", judul).eq("id_penulis", id_penulis).execute()
     return bool(cek2.data)
 
-def import_books_from_rows(rows: List[Dict[str, Any]]) -> Tuple[int, int, List[dict]]:
+def import_books_from_rows(rows: List[Dict[str, Any]]) -> Tuple[int, int, List[dict], Dict[str, List[int]]]:
+    """
+    Return (success, failed, errors, changed).
+    changed = id yang dibuat per entity {"buku", "genre", "penulis"} -> dipakai notify_changed (update index incremental).
+    """
     success = 0
     failed = 0
     errors: List[dict] = []
+    changed: Dict[str, List[int]] = {"buku": [], "genre": [], "penulis": []}
 
     for i, row in enumerate(rows, start=2):  # start=2 karena header baris 1
         try:
@@ -58,8 +65,12 @@ def import_books_from_rows(rows: List[Dict[str, Any]]) -> Tuple[int, int, List[d
             if not nama_penulis:
                 raise ValueError("nama_penulis kosong")
 
-            id_genre = _get_or_create_genre(nama_genre)
-            id_penulis = _get_or_create_author(nama_penulis)
+            id_genre, genre_baru = _get_or_create_genre(nama_genre)
+            if genre_baru:
+                changed["genre"].append(id_genre)
+            id_penulis, penulis_baru = _get_or_create_author(nama_penulis)
+            if penulis_baru:
+                changed["penulis"].append(id_penulis)
 
             isbn = (row.get("isbn") or "").strip() or None
             if _is_duplicate(isbn, judul, id_penulis):
@@ -81,11 +92,12 @@ def import_books_from_rows(rows: List[Dict[str, Any]]) -> Tuple[int, int, List[d
                 "status": "aktif"
             }
 
-            supabase.table("buku").insert(payload).execute()
+            ins = supabase.table("buku").insert(payload).execute()
+            changed["buku"].extend(int(r["id_buku"]) for r in ins.data or [])
             success += 1
 
         except Exception as e:
             failed += 1
             errors.append({"row": i, "error": str(e), "data": row})
 
-    return success, failed, errors
+    return success, failed, errors, changed
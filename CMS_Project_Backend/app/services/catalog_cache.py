@@ -0,0 +1,87 @@
+# app/services/catalog_cache.py
+#
+# Cache response katalog publik (byte JSON + ETag) per proses.
+# - key = endpoint + parameter query yang sudah dinormalisasi
+# - invalidasi: tiap entity punya "generation"; write path bump generation lewat
+#   catalog_events -> entry lama otomatis tidak kepakai lagi (lalu ke-evict LRU/TTL)
+# Antar instance (mis. Vercel) tidak saling invalidasi: staleness dibatasi TTL.
+
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.services import catalog_events
+from app.utils.fast_json import ResponseSerializer
+from app.utils.http_cache import etag_json_response, make_etag
+from app.utils.ttl_cache import TTLCache
+
+_cache = TTLCache(maxsize=settings.CATALOG_CACHE_MAX_SIZE, ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS)
+
+_generations: Dict[str, int] = {"buku": 0, "penulis": 0, "genre": 0, "jenis_pembayaran": 0}
+_gen_lock = threading.Lock()
+
+# response buku ikut embed penulis & genre
+BOOK_DEPS = ("buku", "penulis", "genre")
+
+
+def _bump(entity: str, ids=None) -> None:
+    with _gen_lock:
+        _generations[entity] = _generations.get(entity, 0) + 1
+
+
+catalog_events.subscribe(_bump)
+
+
+def cache_key(name: str, deps: Iterable[str], params: Dict[str, Any]) -> Tuple:
+    """
+    Key berisi generation saat ini. Hitung SEBELUM query: kalau ada write selama loader jalan,
+    data lama tersimpan di generation lama (tidak kepakai) dan bukan di generation baru.
+    """
+    gens = tuple(_generations.get(d, 0) for d in deps)
+    norm = tuple(sorted((k, v) for k, v in params.items() if v is not None))
+    return (name, gens, norm)
+
+
+def get_cached(key: Tuple) -> Optional[Tuple[bytes, str]]:
+    if not settings.CATALOG_CACHE_ENABLED:
+        return None
+    return _cache.get(key)
+
+
+def put_cached(key: Tuple, body: bytes) -> Tuple[bytes, str]:
+    entry = (body, make_etag(body))
+    if settings.CATALOG_CACHE_ENABLED:
+        _cache.set(key, entry)
+    return entry
+
+
+async def cached_json(
+    request: Request,
+    *,
+    name: str,
+    deps: Iterable[str],
+    params: Dict[str, Any],
+    serializer: ResponseSerializer,
+    loader: Callable[[], Awaitable[Any]],
+    exclude_unset: bool = False,
+) -> Response:
+    """
+    Ambil dari cache atau jalankan loader, serialisasi sekali lewat `serializer`
+    (tetap sesuai response_model), lalu balas dengan ETag / 304.
+    exclude_unset=True -> key yang tidak ada di data tidak ikut dikirim (sparse fieldset).
+    """
+    key = cache_key(name, tuple(deps), params)
+    entry = get_cached(key)
+    if entry is None:
+        data = await loader()
+        body = serializer.dump(data, exclude_unset=exclude_unset)
+        entry = put_cached(key, body)
+
+    body, etag = entry
+    return etag_json_response(request, body, etag)
+
+
+def stats() -> Dict[str, Any]:
+    return {"enabled": settings.CATALOG_CACHE_ENABLED, "generations": dict(_generations), **_cache.stats()}
@@ -0,0 +1,33 @@
+# app/services/catalog_events.py
+#
+# Notifikasi "data katalog berubah" dari semua jalur tulis (router admin, import CSV).
+# Cache / index in-memory cukup subscribe di sini, tidak perlu dipanggil satu-satu.
+
+import logging
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# entity yang dikenal: "buku", "penulis", "genre", "jenis_pembayaran"
+Listener = Callable[[str, Optional[List[int]]], None]
+
+_listeners: List[Listener] = []
+
+
+def subscribe(listener: Listener) -> Listener:
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def notify_changed(entity: str, ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Panggil setelah write sukses. ids=None artinya "tidak tahu id mana" (anggap semua berubah).
+    Fail-safe: listener yang error tidak menggagalkan endpoint.
+    """
+    id_list = [int(i) for i in ids if i is not None] if ids is not None else None
+    for listener in list(_listeners):
+        try:
+            listener(entity, id_list)
+        except Exception:
+            logger.exception("Listener catalog_events gagal (%s)", entity)
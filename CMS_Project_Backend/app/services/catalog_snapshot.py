@@ -0,0 +1,420 @@
+# app/services/catalog_snapshot.py
+#
+# Snapshot katalog statis untuk CDN / edge (tanpa Python di request path):
+# - buku aktif dipecah per rentang id (shard k = id_buku // SHARD_SIZE), + genre & jenis pembayaran
+# - tiap shard ditulis ke Supabase Storage sebagai .json, .json.gz, dan .json.br (kalau brotli ada)
+# - nama file memuat hash isi -> immutable (cache 1 tahun); shard yang isinya sama tidak di-upload ulang
+# - manifest.json (versi, daftar shard + URL) satu-satunya file yang berubah, cache pendek
+# - perubahan dari catalog_events diterapkan incremental: shard yang terkena dibaca ulang utuh
+#   (seluruh rentang id) dari primary, tulis ulang shard itu saja, lalu terbitkan manifest baru
+#   di atas manifest terbaru di storage (instance lain bisa sudah menerbitkan shard lain)
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.database import run_read, storage_public_url, supabase
+from app.services import catalog_events
+from app.utils.executors import get_io_executor
+
+try:
+    import brotli  # opsional: tanpa brotli hanya .json + .json.gz
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_BOOK_SELECT = (
+    "id_buku, judul, isbn, harga, stok, berat, deskripsi, cover_image, status, id_genre, id_penulis, "
+    "created_at, updated_at, penulis(id_penulis, nama_penulis), genre(id_genre, nama_genre, slug)"
+)
+_IMMUTABLE_MAX_AGE = "31536000"
+
+
+def _prefix() -> str:
+    return settings.CATALOG_SNAPSHOT_PREFIX.strip("/")
+
+
+def _manifest_path() -> str:
+    return f"{_prefix()}/manifest.json"
+
+
+def _shard_size() -> int:
+    return max(1, settings.CATALOG_SNAPSHOT_SHARD_SIZE)
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# ===========================
+# STORAGE
+# ===========================
+def _bucket():
+    return supabase.storage.from_(settings.CATALOG_SNAPSHOT_BUCKET)
+
+
+def _upload(path: str, content: bytes, content_type: str, max_age: str) -> None:
+    _bucket().upload(
+        path,
+        content,
+        file_options={"content-type": content_type, "cache-control": max_age, "upsert": "true"},
+    )
+
+
+def _download_manifest() -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(_bucket().download(_manifest_path()))
+    except Exception as e:
+        logger.info("Manifest snapshot belum ada / gagal dibaca: %s", e)
+        return None
+
+
+def _put_artifact(name: str, body: bytes, known: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Tulis 1 artifact (semua encoding). Kalau hash sama dengan manifest sebelumnya -> tidak upload.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    prev = known.get(name)
+    if prev is not None and prev.get("sha256") == digest:
+        return prev
+
+    base = f"{_prefix()}/{name}.{digest[:16]}.json"
+    files = {"identity": base, "gzip": base + ".gz"}
+    _upload(base, body, "application/json", _IMMUTABLE_MAX_AGE)
+    _upload(files["gzip"], gzip.compress(body, 9, mtime=0), "application/gzip", _IMMUTABLE_MAX_AGE)
+    if brotli is not None:
+        files["br"] = base + ".br"
+        _upload(files["br"], brotli.compress(body, quality=11), "application/x-brotli", _IMMUTABLE_MAX_AGE)
+
+    bucket = settings.CATALOG_SNAPSHOT_BUCKET
+    return {
+        "sha256": digest,
+        "bytes": len(body),
+        "files": {enc: storage_public_url(bucket, path) for enc, path in files.items()},
+        "paths": files,
+    }
+
+
+# ===========================
+# STATE IN-MEMORY
+# ===========================
+class _Snapshot:
+    def __init__(self) -> None:
+        self.shards: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self.genres: List[Dict[str, Any]] = []
+        self.payment_methods: List[Dict[str, Any]] = []
+        self.manifest: Optional[Dict[str, Any]] = None
+        self.manifest_checked_at = 0.0
+        self.loaded = False
+        # file versi sebelumnya: dihapus satu versi kemudian (client yang masih pegang manifest lama aman)
+        self.retired: Set[str] = set()
+
+    def put_book(self, row: Dict[str, Any]) -> int:
+        book_id = int(row["id_buku"])
+        k = book_id // _shard_size()
+        shard = self.shards.setdefault(k, {})
+        if row.get("status") == "aktif":
+            shard[book_id] = row
+        else:
+            shard.pop(book_id, None)
+        return k
+
+
+_state = _Snapshot()
+_build_lock = threading.Lock()
+_pending_lock = threading.Lock()
+
+
+def _fetch_all_books() -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    last_id = 0
+    page_size = 1000
+    while True:
+        res = run_read(
+            lambda db: db.table("buku")
+            .select(_BOOK_SELECT)
+            .eq("status", "aktif")
+            .gt("id_buku", last_id)
+            .order("id_buku")
+            .limit(page_size)
+        )
+        chunk = res.data or []
+        rows.extend(chunk)
+        if len(chunk) < page_size:
+            return rows
+        last_id = int(chunk[-1]["id_buku"])
+
+
+def _fetch_shard(k: int) -> List[Dict[str, Any]]:
+    # dari primary: replika bisa belum menerima write yang baru saja terjadi
+    size = _shard_size()
+    hi = (k + 1) * size
+    rows: List[Dict[str, Any]] = []
+    last_id = k * size - 1
+    page_size = 1000
+    while True:
+        chunk = (
+            supabase.table("buku")
+            .select(_BOOK_SELECT)
+            .eq("status", "aktif")
+            .gt("id_buku", last_id)
+            .lt("id_buku", hi)
+            .order("id_buku")
+            .limit(page_size)
+            .execute()
+            .data
+            or []
+        )
+        rows.extend(chunk)
+        if len(chunk) < page_size:
+            return rows
+        last_id = int(chunk[-1]["id_buku"])
+
+
+def _fetch_genres() -> List[Dict[str, Any]]:
+    return supabase.table("genre").select("*").order("nama_genre").execute().data or []
+
+
+def _fetch_payment_methods() -> List[Dict[str, Any]]:
+    res = (
+        supabase.table("jenis_pembayaran")
+        .select("*")
+        .eq("is_active", True)
+        .order("id_jenis_pembayaran")
+        .execute()
+    )
+    return res.data or []
+
+
+# ===========================
+# PUBLISH
+# ===========================
+def _artifact_index(manifest: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    if not manifest:
+        return {}
+    known = {s["name"]: s for s in manifest.get("books", {}).get("shards", [])}
+    for key in ("genres", "payment_methods"):
+        if manifest.get(key):
+            known[key] = manifest[key]
+    return known
+
+
+def _manifest_files(manifest: Optional[Dict[str, Any]]) -> Set[str]:
+    return {p for a in _artifact_index(manifest).values() for p in a.get("paths", {}).values()}
+
+
+def _publish(dirty_shards: Optional[Set[int]], lists_dirty: bool) -> Dict[str, Any]:
+    """
+    dirty_shards=None -> semua shard dibandingkan (hash sama tetap tidak di-upload ulang).
+    Selain itu hanya dirty_shards yang ditulis dari _state, shard lain diambil apa adanya dari manifest terbaru.
+    Dipanggil di dalam _build_lock.
+    """
+    # manifest terbaru dari storage (versi & shard yang diterbitkan instance lain).
+    # Storage tidak punya compare-and-swap: dua instance yang publish bersamaan masih bisa bentrok,
+    # tapi jendelanya tinggal antara download ini dan upload manifest di bawah.
+    fresh = _download_manifest()
+    if fresh is not None and int(fresh.get("version", 0)) >= int((_state.manifest or {}).get("version", 0)):
+        _state.manifest = fresh
+    prev = _state.manifest
+    known = _artifact_index(prev)
+    prev_shards = {s["shard"]: s for s in (prev or {}).get("books", {}).get("shards", [])}
+
+    shards_out: List[Dict[str, Any]] = []
+    uploaded = 0
+    for k in sorted(set(_state.shards) | set(prev_shards)):
+        if dirty_shards is not None and k not in dirty_shards:
+            if k in prev_shards:
+                shards_out.append(prev_shards[k])
+            continue
+        rows = _state.shards.get(k) or {}
+        if not rows:
+            _state.shards.pop(k, None)
+            continue
+        ids = sorted(rows)
+        name = f"books-{k:05d}"
+        before = known.get(name)
+        art = _put_artifact(name, _encode({"shard": k, "data": [rows[i] for i in ids]}), known)
+        uploaded += art is not before
+        shards_out.append({"name": name, "shard": k, "id_min": ids[0], "id_max": ids[-1], "count": len(ids), **art})
+
+    lists: Dict[str, Any] = {}
+    for key, rows in (("genres", _state.genres), ("payment_methods", _state.payment_methods)):
+        if lists_dirty or not known.get(key):
+            before = known.get(key)
+            art = _put_artifact(key, _encode({"data": rows}), known)
+            uploaded += art is not before
+            lists[key] = dict(art, count=len(rows))
+        else:
+            lists[key] = known[key]
+
+    manifest = {
+        "version": int((prev or {}).get("version", 0)) + 1,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "shard_size": _shard_size(),
+        "encodings": ["identity", "gzip"] + (["br"] if brotli is not None else []),
+        "books": {"count": sum(s["count"] for s in shards_out), "shards": shards_out},
+        **lists,
+    }
+    # tanpa perubahan isi -> tidak perlu versi baru
+    if prev is not None and uploaded == 0 and [s["sha256"] for s in shards_out] == [
+        s["sha256"] for s in prev.get("books", {}).get("shards", [])
+    ]:
+        return prev
+
+    _upload(_manifest_path(), _encode(manifest), "application/json", str(settings.CATALOG_SNAPSHOT_MANIFEST_MAX_AGE))
+
+    # hapus file yang sudah tidak dipakai sejak versi sebelumnya
+    live = _manifest_files(manifest)
+    stale = sorted(_state.retired - live)
+    if stale:
+        try:
+            _bucket().remove(stale)
+        except Exception:
+            logger.exception("Gagal menghapus %s file snapshot lama", len(stale))
+    _state.retired = _manifest_files(prev) - live
+    _state.manifest = manifest
+    _state.manifest_checked_at = time.time()
+    logger.info("Snapshot katalog v%s diterbitkan (%s artifact di-upload)", manifest["version"], uploaded)
+    return manifest
+
+
+def rebuild() -> Dict[str, Any]:
+    """
+    Build penuh dari DB (blocking, jalankan di thread). Hanya shard yang isinya berubah di-upload.
+    """
+    with _build_lock:
+        books = _fetch_all_books()
+        _state.shards = {}
+        for row in books:
+            _state.put_book(row)
+        _state.genres = _fetch_genres()
+        _state.payment_methods = _fetch_payment_methods()
+        _state.loaded = True
+        return _publish(None, lists_dirty=True)
+
+
+def _apply(todo: Dict[str, Set[int]]) -> Dict[str, Any]:
+    # shard yang terkena dibaca ulang utuh dari primary, bukan dari _state proses ini:
+    # baris lain di shard yang sama bisa sudah diubah (dan diterbitkan) instance lain
+    size = _shard_size()
+    dirty: Set[int] = {book_id // size for book_id in todo["buku"]}
+    for entity, col in (("penulis", "id_penulis"), ("genre", "id_genre")):
+        if todo[entity]:
+            ids = sorted(todo[entity])
+            res = supabase.table("buku").select("id_buku").in_(col, ids).execute()
+            dirty.update(int(r["id_buku"]) // size for r in res.data or [])
+    for k in dirty:
+        _state.shards[k] = {int(r["id_buku"]): r for r in _fetch_shard(k)}
+
+    lists_dirty = False
+    if todo["genre"]:
+        _state.genres = _fetch_genres()
+        lists_dirty = True
+    if todo["jenis_pembayaran"]:
+        _state.payment_methods = _fetch_payment_methods()
+        lists_dirty = True
+    return _publish(dirty, lists_dirty)
+
+
+# ===========================
+# UPDATE INCREMENTAL (catalog_events)
+# ===========================
+_pending: Dict[str, Set[int]] = {"buku": set(), "penulis": set(), "genre": set(), "jenis_pembayaran": set()}
+_pending_full = False
+_drain_scheduled = False
+
+
+def _drain() -> None:
+    global _pending_full, _drain_scheduled
+    with _pending_lock:
+        todo = {k: set(v) for k, v in _pending.items()}
+        full = _pending_full
+        for v in _pending.values():
+            v.clear()
+        _pending_full = False
+        _drain_scheduled = False
+
+    try:
+        if full or not _state.loaded:
+            # instance baru (mis. cold start serverless) belum punya state -> build penuh
+            rebuild()
+            return
+        with _build_lock:
+            _apply(todo)
+    except Exception:
+        logger.exception("Gagal memperbarui snapshot katalog")
+        with _pending_lock:
+            _pending_full = True
+
+
+def _on_catalog_changed(entity: str, ids: Optional[List[int]]) -> None:
+    global _pending_full, _drain_scheduled
+    if not settings.CATALOG_SNAPSHOT_ENABLED or entity not in _pending:
+        return
+    with _pending_lock:
+        if ids is None:
+            _pending_full = True
+        else:
+            _pending[entity].update(int(i) for i in ids if i is not None)
+        if _drain_scheduled:
+            return
+        _drain_scheduled = True
+    get_io_executor().submit(_drain)
+
+
+catalog_events.subscribe(_on_catalog_changed)
+
+
+# ===========================
+# READ
+# ===========================
+_manifest_lock = threading.Lock()
+
+
+def current_manifest() -> Optional[Dict[str, Any]]:
+    """
+    Manifest terakhir dari memory; dibaca ulang dari storage tiap MANIFEST_MAX_AGE detik
+    (instance lain bisa saja yang menerbitkan versi baru). Blocking -> jalankan di thread.
+    """
+    max_age = settings.CATALOG_SNAPSHOT_MANIFEST_MAX_AGE
+    if time.time() - _state.manifest_checked_at > max_age:
+        with _manifest_lock:
+            if time.time() - _state.manifest_checked_at > max_age:
+                fresh = _download_manifest()
+                _state.manifest_checked_at = time.time()
+                if fresh is not None and int(fresh.get("version", 0)) >= int((_state.manifest or {}).get("version", 0)):
+                    _state.manifest = fresh
+    return _state.manifest
+
+
+def manifest_for_client(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    # path internal storage tidak perlu dikirim ke client
+    def _strip(a: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in a.items() if k != "paths"}
+
+    out = dict(manifest)
+    out["books"] = dict(manifest["books"], shards=[_strip(s) for s in manifest["books"]["shards"]])
+    for key in ("genres", "payment_methods"):
+        if manifest.get(key):
+            out[key] = _strip(manifest[key])
+    return out
+
+
+def stats() -> Dict[str, Any]:
+    m = _state.manifest or {}
+    return {
+        "enabled": settings.CATALOG_SNAPSHOT_ENABLED,
+        "loaded": _state.loaded,
+        "version": m.get("version"),
+        "generated_at": m.get("generated_at"),
+        "books": m.get("books", {}).get("count"),
+        "shards": len(m.get("books", {}).get("shards", [])),
+        "brotli": brotli is not None,
+    }
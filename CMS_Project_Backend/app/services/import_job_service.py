@@ -1,6 +1,8 @@
 from typing import List, Dict, Any
 from app.database import supabase
 from app.services.book_import_service import import_books_from_rows
+from app.services.catalog_events import notify_changed
+from app.utils.pagination import invalidate_counts
 
 def create_job(job_type: str, filename: str, total: int) -> int:
     res = supabase.table("import_jobs").insert({
@@ -12,6 +14,7 @@ def create_job(job_type: str, filename: str, total: int) -> int:
         "failed": 0,
         "errors": []
     }).execute()
+    invalidate_counts("import_jobs")
     return res.data[0]["id"]
 
 def update_job(job_id: int, **fields):
@@ -21,8 +24,10 @@ def run_books_import_job(job_id: int, rows: List[Dict[str, Any]]):
     # set running
     update_job(job_id, status="running", total=len(rows))
 
+    # None = job gagal di tengah, id yang sudah masuk tidak diketahui -> index dibangun ulang penuh
+    changed = None
     try:
-        success, failed, errors = import_books_from_rows(rows)
+        success, failed, errors, changed = import_books_from_rows(rows)
         update_job(
             job_id,
             status="done",
@@ -32,3 +37,10 @@ def run_books_import_job(job_id: int, rows: List[Dict[str, Any]]):
         )
     except Exception as e:
         update_job(job_id, status="failed", errors=[{"error": str(e)}])
+    finally:
+        # import bisa membuat buku + genre/penulis baru (walau job gagal di tengah)
+        for entity in ("genre", "penulis", "buku"):
+            if changed is None:
+                notify_changed(entity)
+            elif changed[entity]:
+                notify_changed(entity, changed[entity])
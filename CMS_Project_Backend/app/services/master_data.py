@@ -0,0 +1,196 @@
+# app/services/master_data.py
+#
+# Registry master data (status_order, status_pembayaran, jenis_pembayaran, genre) per proses:
+# - dimuat sekali saat startup: 1 query RPC get_master_data (sql/005), fallback per tabel
+# - lookup nama <-> id O(1) dari dict
+# - versi per tabel: write path (admin create/update/toggle lewat catalog_events, seed_master_data)
+#   menaikkan versi -> tabel dimuat ulang saat dibaca berikutnya
+# - antar instance (Vercel) tidak saling invalidasi: dimuat ulang tiap MASTER_DATA_TTL_SECONDS
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.database import run_read
+from app.services import catalog_events
+
+logger = logging.getLogger(__name__)
+
+# tabel -> (primary key, kolom nama, urutan (kolom, desc))
+TABLES: Dict[str, Tuple[str, str, Tuple[str, bool]]] = {
+    "status_order": ("id_status_order", "nama_status", ("urutan_status", False)),
+    "status_pembayaran": ("id_status_pembayaran", "nama_status", ("id_status_pembayaran", False)),
+    "jenis_pembayaran": ("id_jenis_pembayaran", "nama_pembayaran", ("id_jenis_pembayaran", False)),
+    "genre": ("id_genre", "nama_genre", ("nama_genre", False)),
+}
+
+
+def _norm(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+
+class _Table:
+    __slots__ = ("rows", "by_id", "by_name", "version", "loaded_at")
+
+    def __init__(self, entity: str, rows: List[Dict[str, Any]], version: int) -> None:
+        pk, name_col, _ = TABLES[entity]
+        self.rows = rows
+        self.by_id: Dict[int, Dict[str, Any]] = {int(r[pk]): r for r in rows}
+        self.by_name: Dict[str, int] = {}
+        for r in rows:
+            # nama dobel: id pertama menurut urutan tabel yang dipakai
+            self.by_name.setdefault(_norm(r.get(name_col)), int(r[pk]))
+        self.version = version
+        self.loaded_at = time.time()
+
+
+_tables: Dict[str, _Table] = {}
+_versions: Dict[str, int] = {entity: 0 for entity in TABLES}
+_version = 0  # versi gabungan, naik tiap ada tabel yang berubah
+_lock = threading.Lock()
+_load_lock = threading.Lock()
+
+
+def _fetch(entity: str) -> List[Dict[str, Any]]:
+    _, _, (order_col, desc) = TABLES[entity]
+    res = run_read(lambda db: db.table(entity).select("*").order(order_col, desc=desc))
+    return res.data or []
+
+
+def _fetch_all() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    try:
+        res = run_read(lambda db: db.rpc("get_master_data", {}))
+    except Exception as e:
+        # migration sql/005 belum dipasang -> dimuat per tabel
+        logger.warning("get_master_data tidak tersedia (%s), master data dimuat per tabel", e)
+        return None
+    data = res.data
+    if isinstance(data, list):
+        data = data[0] if data else {}
+    return data if isinstance(data, dict) else None
+
+
+def _load(entity: str) -> _Table:
+    with _load_lock:
+        table = _tables.get(entity)
+        if table is not None and not _is_stale(entity, table):
+            return table
+        version = _versions[entity]
+        table = _Table(entity, _fetch(entity), version)
+        with _lock:
+            _tables[entity] = table
+        return table
+
+
+def _is_stale(entity: str, table: _Table) -> bool:
+    if table.version != _versions[entity]:
+        return True
+    ttl = settings.MASTER_DATA_TTL_SECONDS
+    return ttl > 0 and time.time() - table.loaded_at > ttl
+
+
+def _table(entity: str) -> _Table:
+    if entity not in TABLES:
+        raise KeyError(f"Master data tidak dikenal: {entity}")
+    table = _tables.get(entity)
+    if table is None or _is_stale(entity, table):
+        # blocking (query DB), dari endpoint async jalankan lewat run_io
+        table = _load(entity)
+    return table
+
+
+# ===========================
+# API
+# ===========================
+def warmup() -> Dict[str, Any]:
+    """
+    Muat semua tabel master (startup / self-check seed). Gagal 1 tabel tidak menggagalkan yang lain.
+    """
+    started = time.perf_counter()
+    with _load_lock:
+        versions = dict(_versions)
+        data = _fetch_all()
+        if data is not None:
+            with _lock:
+                for entity in TABLES:
+                    _tables[entity] = _Table(entity, data.get(entity) or [], versions[entity])
+    if data is None:
+        for entity in TABLES:
+            try:
+                _load(entity)
+            except Exception as e:
+                logger.warning("Master data %s gagal dimuat (%s), dicoba lagi saat dipakai", entity, e)
+    logger.info("Master data dimuat dalam %.3fs", time.perf_counter() - started)
+    return stats()
+
+
+def rows(entity: str) -> List[Dict[str, Any]]:
+    """
+    Semua baris tabel (urut sesuai TABLES). Jangan diubah: list dipakai bersama.
+    """
+    return _table(entity).rows
+
+
+def get(entity: str, id_: int) -> Optional[Dict[str, Any]]:
+    return _table(entity).by_id.get(int(id_))
+
+
+def get_id(entity: str, name: str) -> Optional[int]:
+    return _table(entity).by_name.get(_norm(name))
+
+
+def get_name(entity: str, id_: int) -> Optional[str]:
+    row = get(entity, id_)
+    return row.get(TABLES[entity][1]) if row else None
+
+
+def require_id(entity: str, name: str) -> int:
+    id_ = get_id(entity, name)
+    if id_ is None:
+        label = entity.replace("_", " ").capitalize()
+        raise ValueError(f"{label} '{name}' tidak ditemukan. Jalankan /admin/seed dulu.")
+    return id_
+
+
+def version() -> int:
+    return _version
+
+
+def invalidate(entity: Optional[str] = None) -> int:
+    """
+    Naikkan versi (entity=None -> semua tabel). Return versi gabungan baru.
+    """
+    global _version
+    with _lock:
+        for e in [entity] if entity else list(TABLES):
+            if e in _versions:
+                _versions[e] += 1
+        _version += 1
+        return _version
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "version": _version,
+            "ttl_seconds": settings.MASTER_DATA_TTL_SECONDS,
+            "tables": {
+                entity: {
+                    "rows": len(t.rows),
+                    "version": t.version,
+                    "stale": t.version != _versions[entity],
+                    "age_seconds": round(time.time() - t.loaded_at, 1),
+                }
+                for entity, t in _tables.items()
+            },
+        }
+
+
+def _on_catalog_changed(entity: str, ids: Optional[List[int]]) -> None:
+    if entity in TABLES:
+        invalidate(entity)
+
+
+catalog_events.subscribe(_on_catalog_changed)
@@ -0,0 +1,352 @@
+# app/services/related_books.py
+#
+# "Sering dibeli bersama" untuk /books/{id}/related, semua dari memory:
+# - matriks co-purchase sparse: per buku hanya tetangga top-N (RELATED_MAX_NEIGHBORS),
+#   disimpan sebagai 2 array (id_buku, jumlah order) terurut jumlah terbanyak
+# - dibangun dari RPC book_copurchase_pairs (sql/004), fallback scan order_item
+# - order baru (create_order_atomic) langsung ditambahkan ke delta -> tidak dihitung ulang per request
+# - data kurang (jumlah < RELATED_MIN_SUPPORT) -> diisi buku penulis sama, lalu genre sama
+# - build penuh ulang tiap RELATED_MAX_AGE_SECONDS (order dibatalkan ikut terkoreksi)
+# - daftar fallback dibangun ulang dari sinyal search_index.subscribe_applied (setelah update
+#   search index selesai, bukan saat catalog_events masuk)
+
+import heapq
+import logging
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.database import run_read
+from app.services import search_index
+from app.utils.executors import get_io_executor
+
+logger = logging.getLogger(__name__)
+
+# order dengan item sangat banyak (grosir) tidak mencerminkan "dibeli bersama"
+_MAX_BASKET = 50
+_EMPTY = array("I")
+
+
+def _by_newest(ids: Iterable[int]) -> array:
+    return array("I", sorted(ids, reverse=True))
+
+
+def _fallback_lists(cards: List[Dict[str, Any]]) -> Tuple[Dict[int, array], Dict[int, array]]:
+    # daftar fallback: buku per penulis / genre, terbaru dulu
+    by_penulis: Dict[int, List[int]] = defaultdict(list)
+    by_genre: Dict[int, List[int]] = defaultdict(list)
+    for c in cards:
+        if c["id_penulis"] is not None:
+            by_penulis[c["id_penulis"]].append(c["id_buku"])
+        if c["id_genre"] is not None:
+            by_genre[c["id_genre"]].append(c["id_buku"])
+    return (
+        {k: _by_newest(v) for k, v in by_penulis.items()},
+        {k: _by_newest(v) for k, v in by_genre.items()},
+    )
+
+
+class RelatedIndex:
+    def __init__(
+        self,
+        pairs: Iterable[Tuple[int, int, int]],
+        cards: List[Dict[str, Any]],
+        source: str,
+        generation: int = 0,
+    ) -> None:
+        adjacency: Dict[int, Dict[int, int]] = defaultdict(dict)
+        n_pairs = 0
+        for a, b, n in pairs:
+            adjacency[a][b] = n
+            adjacency[b][a] = n
+            n_pairs += 1
+
+        keep = max(1, settings.RELATED_MAX_NEIGHBORS)
+        self._neighbors: Dict[int, Tuple[array, array]] = {}
+        for a, row in adjacency.items():
+            top = heapq.nsmallest(keep, row.items(), key=lambda kv: (-kv[1], -kv[0]))
+            self._neighbors[a] = (array("I", (b for b, _ in top)), array("I", (n for _, n in top)))
+        # order sejak build: id -> {id: jumlah}
+        self._delta: Dict[int, Dict[int, int]] = defaultdict(dict)
+        self.set_catalog(_fallback_lists(cards), generation)
+
+        self.pairs = n_pairs
+        self.source = source
+        self.orders_recorded = 0
+        self.built_at = time.time()
+        self.build_seconds: Optional[float] = None
+
+    def set_catalog(self, lists: Tuple[Dict[int, array], Dict[int, array]], generation: int) -> None:
+        self._by_penulis, self._by_genre = lists
+        # search_index.generation() saat cards() dibaca
+        self.catalog_generation = generation
+        self.catalog_refreshed_at = time.time()
+
+    def add_basket(self, ids: List[int]) -> None:
+        for a in ids:
+            row = self._delta[a]
+            for b in ids:
+                if b != a:
+                    row[b] = row.get(b, 0) + 1
+        self.orders_recorded += 1
+
+    def co_purchased(self, id_buku: int) -> List[Tuple[int, int]]:
+        """
+        [(id_buku, jumlah order)] terurut terbanyak, gabungan hasil build + delta.
+        """
+        ids, counts = self._neighbors.get(id_buku, (_EMPTY, _EMPTY))
+        delta = self._delta.get(id_buku)
+        if not delta:
+            return list(zip(ids, counts))
+        scores = dict(zip(ids, counts))
+        for b, n in delta.items():
+            scores[b] = scores.get(b, 0) + n
+        return sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))
+
+    def related(self, card: Dict[str, Any], limit: int) -> Tuple[List[Dict[str, Any]], str]:
+        id_buku = card["id_buku"]
+        seen = {id_buku}
+        out: List[Dict[str, Any]] = []
+        min_support = max(1, settings.RELATED_MIN_SUPPORT)
+
+        for b, n in self.co_purchased(id_buku):
+            if n < min_support or len(out) >= limit:
+                break
+            other = search_index.card(b)
+            if other is not None:
+                seen.add(b)
+                out.append(dict(other, score=n, alasan="dibeli_bersama"))
+        from_copurchase = len(out)
+
+        for table, key, alasan in (
+            (self._by_penulis, card["id_penulis"], "penulis_sama"),
+            (self._by_genre, card["id_genre"], "genre_sama"),
+        ):
+            for b in table.get(key, _EMPTY) if key is not None else _EMPTY:
+                if len(out) >= limit:
+                    break
+                if b in seen:
+                    continue
+                other = search_index.card(b)
+                if other is not None:
+                    seen.add(b)
+                    out.append(dict(other, score=0, alasan=alasan))
+
+        if from_copurchase == len(out):
+            source = "copurchase"
+        else:
+            source = "mixed" if from_copurchase else "fallback"
+        return out, source
+
+    def stats(self) -> Dict[str, Any]:
+        entries = sum(len(ids) for ids, _ in self._neighbors.values())
+        return {
+            "source": self.source,
+            "pairs": self.pairs,
+            "books_with_neighbors": len(self._neighbors),
+            "neighbor_entries": entries,
+            "neighbor_bytes": sum(ids.itemsize * len(ids) * 2 for ids, _ in self._neighbors.values()),
+            "delta_entries": sum(len(r) for r in self._delta.values()),
+            "orders_recorded": self.orders_recorded,
+            "fallback_penulis": len(self._by_penulis),
+            "fallback_genre": len(self._by_genre),
+            "catalog_refreshed_at": self.catalog_refreshed_at,
+            "catalog_generation": self.catalog_generation,
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+        }
+
+
+# ===========================
+# BUILD
+# ===========================
+def _pairs_from_rpc() -> List[Tuple[int, int, int]]:
+    res = run_read(lambda db: db.rpc("book_copurchase_pairs", {"p_min_count": 1}))
+    data = res.data or []
+    return [(int(a), int(b), int(n)) for a, b, n in data]
+
+
+def _pairs_from_order_item() -> List[Tuple[int, int, int]]:
+    # tanpa RPC: keyset order_item, status order tidak bisa difilter (order dibatalkan ikut terhitung)
+    baskets: Dict[int, set] = defaultdict(set)
+    last_id = 0
+    page_size = max(100, settings.SEARCH_INDEX_PAGE_SIZE)
+    while True:
+        res = run_read(
+            lambda db: db.table("order_item")
+            .select("id_order_item, id_order, id_buku")
+            .gt("id_order_item", last_id)
+            .order("id_order_item")
+            .limit(page_size)
+        )
+        chunk = res.data or []
+        for r in chunk:
+            baskets[int(r["id_order"])].add(int(r["id_buku"]))
+        if len(chunk) < page_size:
+            break
+        last_id = int(chunk[-1]["id_order_item"])
+
+    counts: Dict[Tuple[int, int], int] = defaultdict(int)
+    for items in baskets.values():
+        ids = sorted(items)[:_MAX_BASKET]
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                counts[(a, b)] += 1
+    return [(a, b, n) for (a, b), n in counts.items()]
+
+
+def _build_index() -> RelatedIndex:
+    started = time.perf_counter()
+    search_index.ensure_ready()
+    try:
+        pairs, source = _pairs_from_rpc(), "rpc"
+    except Exception as e:
+        logger.warning("book_copurchase_pairs tidak tersedia (%s), co-purchase dihitung dari order_item", e)
+        pairs, source = _pairs_from_order_item(), "order_item"
+    generation = search_index.generation()
+    index = RelatedIndex(pairs, search_index.cards(), source, generation)
+    index.build_seconds = round(time.perf_counter() - started, 3)
+    return index
+
+
+_index: Optional[RelatedIndex] = None
+_build_lock = threading.Lock()
+_state_lock = threading.Lock()
+# order yang masuk selama build berjalan -> diterapkan ulang ke index baru
+_replay: Optional[List[List[int]]] = None
+_rebuild_scheduled = False
+
+
+def _catalog_stale(index: RelatedIndex) -> bool:
+    return index.catalog_generation != search_index.generation()
+
+
+def rebuild(if_missing: bool = False) -> Dict[str, Any]:
+    global _index, _replay
+    with _build_lock:
+        if if_missing and _index is not None:
+            return _index.stats()
+        with _state_lock:
+            _replay = []
+        try:
+            index = _build_index()
+        except Exception:
+            with _state_lock:
+                _replay = None
+            raise
+        with _state_lock:
+            # order yang commit tepat saat RPC berjalan bisa terhitung 2x; terkoreksi di build berikutnya
+            for ids in _replay:
+                index.add_basket(ids)
+            _replay = None
+            _index = index
+        logger.info("Related index dibangun: %s pasangan (%s) dalam %ss", index.pairs, index.source, index.build_seconds)
+        return index.stats()
+
+
+def ensure_ready() -> None:
+    # blocking, jalankan di thread
+    if _index is None:
+        rebuild(if_missing=True)
+
+
+def _refresh_catalog() -> None:
+    # hanya daftar fallback (dari memory search_index), matriks co-purchase tidak disentuh
+    index = _index
+    if index is None:
+        return
+    generation = search_index.generation()
+    lists = _fallback_lists(search_index.cards())
+    with _state_lock:
+        index.set_catalog(lists, generation)
+
+
+def _safe_background(fn) -> None:
+    global _rebuild_scheduled
+    try:
+        fn()
+    except Exception:
+        logger.exception("Gagal memperbarui related index")
+    finally:
+        with _state_lock:
+            _rebuild_scheduled = False
+
+
+def refresh_if_needed() -> None:
+    """
+    Index lama tetap dipakai; di background:
+    - melewati RELATED_MAX_AGE_SECONDS -> build penuh (RPC)
+    - katalog berubah -> daftar fallback penulis/genre saja
+    """
+    global _rebuild_scheduled
+    index = _index
+    if index is None:
+        return
+    max_age = settings.RELATED_MAX_AGE_SECONDS
+    too_old = max_age > 0 and time.time() - index.built_at > max_age
+    with _state_lock:
+        if not (_catalog_stale(index) or too_old) or _rebuild_scheduled:
+            return
+        _rebuild_scheduled = True
+    get_io_executor().submit(_safe_background, rebuild if too_old else _refresh_catalog)
+
+
+def record_order(id_buku_list: Iterable[int]) -> None:
+    """
+    Dipanggil setelah create_order_atomic sukses: pasangan buku di order ini +1.
+    """
+    ids = list(dict.fromkeys(int(i) for i in id_buku_list))[:_MAX_BASKET]
+    if len(ids) < 2:
+        return
+    with _state_lock:
+        if _index is not None:
+            _index.add_basket(ids)
+        if _replay is not None:
+            _replay.append(ids)
+
+
+def related(id_buku: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+    """
+    None = buku tidak ada / nonaktif.
+    """
+    card = search_index.card(id_buku)
+    if card is None:
+        return None
+    index = _index
+    if index is None:
+        return [], "fallback"
+    with _state_lock:
+        return index.related(card, limit)
+
+
+def age_seconds() -> Optional[float]:
+    index = _index
+    return round(time.time() - index.built_at, 1) if index else None
+
+
+def stats() -> Dict[str, Any]:
+    index = _index
+    return {
+        "ready": index is not None,
+        "catalog_dirty": _catalog_stale(index) if index else False,
+        **(index.stats() if index else {}),
+    }
+
+
+def _on_search_applied(generation: int) -> None:
+    # search index sudah memuat perubahan -> daftar fallback dibangun ulang di background
+    global _rebuild_scheduled
+    index = _index
+    if index is None or index.catalog_generation == generation:
+        return
+    with _state_lock:
+        if _rebuild_scheduled:
+            return
+        _rebuild_scheduled = True
+    get_io_executor().submit(_safe_background, _refresh_catalog)
+
+
+search_index.subscribe_applied(_on_search_applied)
@@ -0,0 +1,706 @@
+# app/services/search_index.py
+#
+# Inverted index in-memory untuk buku aktif (judul, isbn, penulis, genre) -> /books/search.
+# - posting list: array('I') terurut berisi id_buku (4 byte per entry)
+# - vocabulary: list term terurut -> prefix match via bisect (typeahead)
+# - build penuh saat startup / kalau sudah tua; perubahan dari catalog_events diterapkan
+#   incremental di thread I/O (refetch id yang berubah saja)
+# - facet (genre, penulis, bucket harga, stok) seluruh katalog disimpan sebagai counter
+#   yang ikut di-update tiap upsert/remove -> /books/facets tanpa query count
+# - index turunan (suggest, related) membaca cards() dari sini: pakai generation() / subscribe_applied(),
+#   bukan catalog_events langsung (event datang sebelum update index ini selesai)
+
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.database import run_read, supabase
+from app.services import catalog_events
+from app.utils.executors import get_io_executor
+
+logger = logging.getLogger(__name__)
+
+_SELECT = (
+    "id_buku, judul, isbn, harga, stok, cover_image, id_genre, id_penulis, created_at, "
+    "penulis(nama_penulis), genre(nama_genre)"
+)
+
+# ===========================
+# TOKENIZER (Bahasa Indonesia)
+# ===========================
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+_STOPWORDS = frozenset(
+    """
+    yang dan di ke dari untuk dengan ini itu pada dalam adalah atau oleh sebagai akan juga
+    tidak bagi para tentang serta karena agar sudah telah bisa dapat ada the of and a an
+    """.split()
+)
+
+_PARTICLES = ("lah", "kah", "tah", "pun")
+_POSSESSIVES = ("nya", "ku", "mu")
+_SUFFIXES = ("kan", "an", "i")
+_VOWELS = "aiueo"
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def _strip_prefix(word: str) -> str:
+    # versi ringkas aturan Nazief-Adriani (dengan recoding huruf awal yang luluh)
+    for pre in ("di", "ter", "ber", "ke", "se"):
+        if word.startswith(pre) and len(word) - len(pre) >= 4:
+            return word[len(pre):]
+    for base in ("me", "pe"):
+        if not word.startswith(base):
+            continue
+        rest = word[2:]
+        if rest.startswith("ny") and len(rest) >= 5:
+            return "s" + rest[2:]
+        if rest.startswith("ng") and len(rest) >= 5:
+            return rest[2:]
+        if rest.startswith("m") and len(rest) >= 5:
+            return ("p" + rest[1:]) if rest[1] in _VOWELS else rest[1:]
+        if rest.startswith("n") and len(rest) >= 5:
+            return ("t" + rest[1:]) if rest[1] in _VOWELS else rest[1:]
+        if base == "pe" and rest.startswith("r") and len(rest) >= 5:
+            return rest[1:]
+        if rest and rest[0] in "lrwy" and len(rest) >= 4:
+            return rest
+    return word
+
+
+def stem(word: str) -> str:
+    if len(word) <= 4 or word.isdigit():
+        return word
+    for suf in _PARTICLES:
+        if word.endswith(suf) and len(word) - len(suf) >= 4:
+            word = word[: -len(suf)]
+            break
+    for suf in _POSSESSIVES:
+        if word.endswith(suf) and len(word) - len(suf) >= 4:
+            word = word[: -len(suf)]
+            break
+    for suf in _SUFFIXES:
+        if word.endswith(suf) and len(word) - len(suf) >= 4:
+            word = word[: -len(suf)]
+            break
+    return _strip_prefix(word)
+
+
+def words(text: Optional[str]) -> List[str]:
+    # kata ter-fold apa adanya (tanpa buang stopword) -> dipakai juga oleh suggest_index
+    return _TOKEN_RE.findall(_fold(text or ""))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [t for t in words(text) if t not in _STOPWORDS]
+
+
+def _index_terms(tokens: Iterable[str]) -> Set[str]:
+    # simpan bentuk asli (untuk prefix) + stem (supaya "membaca" ketemu "baca")
+    # intern: string term yang sama dipakai bersama oleh semua dokumen + vocabulary
+    out: Set[str] = set()
+    for t in tokens:
+        out.add(sys.intern(t))
+        s = stem(t)
+        if s != t:
+            out.add(sys.intern(s))
+    return out
+
+
+# ===========================
+# DOKUMEN
+# ===========================
+class _Doc:
+    __slots__ = ("card", "terms", "title_terms")
+
+    # tuple (bukan frozenset): jauh lebih kecil per dokumen, cukup untuk iterasi / cek kecil
+    def __init__(self, card: Dict[str, Any], terms: Tuple[str, ...], title_terms: Tuple[str, ...]):
+        self.card = card
+        self.terms = terms
+        self.title_terms = title_terms
+
+
+def _to_doc(row: Dict[str, Any]) -> _Doc:
+    penulis = row.get("penulis") or {}
+    genre = row.get("genre") or {}
+    nama_penulis = penulis.get("nama_penulis")
+    nama_genre = genre.get("nama_genre")
+
+    title_terms = _index_terms(tokenize(row.get("judul")))
+    terms = set(title_terms)
+    terms |= _index_terms(tokenize(nama_penulis))
+    terms |= _index_terms(tokenize(nama_genre))
+    isbn = re.sub(r"[^0-9xX]", "", row.get("isbn") or "").lower()
+    if isbn:
+        terms.add(sys.intern(isbn))
+
+    card = {
+        "id_buku": int(row["id_buku"]),
+        "judul": row.get("judul"),
+        "isbn": row.get("isbn"),
+        "harga": row.get("harga"),
+        "stok": row.get("stok"),
+        "cover_image": row.get("cover_image"),
+        "id_genre": row.get("id_genre"),
+        "id_penulis": row.get("id_penulis"),
+        "nama_penulis": nama_penulis,
+        "nama_genre": nama_genre,
+        "created_at": row.get("created_at"),
+    }
+    return _Doc(card, tuple(sorted(terms)), tuple(sorted(title_terms)))
+
+
+# ===========================
+# FACET COUNTER
+# ===========================
+def _parse_price_bounds(raw: str) -> List[float]:
+    bounds = set()
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            bounds.add(float(part))
+        except ValueError:
+            logger.warning("BOOK_FACET_PRICE_BUCKETS: nilai %r diabaikan", part)
+    return sorted(b for b in bounds if b > 0)
+
+
+_PRICE_BOUNDS = _parse_price_bounds(settings.BOOK_FACET_PRICE_BUCKETS)
+
+
+class _FacetCounts:
+    __slots__ = ("genre", "penulis", "harga", "stok", "genre_names", "penulis_names")
+
+    def __init__(self) -> None:
+        self.genre: Counter = Counter()
+        self.penulis: Counter = Counter()
+        self.harga: Counter = Counter()  # index bucket (lihat _PRICE_BOUNDS)
+        self.stok: Counter = Counter()
+        self.genre_names: Dict[int, Optional[str]] = {}
+        self.penulis_names: Dict[int, Optional[str]] = {}
+
+    @staticmethod
+    def _bump(counter: Counter, key: Any, delta: int) -> None:
+        n = counter[key] + delta
+        if n > 0:
+            counter[key] = n
+        else:
+            del counter[key]
+
+    def add(self, card: Dict[str, Any], delta: int = 1) -> None:
+        if card["id_genre"] is not None:
+            self._bump(self.genre, card["id_genre"], delta)
+            if delta > 0:
+                self.genre_names[card["id_genre"]] = card["nama_genre"]
+        if card["id_penulis"] is not None:
+            self._bump(self.penulis, card["id_penulis"], delta)
+            if delta > 0:
+                self.penulis_names[card["id_penulis"]] = card["nama_penulis"]
+        self._bump(self.harga, bisect_right(_PRICE_BOUNDS, float(card["harga"] or 0)), delta)
+        self._bump(self.stok, int(card["stok"] or 0) > 0, delta)
+
+    def as_dict(self, names: "_FacetCounts", top: int) -> Dict[str, Any]:
+        # names: counter global (nama terbaru per id), dipakai juga untuk hasil scan
+        def _top(counter: Counter, id_key: str, name_key: str, lookup: Dict[int, Optional[str]]):
+            items = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
+            if top > 0:
+                items = items[:top]
+            return [{id_key: k, name_key: lookup.get(k), "count": n} for k, n in items]
+
+        edges = [0.0] + _PRICE_BOUNDS
+        return {
+            "total": self.stok[True] + self.stok[False],
+            "genre": _top(self.genre, "id_genre", "nama_genre", names.genre_names),
+            "penulis": _top(self.penulis, "id_penulis", "nama_penulis", names.penulis_names),
+            "harga": [
+                {
+                    "min": edges[i],
+                    "max": _PRICE_BOUNDS[i] if i < len(_PRICE_BOUNDS) else None,
+                    "count": self.harga[i],
+                }
+                for i in range(len(edges))
+            ],
+            "stok": {"in_stock": self.stok[True], "out_of_stock": self.stok[False]},
+        }
+
+
+def _passes_filters(
+    card: Dict[str, Any],
+    genre_id: Optional[int],
+    id_penulis: Optional[int],
+    min_harga: Optional[float],
+    max_harga: Optional[float],
+    in_stock: bool,
+) -> bool:
+    if genre_id is not None and card["id_genre"] != genre_id:
+        return False
+    if id_penulis is not None and card["id_penulis"] != id_penulis:
+        return False
+    harga = float(card["harga"] or 0)
+    if min_harga is not None and harga < min_harga:
+        return False
+    if max_harga is not None and harga > max_harga:
+        return False
+    if in_stock and int(card["stok"] or 0) <= 0:
+        return False
+    return True
+
+
+# ===========================
+# INDEX
+# ===========================
+class SearchIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._docs: Dict[int, _Doc] = {}
+        self._facets = _FacetCounts()
+        self._postings: Dict[str, array] = {}
+        self._vocab: List[str] = []
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self.incremental_updates = 0
+
+    # ---------- build / update ----------
+    def replace_all(self, rows: Iterable[Dict[str, Any]]) -> None:
+        docs: Dict[int, _Doc] = {}
+        buckets: Dict[str, List[int]] = {}
+        for row in rows:
+            doc = _to_doc(row)
+            doc_id = doc.card["id_buku"]
+            docs[doc_id] = doc
+            for term in doc.terms:
+                buckets.setdefault(term, []).append(doc_id)
+
+        postings = {term: array("I", sorted(ids)) for term, ids in buckets.items()}
+        vocab = sorted(postings)
+        facets = _FacetCounts()
+        for doc in docs.values():
+            facets.add(doc.card)
+        with self._lock:
+            self._docs, self._postings, self._vocab, self._facets = docs, postings, vocab, facets
+
+    def _remove_locked(self, doc_id: int) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._facets.add(doc.card, -1)
+        for term in doc.terms:
+            plist = self._postings.get(term)
+            if plist is None:
+                continue
+            i = bisect_left(plist, doc_id)
+            if i < len(plist) and plist[i] == doc_id:
+                del plist[i]
+            if not plist:
+                del self._postings[term]
+                j = bisect_left(self._vocab, term)
+                if j < len(self._vocab) and self._vocab[j] == term:
+                    del self._vocab[j]
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        doc = _to_doc(row)
+        doc_id = doc.card["id_buku"]
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._docs[doc_id] = doc
+            self._facets.add(doc.card)
+            for term in doc.terms:
+                plist = self._postings.get(term)
+                if plist is None:
+                    self._postings[term] = array("I", [doc_id])
+                    insort(self._vocab, term)
+                else:
+                    insort(plist, doc_id)
+            self.incremental_updates += 1
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove_locked(int(doc_id))
+            self.incremental_updates += 1
+
+    # ---------- query ----------
+    def _prefix_terms(self, prefix: str, max_terms: int) -> List[str]:
+        i = bisect_left(self._vocab, prefix)
+        out: List[str] = []
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix) and len(out) < max_terms:
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def _ids_for(self, terms: Iterable[str]) -> Set[int]:
+        ids: Set[int] = set()
+        for term in terms:
+            plist = self._postings.get(term)
+            if plist is not None:
+                ids.update(plist)
+        return ids
+
+    def _match_locked(self, tokens: List[str]) -> Tuple[List[Set[str]], Set[int]]:
+        # alternatif per kata: kata utuh + stem, kata terakhir + semua term berawalan itu
+        groups: List[Set[str]] = []
+        for i, tok in enumerate(tokens):
+            alts = {tok, stem(tok)}
+            if i == len(tokens) - 1:
+                alts.update(self._prefix_terms(tok, settings.SEARCH_INDEX_MAX_PREFIX_TERMS))
+            groups.append(alts)
+
+        # mulai dari grup dengan posting paling sedikit
+        candidate_sets = sorted((self._ids_for(g) for g in groups), key=len)
+        matched = candidate_sets[0]
+        for s in candidate_sets[1:]:
+            if not matched:
+                break
+            matched = matched & s
+        return groups, matched
+
+    def facets(
+        self,
+        q: Optional[str] = None,
+        *,
+        genre_id: Optional[int] = None,
+        id_penulis: Optional[int] = None,
+        min_harga: Optional[float] = None,
+        max_harga: Optional[float] = None,
+        in_stock: bool = False,
+        top: int = 20,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Tanpa q/filter -> counter precomputed (O(jumlah nilai facet)).
+        Dengan q/filter -> hitung dari hasil match index (tanpa query DB).
+        Return (facets, sumber: "precomputed" | "scan").
+        """
+        has_query = bool(q and q.strip())
+        has_filter = (
+            genre_id is not None
+            or id_penulis is not None
+            or min_harga is not None
+            or max_harga is not None
+            or in_stock
+        )
+        with self._lock:
+            if not has_query and not has_filter:
+                return self._facets.as_dict(self._facets, top), "precomputed"
+
+            if has_query:
+                tokens = tokenize(q)
+                ids: Iterable[int] = self._match_locked(tokens)[1] if tokens else ()
+            else:
+                ids = self._docs.keys()
+            counts = _FacetCounts()
+            for doc_id in ids:
+                doc = self._docs.get(doc_id)
+                if doc is not None and _passes_filters(doc.card, genre_id, id_penulis, min_harga, max_harga, in_stock):
+                    counts.add(doc.card)
+            return counts.as_dict(self._facets, top), "scan"
+
+    def search(
+        self,
+        q: str,
+        *,
+        genre_id: Optional[int] = None,
+        id_penulis: Optional[int] = None,
+        min_harga: Optional[float] = None,
+        max_harga: Optional[float] = None,
+        in_stock: bool = False,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Semua kata harus cocok (AND). Kata terakhir = prefix (typeahead), kata lain = kata utuh/stem.
+        Skor: kata di judul 3, di penulis/genre/isbn 1; seri -> id_buku terbaru dulu.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            groups, matched = self._match_locked(tokens)
+            scored: List[Tuple[int, int, Dict[str, Any]]] = []
+            for doc_id in matched:
+                doc = self._docs.get(doc_id)
+                if doc is None:
+                    continue
+                card = doc.card
+                if not _passes_filters(card, genre_id, id_penulis, min_harga, max_harga, in_stock):
+                    continue
+                score = sum(3 if any(t in g for t in doc.title_terms) else 1 for g in groups)
+                scored.append((score, doc_id, card))
+
+        scored.sort(key=lambda x: (-x[0], -x[1]))
+        total = len(scored)
+        page = scored[offset: offset + limit]
+        return [dict(card, score=score) for score, _, card in page], total
+
+    def cards(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [d.card for d in self._docs.values()]
+
+    def card(self, doc_id: int) -> Optional[Dict[str, Any]]:
+        doc = self._docs.get(doc_id)
+        return doc.card if doc is not None else None
+
+    # ---------- stats ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            postings_bytes = sum(sys.getsizeof(p) for p in self._postings.values())
+            postings_entries = sum(len(p) for p in self._postings.values())
+            vocab_bytes = sys.getsizeof(self._vocab) + sum(sys.getsizeof(t) for t in self._vocab)
+            dict_bytes = sys.getsizeof(self._postings) + sys.getsizeof(self._docs)
+            # objek yang dipakai bersama (None, int kecil, string term) dihitung sekali
+            seen: Set[int] = set()
+            docs_bytes = 0
+            for d in self._docs.values():
+                for obj in (d, d.card, d.terms, d.title_terms, *d.card.values()):
+                    if id(obj) not in seen:
+                        seen.add(id(obj))
+                        docs_bytes += sys.getsizeof(obj)
+            return {
+                "docs": len(self._docs),
+                "terms": len(self._vocab),
+                "postings": postings_entries,
+                "memory_bytes": {
+                    "postings": postings_bytes,
+                    "vocabulary": vocab_bytes,
+                    "docs": docs_bytes,
+                    "dicts": dict_bytes,
+                    "total": postings_bytes + vocab_bytes + docs_bytes + dict_bytes,
+                },
+                "built_at": self.built_at,
+                "age_seconds": round(time.time() - self.built_at, 1) if self.built_at else None,
+                "build_seconds": self.build_seconds,
+                "incremental_updates": self.incremental_updates,
+            }
+
+
+_index = SearchIndex()
+
+
+# ===========================
+# LOAD DARI DB
+# ===========================
+def _fetch_active_rows() -> List[Dict[str, Any]]:
+    # keyset per halaman (id_buku) supaya tidak kena batas max-rows PostgREST / OFFSET dalam
+    rows: List[Dict[str, Any]] = []
+    last_id = 0
+    page_size = max(100, settings.SEARCH_INDEX_PAGE_SIZE)
+    while True:
+        res = run_read(
+            lambda db: db.table("buku")
+            .select(_SELECT)
+            .eq("status", "aktif")
+            .gt("id_buku", last_id)
+            .order("id_buku")
+            .limit(page_size)
+        )
+        chunk = res.data or []
+        rows.extend(chunk)
+        if len(chunk) < page_size:
+            return rows
+        last_id = int(chunk[-1]["id_buku"])
+
+
+_build_lock = threading.Lock()
+_pending_lock = threading.Lock()
+
+# naik tiap build penuh / update incremental selesai diterapkan (dipanggil di dalam _build_lock)
+_generation = 0
+_applied_listeners: List[Callable[[int], None]] = []
+
+
+def generation() -> int:
+    return _generation
+
+
+def subscribe_applied(listener: Callable[[int], None]) -> Callable[[int], None]:
+    """
+    listener(generation) dipanggil setelah perubahan katalog sudah masuk index (cards() sudah baru).
+    Dipanggil sambil memegang _build_lock: cukup tandai / jadwalkan, jangan kerja berat.
+    """
+    if listener not in _applied_listeners:
+        _applied_listeners.append(listener)
+    return listener
+
+
+def _mark_applied() -> None:
+    global _generation
+    _generation += 1
+    for listener in list(_applied_listeners):
+        try:
+            listener(_generation)
+        except Exception:
+            logger.exception("Listener search_index gagal")
+
+
+def rebuild(if_missing: bool = False) -> Dict[str, Any]:
+    """
+    Build penuh (blocking, jalankan di thread). Hanya satu build berjalan sekaligus.
+    if_missing=True -> lewati kalau index sudah dibangun (request pertama yang menunggu build).
+    """
+    with _build_lock:
+        if if_missing and _index.built_at is not None:
+            return _index.stats()
+        started = time.perf_counter()
+        rows = _fetch_active_rows()
+        _index.replace_all(rows)
+        _index.build_seconds = round(time.perf_counter() - started, 3)
+        _index.built_at = time.time()
+        _mark_applied()
+        logger.info("Search index dibangun: %s buku dalam %ss", len(rows), _index.build_seconds)
+        return _index.stats()
+
+
+def is_ready() -> bool:
+    return _index.built_at is not None
+
+
+def ensure_ready() -> None:
+    """
+    Dipanggil request pertama kalau build startup belum selesai (blocking, jalankan di thread).
+    """
+    if not is_ready():
+        rebuild(if_missing=True)
+
+
+def age_seconds() -> Optional[float]:
+    return round(time.time() - _index.built_at, 1) if _index.built_at else None
+
+
+def is_stale() -> bool:
+    if _index.built_at is None:
+        return True
+    max_age = settings.SEARCH_INDEX_MAX_AGE_SECONDS
+    return max_age > 0 and (time.time() - _index.built_at) > max_age
+
+
+_rebuild_scheduled = False
+
+
+def schedule_rebuild() -> None:
+    global _rebuild_scheduled
+    with _pending_lock:
+        if _rebuild_scheduled:
+            return
+        _rebuild_scheduled = True
+    get_io_executor().submit(_safe_rebuild)
+
+
+def _safe_rebuild() -> None:
+    global _rebuild_scheduled
+    try:
+        rebuild()
+    except Exception:
+        logger.exception("Gagal membangun search index")
+    finally:
+        with _pending_lock:
+            _rebuild_scheduled = False
+
+
+def search(q: str, **kwargs) -> Tuple[List[Dict[str, Any]], int]:
+    return _index.search(q, **kwargs)
+
+
+def cards() -> List[Dict[str, Any]]:
+    """
+    Snapshot card semua buku aktif (jangan diubah; dict dipakai bersama dengan index).
+    """
+    return _index.cards()
+
+
+def card(id_buku: int) -> Optional[Dict[str, Any]]:
+    """
+    Card 1 buku aktif (None = tidak ada / nonaktif). Tanpa lock: 1 lookup dict (atomic di CPython).
+    """
+    return _index.card(id_buku)
+
+
+def facets(q: Optional[str] = None, **kwargs) -> Tuple[Dict[str, Any], str]:
+    return _index.facets(q, **kwargs)
+
+
+def stats() -> Dict[str, Any]:
+    return {"enabled": settings.SEARCH_INDEX_ENABLED, "ready": is_ready(), **_index.stats()}
+
+
+# ===========================
+# UPDATE INCREMENTAL (catalog_events)
+# ===========================
+_pending: Dict[str, Set[int]] = {"buku": set(), "penulis": set(), "genre": set()}
+_pending_full = False
+_drain_scheduled = False
+
+
+def _apply_pending() -> None:
+    global _pending_full, _drain_scheduled
+    with _pending_lock:
+        todo = {k: set(v) for k, v in _pending.items()}
+        full = _pending_full
+        for v in _pending.values():
+            v.clear()
+        _pending_full = False
+        _drain_scheduled = False
+
+    if full:
+        _safe_rebuild()
+        return
+
+    try:
+        # serial dengan rebuild() supaya hasil build penuh tidak menimpa update yang lebih baru
+        with _build_lock:
+            _apply_rows(todo)
+            _mark_applied()
+    except Exception:
+        logger.exception("Gagal update search index, dijadwalkan rebuild penuh")
+        schedule_rebuild()
+
+
+def _apply_rows(todo: Dict[str, Set[int]]) -> None:
+    # baca dari primary: replika bisa belum menerima write yang baru saja terjadi
+    rows: List[Dict[str, Any]] = []
+    if todo["buku"]:
+        ids = sorted(todo["buku"])
+        rows += supabase.table("buku").select(_SELECT + ", status").in_("id_buku", ids).execute().data or []
+        # id yang tidak ada lagi di DB -> keluarkan dari index
+        found = {int(r["id_buku"]) for r in rows}
+        for doc_id in set(ids) - found:
+            _index.remove(doc_id)
+    for entity, col in (("penulis", "id_penulis"), ("genre", "id_genre")):
+        if todo[entity]:
+            ids = sorted(todo[entity])
+            rows += supabase.table("buku").select(_SELECT + ", status").in_(col, ids).execute().data or []
+
+    for row in rows:
+        if row.get("status") == "aktif":
+            _index.upsert(row)
+        else:
+            _index.remove(int(row["id_buku"]))
+
+
+def _on_catalog_changed(entity: str, ids: Optional[List[int]]) -> None:
+    global _pending_full, _drain_scheduled
+    if not settings.SEARCH_INDEX_ENABLED or entity not in _pending or not is_ready():
+        return
+    with _pending_lock:
+        if ids is None:
+            _pending_full = True
+        else:
+            _pending[entity].update(ids)
+        if _drain_scheduled:
+            return
+        _drain_scheduled = True
+    get_io_executor().submit(_apply_pending)
+
+
+catalog_events.subscribe(_on_catalog_changed)
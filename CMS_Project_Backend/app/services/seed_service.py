@@ -1,43 +1,108 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
 from app.database import supabase
+from app.services import master_data
+
+logger = logging.getLogger(__name__)
+
+# data yang wajib ada agar sistem jalan tanpa insert manual
+# tabel -> (natural key / kolom on_conflict, rows)
+SEED_ROWS: Dict[str, tuple] = {
+    "status_pembayaran": (
+        "nama_status",
+        [
+            {"nama_status": "Menunggu Pembayaran"},
+            {"nama_status": "Lunas"},
+            {"nama_status": "Gagal"},
+        ],
+    ),
+    "status_order": (
+        "nama_status",
+        [
+            {"nama_status": "Pending", "urutan_status": 1},
+            {"nama_status": "Diproses", "urutan_status": 2},
+            {"nama_status": "Dikirim", "urutan_status": 3},
+            {"nama_status": "Selesai", "urutan_status": 4},
+            {"nama_status": "Dibatalkan", "urutan_status": 5},
+        ],
+    ),
+    # contoh default
+    "jenis_pembayaran": (
+        "nama_pembayaran",
+        [
+            {"nama_pembayaran": "Transfer Bank", "keterangan": "Pembayaran via transfer bank", "is_active": True},
+            {"nama_pembayaran": "COD", "keterangan": "Bayar di tempat", "is_active": True},
+            {"nama_pembayaran": "E-Wallet", "keterangan": "Pembayaran via e-wallet", "is_active": True},
+        ],
+    ),
+}
+
+STARTUP_CHECK_MODES = ("off", "verify", "seed")
+
+
+def seed_master_data(only: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> Dict[str, int]:
+    """
+    Seed data wajib: 1 upsert per tabel, on_conflict natural key + ignore duplicate
+    -> idempotent & aman dijalankan beberapa worker sekaligus (butuh unique index sql/005).
+    Baris yang sudah ada (mis. keterangan / is_active diubah admin) tidak ditimpa.
+    only = {tabel: rows} -> hanya baris itu (hasil missing_master_data).
+    Return jumlah baris yang dikirim per tabel.
+    """
+    sent: Dict[str, int] = {}
+    for table, (key, rows) in SEED_ROWS.items():
+        if only is not None:
+            rows = only.get(table) or []
+        if not rows:
+            continue
+        supabase.table(table).upsert(rows, on_conflict=key, ignore_duplicates=True).execute()
+        sent[table] = len(rows)
+
+    # registry master data di proses ini dimuat ulang saat dipakai berikutnya
+    master_data.invalidate()
+    return sent
 
 
-def seed_master_data():
+def missing_master_data() -> Dict[str, List[Dict[str, Any]]]:
     """
-    Seed data yang wajib ada agar sistem jalan tanpa insert manual.
-    Aman dipanggil berulang (idempotent) karena cek dulu sebelum insert.
+    Baris seed yang belum ada, dibandingkan dengan registry master_data (1 query get_master_data).
     """
+    missing: Dict[str, List[Dict[str, Any]]] = {}
+    for table, (key, rows) in SEED_ROWS.items():
+        todo = [r for r in rows if master_data.get_id(table, r[key]) is None]
+        if todo:
+            missing[table] = todo
+    return missing
+
+
+def startup_self_check(mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Dipanggil saat startup (background):
+    - off    : hanya warmup registry master data
+    - verify : warmup + log baris seed yang belum ada
+    - seed   : warmup + seed hanya yang belum ada (tanpa write kalau sudah lengkap)
+    """
+    mode = (mode or settings.MASTER_DATA_STARTUP_CHECK).strip().lower()
+    master_data.warmup()
+    if mode not in ("verify", "seed"):
+        return {"mode": mode, "missing": {}, "seeded": {}}
+
+    try:
+        missing = missing_master_data()
+        seeded: Dict[str, int] = {}
+        if missing and mode == "seed":
+            seeded = seed_master_data(only=missing)
+    except Exception as e:
+        # startup tidak boleh gagal karena self-check; /admin/seed tetap bisa dipakai manual
+        logger.exception("Self-check master data gagal")
+        return {"mode": mode, "error": str(e)}
 
-    # 1) status_pembayaran
-    status_pembayaran_list = ["Menunggu Pembayaran", "Lunas", "Gagal"]
-    for name in status_pembayaran_list:
-        cek = supabase.table("status_pembayaran").select("id_status_pembayaran").eq("nama_status", name).execute()
-        if not cek.data:
-            supabase.table("status_pembayaran").insert({"nama_status": name}).execute()
-
-    # 2) status_order
-    status_order_list = [
-        ("Pending", 1),
-        ("Diproses", 2),
-        ("Dikirim", 3),
-        ("Selesai", 4),
-        ("Dibatalkan", 5),
-    ]
-    for name, urutan in status_order_list:
-        cek = supabase.table("status_order").select("id_status_order").eq("nama_status", name).execute()
-        if not cek.data:
-            supabase.table("status_order").insert({"nama_status": name, "urutan_status": urutan}).execute()
-
-    # 3) jenis_pembayaran (contoh default)
-    payment_methods = [
-        ("Transfer Bank", "Pembayaran via transfer bank"),
-        ("COD", "Bayar di tempat"),
-        ("E-Wallet", "Pembayaran via e-wallet"),
-    ]
-    for nama, ket in payment_methods:
-        cek = supabase.table("jenis_pembayaran").select("id_jenis_pembayaran").eq("nama_pembayaran", nama).execute()
-        if not cek.data:
-            supabase.table("jenis_pembayaran").insert({
-                "nama_pembayaran": nama,
-                "keterangan": ket,
-                "is_active": True
-            }).execute()
+    if seeded:
+        logger.info("Master data yang belum ada di-seed: %s", seeded)
+    elif missing:
+        logger.warning(
+            "Master data belum lengkap (%s), jalankan /admin/seed atau MASTER_DATA_STARTUP_CHECK=seed",
+            {t: [r[SEED_ROWS[t][0]] for r in rows] for t, rows in missing.items()},
+        )
+    return {"mode": mode, "missing": {t: len(rows) for t, rows in missing.items()}, "seeded": seeded}
@@ -0,0 +1,243 @@
+# app/services/suggest_index.py
+#
+# Typeahead judul & nama penulis (/books/suggest), semua dari memory:
+# - entry judul / penulis diurutkan sekali menurut ranking -> index entry = peringkat
+# - key = teks ter-fold mulai dari tiap awal kata ("laskar pelangi", "pelangi"),
+#   list terurut + bisect untuk prefix
+# - prefix pendek (<= BOOK_SUGGEST_SHORT_PREFIX huruf) cocok dengan ribuan key -> top-N nya
+#   dihitung saat build, query tinggal ambil list
+# - ranking: jumlah terjual (RPC book_sales_totals), seri / RPC belum ada -> buku terbaru
+# - sumber buku: snapshot search_index (tidak query tabel buku dua kali); dibangun ulang kalau
+#   search_index.generation() sudah berbeda (update search index selesai), bukan saat event masuk
+
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.database import run_read
+from app.services import search_index
+from app.utils.executors import get_io_executor
+
+logger = logging.getLogger(__name__)
+
+# cukup beberapa kata awal; kata ke-7 dst jarang diketik sebagai awal saran
+_MAX_WORDS_PER_ENTRY = 6
+# batas scan untuk prefix panjang (biasanya jauh lebih sedikit)
+_MAX_SCAN = 5000
+
+
+class _PrefixTable:
+    __slots__ = ("keys", "refs", "short")
+
+    def __init__(self, texts: List[str]) -> None:
+        # texts[i] = teks entry peringkat i
+        pairs: List[Tuple[str, int]] = []
+        short: Dict[str, List[int]] = {}
+        short_len = max(0, settings.BOOK_SUGGEST_SHORT_PREFIX)
+        top_k = max(1, settings.BOOK_SUGGEST_MAX_RESULTS)
+
+        for idx, text in enumerate(texts):
+            ws = search_index.words(text)[:_MAX_WORDS_PER_ENTRY + 1]
+            for i in range(min(len(ws), _MAX_WORDS_PER_ENTRY)):
+                key = " ".join(ws[i:])
+                pairs.append((key, idx))
+                # entry diproses urut peringkat -> list short otomatis terurut
+                for n in range(1, min(short_len, len(key)) + 1):
+                    bucket = short.setdefault(key[:n], [])
+                    if len(bucket) < top_k and (not bucket or bucket[-1] != idx):
+                        bucket.append(idx)
+
+        pairs.sort()
+        self.keys = [k for k, _ in pairs]
+        self.refs = array("I", (i for _, i in pairs))
+        self.short = {p: array("I", ids) for p, ids in short.items()}
+
+    def lookup(self, prefix: str, limit: int) -> List[int]:
+        if len(prefix) <= settings.BOOK_SUGGEST_SHORT_PREFIX:
+            # semua prefix pendek yang ada tercatat saat build -> tidak ada di tabel = tidak ada hasil
+            hit = self.short.get(prefix)
+            return list(hit[:limit]) if hit is not None else []
+        found = set()
+        i = bisect_left(self.keys, prefix)
+        end = min(len(self.keys), i + _MAX_SCAN)
+        while i < end and self.keys[i].startswith(prefix):
+            found.add(self.refs[i])
+            i += 1
+        return heapq.nsmallest(limit, found)
+
+
+class SuggestIndex:
+    def __init__(
+        self,
+        titles: List[Dict[str, Any]],
+        authors: List[Dict[str, Any]],
+        ranked_by: str,
+        generation: int = 0,
+    ) -> None:
+        self.titles = titles
+        self.authors = authors
+        self.ranked_by = ranked_by
+        self._title_table = _PrefixTable([t["judul"] or "" for t in titles])
+        self._author_table = _PrefixTable([a["nama_penulis"] or "" for a in authors])
+        self.built_at = time.time()
+        self.build_seconds: Optional[float] = None
+        # search_index.generation() saat cards() dibaca
+        self.generation = generation
+
+    def suggest(self, q: str, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        prefix = " ".join(search_index.words(q))
+        if not prefix:
+            return {"judul": [], "penulis": []}
+        return {
+            "judul": [self.titles[i] for i in self._title_table.lookup(prefix, limit)],
+            "penulis": [self.authors[i] for i in self._author_table.lookup(prefix, limit)],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "titles": len(self.titles),
+            "authors": len(self.authors),
+            "title_keys": len(self._title_table.keys),
+            "author_keys": len(self._author_table.keys),
+            "short_prefixes": len(self._title_table.short) + len(self._author_table.short),
+            "ranked_by": self.ranked_by,
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "search_generation": self.generation,
+        }
+
+
+# ===========================
+# BUILD
+# ===========================
+def _fetch_sales() -> Optional[Dict[int, int]]:
+    try:
+        res = run_read(lambda db: db.rpc("book_sales_totals", {}))
+    except Exception as e:
+        # migration sql/003 belum dipasang -> ranking pakai buku terbaru
+        logger.warning("book_sales_totals tidak tersedia (%s), suggest diurutkan menurut buku terbaru", e)
+        return None
+    return {int(r["id_buku"]): int(r["terjual"] or 0) for r in res.data or []}
+
+
+def _build_index() -> SuggestIndex:
+    started = time.perf_counter()
+    search_index.ensure_ready()
+    # generation dibaca sebelum cards(): update yang masuk di antaranya hanya memicu rebuild ekstra
+    generation = search_index.generation()
+    cards = search_index.cards()
+    sales = _fetch_sales()
+    sold = sales or {}
+
+    titles: List[Dict[str, Any]] = []
+    authors: Dict[int, Dict[str, Any]] = {}
+    for c in cards:
+        terjual = sold.get(c["id_buku"], 0)
+        titles.append(
+            {
+                "id_buku": c["id_buku"],
+                "judul": c["judul"],
+                "cover_image": c["cover_image"],
+                "nama_penulis": c["nama_penulis"],
+                "terjual": terjual,
+            }
+        )
+        if c["id_penulis"] is not None and c["nama_penulis"]:
+            a = authors.setdefault(
+                c["id_penulis"],
+                {"id_penulis": c["id_penulis"], "nama_penulis": c["nama_penulis"], "jumlah_buku": 0, "terjual": 0},
+            )
+            a["jumlah_buku"] += 1
+            a["terjual"] += terjual
+
+    # terlaris dulu, seri -> id terbesar (= terbaru)
+    titles.sort(key=lambda t: (-t["terjual"], -t["id_buku"]))
+    author_list = sorted(authors.values(), key=lambda a: (-a["terjual"], -a["jumlah_buku"], a["id_penulis"]))
+
+    index = SuggestIndex(titles, author_list, "sales" if sales is not None else "recency", generation)
+    index.build_seconds = round(time.perf_counter() - started, 3)
+    return index
+
+
+_index: Optional[SuggestIndex] = None
+_build_lock = threading.Lock()
+_state_lock = threading.Lock()
+_rebuild_scheduled = False
+
+
+def _is_dirty(index: SuggestIndex) -> bool:
+    return index.generation != search_index.generation()
+
+
+def rebuild(if_missing: bool = False) -> Dict[str, Any]:
+    global _index
+    with _build_lock:
+        if if_missing and _index is not None:
+            return _index.stats()
+        index = _build_index()
+        _index = index
+        logger.info("Suggest index dibangun: %s judul, %s penulis dalam %ss",
+                    len(index.titles), len(index.authors), index.build_seconds)
+        return index.stats()
+
+
+def ensure_ready() -> None:
+    # blocking, jalankan di thread
+    if _index is None:
+        rebuild(if_missing=True)
+
+
+def _safe_rebuild() -> None:
+    global _rebuild_scheduled
+    try:
+        rebuild()
+    except Exception:
+        logger.exception("Gagal membangun suggest index")
+    finally:
+        with _state_lock:
+            _rebuild_scheduled = False
+
+
+def refresh_if_needed() -> None:
+    """
+    Index lama tetap dipakai; rebuild di background kalau search index sudah menerapkan perubahan katalog
+    (generation berbeda) / melewati umur maksimal.
+    """
+    global _rebuild_scheduled
+    index = _index
+    if index is None:
+        return
+    max_age = settings.BOOK_SUGGEST_MAX_AGE_SECONDS
+    too_old = max_age > 0 and time.time() - index.built_at > max_age
+    with _state_lock:
+        if not (_is_dirty(index) or too_old) or _rebuild_scheduled:
+            return
+        _rebuild_scheduled = True
+    get_io_executor().submit(_safe_rebuild)
+
+
+def suggest(q: str, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+    index = _index
+    if index is None:
+        return {"judul": [], "penulis": []}
+    return index.suggest(q, limit)
+
+
+def age_seconds() -> Optional[float]:
+    index = _index
+    return round(time.time() - index.built_at, 1) if index else None
+
+
+def ranked_by() -> Optional[str]:
+    index = _index
+    return index.ranked_by if index else None
+
+
+def stats() -> Dict[str, Any]:
+    index = _index
+    return {"ready": index is not None, "dirty": _is_dirty(index) if index else False, **(index.stats() if index else {})}
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+from app.core.config import settings
+from app.database import supabase
+
+logger = logging.getLogger(__name__)
+
+# id_user -> token_version. Hanya user dengan token_version > 0 yang disimpan,
+# sisanya dianggap versi 0.
+_versions: Dict[int, int] = {}
+_loaded_at: float = 0.0
+_loaded = False  # False -> tabel belum pernah berhasil dimuat, claim tv tidak bisa dicek dari sini
+_retry_at: float = 0.0  # setelah refresh gagal: jangan coba lagi sebelum waktu ini
+_lock = threading.Lock()
+
+_PAGE_SIZE = 1000
+_RETRY_SECONDS = 5
+
+
+def _load_all_versions() -> Dict[int, int]:
+    versions: Dict[int, int] = {}
+    start = 0
+    while True:
+        res = (
+            supabase.table("users")
+            .select("id_user, token_version")
+            .gt("token_version", 0)
+            .order("id_user")
+            .range(start, start + _PAGE_SIZE - 1)
+            .execute()
+        )
+        rows = res.data or []
+        for r in rows:
+            versions[int(r["id_user"])] = int(r.get("token_version") or 0)
+        if len(rows) < _PAGE_SIZE:
+            return versions
+        start += _PAGE_SIZE
+
+
+def refresh_versions(force: bool = False) -> None:
+    """
+    Refresh tabel versi secara bulk (bukan query per request).
+    Dipanggil otomatis kalau umur tabel > TOKEN_VERSION_REFRESH_SECONDS.
+    Gagal -> di-log, tabel lama tetap dipakai, dicoba lagi setelah _RETRY_SECONDS.
+    """
+    global _versions, _loaded_at, _loaded, _retry_at
+
+    if not force and not is_stale():
+        return
+
+    with _lock:
+        if not force and not is_stale():
+            return
+        try:
+            fresh = _load_all_versions()
+        except Exception:
+            logger.exception("Gagal memuat token_version (sql/001 sudah dipasang?)")
+            _retry_at = time.monotonic() + _RETRY_SECONDS
+            return
+        # jangan turunkan versi yang baru saja di-bump lokal
+        for id_user, v in _versions.items():
+            if v > fresh.get(id_user, 0):
+                fresh[id_user] = v
+        _versions = fresh
+        _loaded_at = time.monotonic()
+        _loaded = True
+
+
+def is_stale() -> bool:
+    now = time.monotonic()
+    return now >= _retry_at and (now - _loaded_at) >= settings.TOKEN_VERSION_REFRESH_SECONDS
+
+
+def is_loaded() -> bool:
+    return _loaded
+
+
+def current_version(id_user: int) -> int:
+    return _versions.get(int(id_user), 0)
+
+
+def bump_token_version(id_user: int) -> int:
+    """
+    Naikkan token_version user (atomic via RPC) -> semua token lama user ini dicabut.
+    """
+    res = supabase.rpc("bump_token_version", {"p_id_user": int(id_user)}).execute()
+    data = res.data
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if isinstance(data, dict):
+        data = next(iter(data.values()), None)
+    if data is None:
+        raise ValueError("User tidak ditemukan")
+
+    new_version = int(data)
+    with _lock:
+        _versions[int(id_user)] = new_version
+    return new_version
@@ -0,0 +1,346 @@
+# app/utils/compression.py
+#
+# Kompresi response (gzip / brotli) di level ASGI:
+# - negosiasi Accept-Encoding (q-value), brotli dipakai kalau terpasang (opsional)
+# - hanya content-type teks/JSON, di atas COMPRESSION_MIN_SIZE byte
+# - response streaming (more_body) dikompres per chunk + flush -> chunk tetap langsung terkirim
+# - dilewati: response yang sudah ber-Content-Encoding (export gzip), HEAD, 204/304,
+#   route dengan @no_compression, path di COMPRESSION_EXCLUDE_PATHS
+# - metrics byte masuk/keluar + CPU kompresi per encoding & per route (GET /admin/metrics/compression)
+
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+
+from app.core.config import settings
+
+try:
+    import brotli  # opsional
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# body sebesar ini dikompres di thread supaya event loop tidak tertahan
+_THREAD_THRESHOLD = 256 * 1024
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """
+    Tandai endpoint supaya response-nya tidak dikompres middleware.
+    Pasang di bawah decorator route:
+
+        @router.get("/x")
+        @no_compression
+        async def x(): ...
+    """
+    endpoint.__no_compression__ = True
+    return endpoint
+
+
+def _available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    "gzip, br;q=0.8" -> "gzip". q sama -> br lebih diutamakan. Tidak ada yang cocok -> None.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best: Optional[str] = None
+    best_q = 0.0
+    for enc in _available_encodings():
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    ct = content_type.lower()
+    return any(ct.startswith(t) for t in _COMPRESSIBLE_TYPES)
+
+
+# ===========================
+# COMPRESSOR
+# ===========================
+class _Compressor:
+    __slots__ = ("encoding", "_obj")
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # flush tiap chunk: klien bisa langsung decode chunk yang sudah diterima
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+
+def _compress_body(encoding: str, body: bytes) -> Tuple[bytes, float]:
+    t0 = time.thread_time()
+    out = _Compressor(encoding).finish(body)
+    return out, (time.thread_time() - t0) * 1000
+
+
+# ===========================
+# METRICS
+# ===========================
+class _Totals:
+    __slots__ = ("responses", "bytes_in", "bytes_out", "cpu_ms")
+
+    def __init__(self) -> None:
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+
+    def add(self, bytes_in: int, bytes_out: int, cpu_ms: float) -> None:
+        self.responses += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.cpu_ms += cpu_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "responses": self.responses,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "cpu_ms": round(self.cpu_ms, 3),
+            "avg_cpu_ms": round(self.cpu_ms / self.responses, 3) if self.responses else 0.0,
+        }
+
+
+_by_encoding: Dict[str, _Totals] = defaultdict(_Totals)
+_by_route: Dict[str, _Totals] = defaultdict(_Totals)
+_skipped: Dict[str, int] = defaultdict(int)
+_lock = threading.Lock()
+
+
+def _observe(route_key: str, encoding: str, bytes_in: int, bytes_out: int, cpu_ms: float) -> None:
+    with _lock:
+        _by_encoding[encoding].add(bytes_in, bytes_out, cpu_ms)
+        _by_route[route_key].add(bytes_in, bytes_out, cpu_ms)
+
+
+def _skip(reason: str) -> None:
+    with _lock:
+        _skipped[reason] += 1
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "available_encodings": list(_available_encodings()),
+            "min_size": settings.COMPRESSION_MIN_SIZE,
+            "encodings": {enc: t.to_dict() for enc, t in sorted(_by_encoding.items())},
+            "routes": {
+                key: t.to_dict()
+                for key, t in sorted(_by_route.items(), key=lambda kv: kv[1].bytes_in - kv[1].bytes_out, reverse=True)
+            },
+            "skipped": dict(sorted(_skipped.items())),
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _by_encoding.clear()
+        _by_route.clear()
+        _skipped.clear()
+
+
+# ===========================
+# ASGI MIDDLEWARE
+# ===========================
+def _route_key(scope) -> str:
+    route = scope.get("route")
+    return f'{scope.get("method", "GET")} {getattr(route, "path", None) or "<unmatched>"}'
+
+
+def _route_opted_out(scope) -> bool:
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    return bool(getattr(endpoint, "__no_compression__", False))
+
+
+def _excluded_path(path: str) -> bool:
+    return any(path.startswith(p) for p in settings.COMPRESSION_EXCLUDE_PATHS)
+
+
+class CompressionMiddleware:
+    """
+    Header response ditahan sampai chunk body pertama datang:
+    - body tunggal  : < COMPRESSION_MIN_SIZE / hasil kompresi tidak lebih kecil -> dikirim apa adanya
+    - body streaming: dikompres per chunk, Content-Length dibuang (chunked)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        if scope.get("method") == "HEAD" or _excluded_path(scope.get("path", "")):
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for k, v in scope.get("headers", []):
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+
+        start: Optional[Dict[str, Any]] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+        bytes_in = bytes_out = 0
+        cpu_ms = 0.0
+
+        def _start_with(headers: List[Tuple[bytes, bytes]]) -> Dict[str, Any]:
+            return {**start, "headers": headers}
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough, bytes_in, bytes_out, cpu_ms
+
+            if message["type"] == "http.response.start":
+                start = message
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                status = message.get("status", 200)
+                reason = None
+                if b"content-encoding" in headers:
+                    reason = "already_encoded"
+                elif status < 200 or status in (204, 304):
+                    reason = "status"
+                elif not _is_compressible(headers.get(b"content-type", b"").decode("latin-1")):
+                    reason = "content_type"
+                elif _route_opted_out(scope):
+                    reason = "opt_out"
+                if reason is not None:
+                    _skip(reason)
+                    passthrough = True
+                    await send(message)
+                    return
+                # representasi bergantung Accept-Encoding -> cache (CDN/browser) harus tahu
+                start = _start_with(_add_vary(message.get("headers", [])))
+                if encoding is None:
+                    _skip("not_accepted")
+                    passthrough = True
+                    await send(start)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None and not more_body:
+                # body tunggal (Response biasa)
+                if len(body) < settings.COMPRESSION_MIN_SIZE:
+                    _skip("below_min_size")
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                if len(body) >= _THREAD_THRESHOLD:
+                    out, cpu = await anyio.to_thread.run_sync(_compress_body, encoding, body)
+                else:
+                    out, cpu = _compress_body(encoding, body)
+                if len(out) >= len(body):
+                    _skip("not_smaller")
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                await send(_start_with(_encoded_headers(start["headers"], encoding, len(out))))
+                await send({"type": "http.response.body", "body": out, "more_body": False})
+                _observe(_route_key(scope), encoding, len(body), len(out), cpu)
+                return
+
+            if compressor is None:
+                # chunk pertama response streaming
+                compressor = _Compressor(encoding)
+                await send(_start_with(_encoded_headers(start["headers"], encoding, None)))
+
+            t0 = time.thread_time()
+            out = compressor.chunk(body) if more_body else compressor.finish(body)
+            cpu_ms += (time.thread_time() - t0) * 1000
+            bytes_in += len(body)
+            bytes_out += len(out)
+            if out or not more_body:
+                await send({"type": "http.response.body", "body": out, "more_body": more_body})
+            if not more_body:
+                _observe(_route_key(scope), encoding, bytes_in, bytes_out, cpu_ms)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    out = []
+    found = False
+    for k, v in headers:
+        if k.lower() == b"vary":
+            found = True
+            if b"accept-encoding" not in v.lower() and v.strip() != b"*":
+                v = v + b", Accept-Encoding"
+        out.append((k, v))
+    if not found:
+        out.append((b"vary", b"Accept-Encoding"))
+    return out
+
+
+def _encoded_headers(headers: List[Tuple[bytes, bytes]], encoding: str, length: Optional[int]):
+    out = []
+    for k, v in headers:
+        lk = k.lower()
+        if lk == b"content-length":
+            continue
+        if lk == b"etag" and not v.startswith(b"W/"):
+            # byte berubah -> strong ETag jadi weak (If-None-Match tetap cocok, lihat http_cache)
+            v = b"W/" + v
+        out.append((k, v))
+    out.append((b"content-encoding", encoding.encode("latin-1")))
+    if length is not None:
+        out.append((b"content-length", str(length).encode("latin-1")))
+    return out
@@ -0,0 +1,82 @@
+# app/utils/executors.py
+
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_cpu_executor: Optional[Executor] = None
+_io_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _make_cpu_executor() -> Executor:
+    workers = max(1, settings.CPU_EXECUTOR_WORKERS)
+    if settings.CPU_EXECUTOR == "process":
+        try:
+            return ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError, ImportError) as e:
+            # contoh: serverless tanpa /dev/shm -> multiprocessing tidak bisa dipakai
+            logger.warning("Process pool tidak tersedia (%s), pakai thread pool untuk CPU", e)
+    # bcrypt melepas GIL, jadi thread pool tetap paralel
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sibuku-cpu")
+
+
+def get_cpu_executor() -> Executor:
+    global _cpu_executor
+    if _cpu_executor is None:
+        with _lock:
+            if _cpu_executor is None:
+                _cpu_executor = _make_cpu_executor()
+    return _cpu_executor
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        with _lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.IO_EXECUTOR_WORKERS),
+                    thread_name_prefix="sibuku-io",
+                )
+    return _io_executor
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Jalankan kerja CPU-bound (bcrypt dsb) di luar event loop.
+    `fn` harus fungsi top-level (picklable) kalau pakai process pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), partial(fn, *args))
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Jalankan I/O blocking (supabase sync client, storage upload) di thread pool khusus.
+    Context (contextvars) ikut dibawa ke thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_io_executor(), partial(ctx.run, fn, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    global _cpu_executor, _io_executor
+    with _lock:
+        if _cpu_executor is not None:
+            _cpu_executor.shutdown(wait=False, cancel_futures=True)
+            _cpu_executor = None
+        if _io_executor is not None:
+            _io_executor.shutdown(wait=False, cancel_futures=True)
+            _io_executor = None
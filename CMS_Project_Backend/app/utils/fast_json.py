@@ -0,0 +1,139 @@
+# app/utils/fast_json.py
+#
+# Jalur cepat serialisasi JSON response.
+# - dumps(): orjson kalau terpasang (opsional), fallback json stdlib
+# - FastJSONResponse: default_response_class app (JSON_FAST_RESPONSE)
+# - ResponseSerializer: byte JSON sesuai model response.
+#   Normal  : validasi Pydantic lalu dump_json (pydantic-core, bukan json stdlib)
+#   Trusted : (TRUSTED_ROWS_FAST_PATH) row dari DB tidak divalidasi ulang, cukup dipangkas
+#             ke field model (field di luar model tidak pernah ikut terkirim) lalu di-dump
+
+import json
+import types
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_jsonable_python
+
+from app.core.config import settings
+
+try:
+    import orjson  # opsional
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Sama seperti JSONResponse, render pakai orjson (kalau ada).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def default_response_class():
+    return FastJSONResponse if settings.JSON_FAST_RESPONSE else JSONResponse
+
+
+# ===========================
+# TRUSTED ROWS (tanpa validasi ulang)
+# ===========================
+_Plan = Optional[Callable[[Any, bool], Any]]
+_plans: Dict[Any, _Plan] = {}
+
+
+def _compile(tp: Any) -> _Plan:
+    """
+    Plan proyeksi untuk sebuah tipe: model -> dict berisi field model saja (rekursif),
+    List[model] -> list, Optional[x] -> x / None, tipe lain -> apa adanya (None).
+    """
+    if tp in _plans:
+        return _plans[tp]
+
+    origin = get_origin(tp)
+    plan: _Plan = None
+    if origin in (Union, types.UnionType):
+        args = [a for a in get_args(tp) if a is not type(None)]
+        plan = _compile(args[0]) if len(args) == 1 else None
+    elif origin in (list, List):
+        args = get_args(tp)
+        inner = _compile(args[0]) if args else None
+        if inner is not None:
+            def plan(v, exclude_unset, _inner=inner):
+                return [_inner(x, exclude_unset) for x in v] if isinstance(v, list) else v
+    elif isinstance(tp, type) and issubclass(tp, BaseModel):
+        _plans[tp] = None  # guard model rekursif
+        plan = _model_plan(tp)
+
+    _plans[tp] = plan
+    return plan
+
+
+def _model_plan(model) -> Callable[[Any, bool], Any]:
+    fields: List[Tuple[str, Tuple[str, ...], _Plan, bool, Any]] = []
+    for name, info in model.model_fields.items():
+        keys = tuple(dict.fromkeys(k for k in (info.alias, name) if k))
+        has_default = not info.is_required()
+        default = to_jsonable_python(info.get_default(call_default_factory=True)) if has_default else None
+        fields.append((name, keys, _compile(info.annotation), has_default, default))
+
+    def plan(v, exclude_unset):
+        if v is None:
+            return None
+        if isinstance(v, BaseModel):
+            return v.model_dump(mode="json", exclude_unset=exclude_unset)
+        if not isinstance(v, dict):
+            return v
+        out = {}
+        for name, keys, sub, has_default, default in fields:
+            for k in keys:
+                if k in v:
+                    val = v[k]
+                    out[name] = sub(val, exclude_unset) if sub is not None and val is not None else val
+                    break
+            else:
+                if has_default and not exclude_unset:
+                    out[name] = default
+        return out
+
+    return plan
+
+
+class ResponseSerializer:
+    """
+    Serializer byte JSON untuk 1 tipe response (model, List[model], ...).
+    """
+
+    def __init__(self, tp: Any) -> None:
+        self.type = tp
+        self.adapter = TypeAdapter(tp)
+        self._plan = _compile(tp)
+
+    def dump(self, data: Any, *, exclude_unset: bool = False, trusted: Optional[bool] = None) -> bytes:
+        if trusted is None:
+            trusted = settings.TRUSTED_ROWS_FAST_PATH
+        if trusted and self._plan is not None:
+            return dumps(self._plan(data, exclude_unset))
+        return self.adapter.dump_json(self.adapter.validate_python(data), exclude_unset=exclude_unset)
+
+    def response(self, data: Any, *, status_code: int = 200, exclude_unset: bool = False) -> Response:
+        return Response(
+            content=self.dump(data, exclude_unset=exclude_unset),
+            status_code=status_code,
+            media_type="application/json",
+        )
@@ -0,0 +1,40 @@
+# app/utils/http_cache.py
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+
+def make_etag(body: bytes) -> str:
+    # strong ETag: hash dari byte response
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        c = candidate.strip()
+        if c == "*" or c == etag or c.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def etag_json_response(
+    request: Request,
+    body: bytes,
+    etag: Optional[str] = None,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """
+    Response JSON dengan ETag. Kalau If-None-Match cocok -> 304 tanpa body.
+    """
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control or settings.CATALOG_CACHE_CONTROL}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
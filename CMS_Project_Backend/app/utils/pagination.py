@@ -1,14 +1,245 @@
-from typing import Dict
+import base64
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from postgrest import APIError
+
+from app.core.config import settings
+from app.database import arun_read, run_read
+from app.services import catalog_events
+from app.utils.ttl_cache import TTLCache
 
 def clamp(n: int, min_n: int, max_n: int) -> int:
     return max(min_n, min(n, max_n))
 
-def get_range(page: int, limit: int, max_limit: int = 100) -> Dict[str, int]:
+def get_range(page: int, limit: int, max_limit: int = 100, default_limit: int = 20) -> Dict[str, int]:
     """
     Supabase range is inclusive: range(start, end)
+    page < 1 -> 1, limit < 1 -> default_limit, limit > max_limit -> max_limit.
     """
     page = clamp(page, 1, 10**9)
-    limit = clamp(limit, 1, max_limit)
+    limit = default_limit if limit < 1 else min(limit, max_limit)
     start = (page - 1) * limit
     end = start + limit - 1
     return {"page": page, "limit": limit, "start": start, "end": end}
+
+
+def sanitize_paging(page: int, limit: int, max_limit: int = 100) -> Tuple[int, int, int, int]:
+    # bentuk tuple untuk router: page, limit, start, end = sanitize_paging(...)
+    r = get_range(page, limit, max_limit)
+    return r["page"], r["limit"], r["start"], r["end"]
+
+
+# ===========================
+# KEYSET (CURSOR) PAGINATION
+# ===========================
+# Cursor = base64url(JSON) berisi kolom sort, arah, nilai sort baris terakhir + id tiebreaker.
+# Urutan selalu "<sort_by> NULLS LAST, <id_col>" supaya keyset stabil walau kolom sort nullable.
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, row_id: int) -> str:
+    raw = json.dumps({"s": sort_by, "o": order, "v": value, "id": row_id}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        value, row_id = data["v"], int(data["id"])
+        cur_sort, cur_order = data["s"], data["o"]
+    except Exception as e:
+        raise InvalidCursor("cursor tidak valid") from e
+    if cur_sort != sort_by or cur_order != order:
+        raise InvalidCursor("cursor tidak cocok dengan sort_by/order")
+    return value, row_id
+
+
+def _pgrst_value(value: Any) -> str:
+    # selalu di-quote: judul/timestamp bisa berisi , . : ( )
+    s = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{s}"'
+
+
+def keyset_order(q, sort_by: str, desc: bool, id_col: str):
+    if sort_by == id_col:
+        return q.order(id_col, desc=desc)
+    return q.order(sort_by, desc=desc, nullsfirst=False).order(id_col, desc=desc)
+
+
+def keyset_filter(q, sort_by: str, desc: bool, id_col: str, after: Optional[Tuple[Any, int]]):
+    """
+    Tambah filter "baris setelah cursor" sesuai keyset_order().
+    """
+    if after is None:
+        return q
+
+    value, row_id = after
+    op = "lt" if desc else "gt"
+
+    if sort_by == id_col:
+        return q.filter(id_col, op, row_id)
+
+    if value is None:
+        # sudah di ekor NULL: lanjut berdasarkan id saja
+        return q.is_(sort_by, "null").filter(id_col, op, row_id)
+
+    v = _pgrst_value(value)
+    return q.or_(
+        f"{sort_by}.{op}.{v},"
+        f"and({sort_by}.eq.{v},{id_col}.{op}.{row_id}),"
+        f"{sort_by}.is.null"
+    )
+
+
+def keyset_page(rows: list, limit: int, sort_by: str, order: str, id_col: str):
+    """
+    rows = hasil query dengan limit+1. Return (rows_halaman, next_cursor|None).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort_by, order, last.get(sort_by), last[id_col])
+
+
+# ===========================
+# PAGING ENGINE (data + total dalam 1 round trip)
+# ===========================
+# build(db, count) -> query builder (select(..., count=count) + filter + order), TANPA range.
+# count_mode:
+#   exact     -> count(*) penuh (perilaku lama)
+#   planned   -> estimasi planner Postgres (murah, tidak akurat)
+#   estimated -> exact kalau kecil, planned kalau besar (ditentukan PostgREST)
+#   cached    -> exact sekali, lalu total disimpan per filter (TTL) -> page berikutnya tanpa count
+COUNT_MODES = ("exact", "planned", "estimated", "cached")
+
+_count_cache = TTLCache(maxsize=settings.PAGED_COUNT_CACHE_MAX_SIZE, ttl_seconds=settings.PAGED_COUNT_CACHE_TTL_SECONDS)
+_count_generations: Dict[str, int] = {}
+
+# 416 dari PostgREST kalau offset melewati total
+_RANGE_ERROR_CODES = {"PGRST103"}
+
+BuildQuery = Callable[[Any, Optional[str]], Any]
+
+
+def invalidate_counts(table: str) -> None:
+    """
+    Buang total cached milik tabel ini (dipanggil setelah insert/delete).
+    """
+    _count_generations[table] = _count_generations.get(table, 0) + 1
+
+
+# nama entity catalog_events = nama tabel
+catalog_events.subscribe(lambda entity, ids=None: invalidate_counts(entity))
+
+
+def normalize_count_mode(count_mode: Optional[str]) -> str:
+    mode = (count_mode or settings.PAGED_COUNT_MODE or "exact").lower().strip()
+    return mode if mode in COUNT_MODES else "exact"
+
+
+def _full_key(cache_key: Tuple[Hashable, ...]) -> Tuple:
+    table = cache_key[0]
+    return (_count_generations.get(table, 0),) + tuple(cache_key)
+
+
+def _plan(count_mode: Optional[str], cache_key: Optional[Tuple[Hashable, ...]]):
+    """
+    Return (mode, count_untuk_query, total_dari_cache).
+    """
+    mode = normalize_count_mode(count_mode)
+    if mode != "cached":
+        return mode, mode, None
+    if cache_key is None:
+        return mode, "exact", None
+    cached = _count_cache.get(_full_key(cache_key))
+    if cached is not None:
+        return mode, None, cached
+    return mode, "exact", None
+
+
+def _finish(mode, cache_key, cached_total, rows, count, start):
+    total = cached_total if cached_total is not None else (count or 0)
+    if mode == "cached" and cached_total is None and cache_key is not None and count is not None:
+        _count_cache.set(_full_key(cache_key), int(count))
+    # count planned bisa lebih kecil dari data nyata
+    total = max(int(total), start + len(rows)) if rows else int(total)
+    return rows, total
+
+
+def _is_range_error(e: Exception) -> bool:
+    return isinstance(e, APIError) and getattr(e, "code", None) in _RANGE_ERROR_CODES
+
+
+def fetch_page(
+    build: BuildQuery,
+    *,
+    start: int,
+    end: int,
+    count_mode: Optional[str] = None,
+    cache_key: Optional[Tuple[Hashable, ...]] = None,
+    with_count: bool = True,
+    reader: Callable = run_read,
+) -> Tuple[list, int]:
+    """
+    Versi sync (router def). cache_key[0] harus nama tabel (dipakai untuk invalidasi).
+    with_count=False -> tanpa count sama sekali (total dihitung terpisah oleh caller).
+    Return (rows, total).
+    """
+    mode, count, cached_total = _plan(count_mode, cache_key) if with_count else ("exact", None, 0)
+    try:
+        res = reader(lambda db: build(db, count).range(start, end))
+        rows, res_count = res.data or [], res.count
+    except Exception as e:
+        if not _is_range_error(e):
+            raise
+        rows = []
+        res_count = None if count is None else reader(lambda db: build(db, count).range(0, 0)).count
+    return _finish(mode, cache_key, cached_total, rows, res_count, start)
+
+
+async def afetch_page(
+    build: BuildQuery,
+    *,
+    start: int,
+    end: int,
+    count_mode: Optional[str] = None,
+    cache_key: Optional[Tuple[Hashable, ...]] = None,
+    with_count: bool = True,
+    reader: Callable = arun_read,
+) -> Tuple[list, int]:
+    mode, count, cached_total = _plan(count_mode, cache_key) if with_count else ("exact", None, 0)
+    try:
+        res = await reader(lambda db: build(db, count).range(start, end))
+        rows, res_count = res.data or [], res.count
+    except Exception as e:
+        if not _is_range_error(e):
+            raise
+        rows = []
+        res_count = None if count is None else (await reader(lambda db: build(db, count).range(0, 0))).count
+    return _finish(mode, cache_key, cached_total, rows, res_count, start)
+
+
+async def acount_only(
+    build: BuildQuery,
+    *,
+    count_mode: Optional[str] = None,
+    cache_key: Optional[Tuple[Hashable, ...]] = None,
+    reader: Callable = arun_read,
+) -> int:
+    """
+    Total saja (mis. mode cursor halaman >1, query data berisi filter keyset).
+    """
+    mode, count, cached_total = _plan(count_mode, cache_key)
+    if cached_total is not None:
+        return cached_total
+    res = await reader(lambda db: build(db, count).limit(1))
+    _, total = _finish(mode, cache_key, None, [], res.count, 0)
+    return total
+
+
+def count_cache_stats() -> Dict[str, Any]:
+    return _count_cache.stats()
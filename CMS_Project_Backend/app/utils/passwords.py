@@ -0,0 +1,17 @@
+# app/utils/passwords.py
+# Sengaja ringan (hanya passlib) supaya murah di-load worker process pool.
+
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return pwd_context.verify(password, hashed or "")
+    except Exception:
+        return False
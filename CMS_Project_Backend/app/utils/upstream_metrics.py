@@ -0,0 +1,211 @@
+# app/utils/upstream_metrics.py
+#
+# Hitung round trip ke Supabase (PostgREST / RPC / Storage / Auth) per request API:
+# - dicatat di level transport httpx (client sync & async dari app/database.py)
+# - dikirim balik sebagai header Server-Timing
+# - diagregasi jadi histogram per route (lihat GET /admin/metrics/upstream)
+
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+# list call upstream untuk request yang sedang berjalan (None = di luar request)
+_current_calls: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("upstream_calls", default=None)
+
+# batas bucket histogram
+TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+
+def describe_request(request: httpx.Request) -> str:
+    """
+    /rest/v1/buku            -> db.buku
+    /rest/v1/rpc/fn          -> rpc.fn
+    /storage/v1/object/b/... -> storage.b
+    /auth/v1/...             -> auth
+    """
+    parts = [p for p in request.url.path.split("/") if p]
+    if len(parts) >= 3 and parts[0] == "rest":
+        if parts[2] == "rpc" and len(parts) >= 4:
+            return f"rpc.{parts[3]}"
+        return f"db.{parts[2]}"
+    if len(parts) >= 2 and parts[0] == "storage":
+        rest = parts[2:]
+        if rest and rest[0] == "object":
+            rest = [p for p in rest[1:] if p not in ("public", "sign", "authenticated")]
+        return f"storage.{rest[0]}" if rest else "storage"
+    if parts and parts[0] == "auth":
+        return "auth"
+    return request.url.host or "upstream"
+
+
+def _record(label: str, elapsed_ms: float) -> None:
+    calls = _current_calls.get()
+    if calls is not None:
+        calls.append((label, elapsed_ms))
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        t0 = time.perf_counter()
+        try:
+            return self._inner.handle_request(request)
+        finally:
+            _record(describe_request(request), (time.perf_counter() - t0) * 1000)
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        t0 = time.perf_counter()
+        try:
+            return await self._inner.handle_async_request(request)
+        finally:
+            _record(describe_request(request), (time.perf_counter() - t0) * 1000)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# ===========================
+# AGREGASI PER ROUTE
+# ===========================
+class _Histogram:
+    __slots__ = ("bounds", "counts", "total", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # + bucket "+Inf"
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {str(b): c for b, c in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "avg": round(self.sum / self.total, 3) if self.total else 0.0,
+            "buckets": buckets,
+        }
+
+
+class _RouteStats:
+    def __init__(self) -> None:
+        self.calls = _Histogram(COUNT_BUCKETS)
+        self.upstream_ms = _Histogram(TIME_BUCKETS_MS)
+        self.by_target: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])  # target -> [calls, ms]
+
+
+_routes: Dict[str, _RouteStats] = defaultdict(_RouteStats)
+_lock = threading.Lock()
+
+
+def _observe(route_key: str, calls: List[Tuple[str, float]]) -> None:
+    with _lock:
+        stats = _routes[route_key]
+        stats.calls.observe(len(calls))
+        stats.upstream_ms.observe(sum(ms for _, ms in calls))
+        for label, ms in calls:
+            agg = stats.by_target[label]
+            agg[0] += 1
+            agg[1] += ms
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        out = {}
+        for route_key, stats in sorted(_routes.items()):
+            requests = stats.calls.total or 1
+            out[route_key] = {
+                "upstream_calls": stats.calls.to_dict(),
+                "upstream_ms": stats.upstream_ms.to_dict(),
+                "targets": {
+                    label: {
+                        "calls": int(n),
+                        "calls_per_request": round(n / requests, 3),
+                        "avg_ms": round(ms / n, 3) if n else 0.0,
+                    }
+                    for label, (n, ms) in sorted(stats.by_target.items())
+                },
+            }
+        return out
+
+
+def reset() -> None:
+    with _lock:
+        _routes.clear()
+
+
+def server_timing_value(calls: List[Tuple[str, float]]) -> str:
+    """
+    Contoh: upstream;desc="3 calls";dur=41.2, db.buku;desc="2x";dur=30.1, rpc.fn;desc="1x";dur=11.1
+    """
+    grouped: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+    for label, ms in calls:
+        g = grouped[label]
+        g[0] += 1
+        g[1] += ms
+
+    total_ms = sum(ms for _, ms in calls)
+    parts = [f'upstream;desc="{len(calls)} calls";dur={total_ms:.1f}']
+    for label, (n, ms) in grouped.items():
+        parts.append(f'{label};desc="{int(n)}x";dur={ms:.1f}')
+    return ", ".join(parts)
+
+
+# ===========================
+# ASGI MIDDLEWARE
+# ===========================
+class UpstreamMetricsMiddleware:
+    """
+    Pasang list call per request, tulis Server-Timing saat response start,
+    lalu masukkan ke histogram per route setelah response selesai.
+    Call upstream yang terjadi setelah header terkirim (response streaming)
+    tetap masuk histogram, tapi tidak ada di Server-Timing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.UPSTREAM_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        calls: List[Tuple[str, float]] = []
+        token = _current_calls.set(calls)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_value(calls).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_calls.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            _observe(f'{scope.get("method", "GET")} {route_path}', list(calls))
@@ -0,0 +1,88 @@
+# benchmarks/bench_login_concurrency.py
+#
+# Simulasi login concurrent: 1x query users (I/O, disimulasikan sleep) + bcrypt verify.
+# - "blocking": pola lama, semua dipanggil langsung di dalam async def
+# - "offload" : pola baru, I/O via run_io + bcrypt via run_cpu
+#
+# Jalankan dari folder CMS_Project_Backend:
+#   python -m benchmarks.bench_login_concurrency --logins 64 --latency-ms 40
+
+import argparse
+import asyncio
+import os
+import time
+
+# config.py fail-fast kalau env kosong; benchmark tidak butuh koneksi asli
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.utils.executors import run_cpu, run_io, shutdown_executors  # noqa: E402
+from app.utils.passwords import hash_password, verify_password  # noqa: E402
+
+
+def _fake_db_call(latency_s: float) -> None:
+    time.sleep(latency_s)
+
+
+async def _login_blocking(hashed: str, latency_s: float) -> bool:
+    _fake_db_call(latency_s)
+    ok = verify_password("rahasia123", hashed)
+    _fake_db_call(latency_s)
+    return ok
+
+
+async def _login_offload(hashed: str, latency_s: float) -> bool:
+    await run_io(_fake_db_call, latency_s)
+    ok = await run_cpu(verify_password, "rahasia123", hashed)
+    await run_io(_fake_db_call, latency_s)
+    return ok
+
+
+async def _loop_lag_probe(stop: asyncio.Event, lags: list) -> None:
+    # seberapa telat event loop merespon (= latency request lain selama login jalan)
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - t0 - 0.005)
+
+
+async def _run(fn, n: int, hashed: str, latency_s: float):
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.create_task(_loop_lag_probe(stop, lags))
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(fn(hashed, latency_s) for _ in range(n)))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    await probe
+    assert all(results)
+    return elapsed, max(lags or [0.0])
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    hashed = hash_password("rahasia123")
+    latency_s = args.latency_ms / 1000.0
+
+    # warmup pool (process pool spawn tidak ikut dihitung)
+    await _run(_login_offload, 4, hashed, 0)
+
+    for name, fn in (("blocking", _login_blocking), ("offload", _login_offload)):
+        elapsed, max_lag = await _run(fn, args.logins, hashed, latency_s)
+        print(
+            f"{name:9s} {args.logins} login: {elapsed:.2f}s -> {args.logins / elapsed:.1f} login/s, "
+            f"max event-loop lag {max_lag * 1000:.0f} ms"
+        )
+
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
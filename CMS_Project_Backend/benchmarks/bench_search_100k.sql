@@ -0,0 +1,142 @@
+-- benchmarks/bench_search_100k.sql
+--
+-- Bandingkan pencarian lama (ilike '%q%' di judul) vs RPC search_books (sql/002_books_search.sql)
+-- pada katalog sintetis 100k buku.
+--
+-- JANGAN dijalankan di database produksi (membuat ulang tabel genre/penulis/buku).
+-- Jalankan dari folder CMS_Project_Backend:
+--   createdb sibuku_bench
+--   psql -d sibuku_bench -f benchmarks/bench_search_100k.sql
+
+\set ON_ERROR_STOP on
+\pset pager off
+
+drop table if exists public.buku, public.penulis, public.genre cascade;
+
+create table public.genre (
+  id_genre bigint generated always as identity primary key,
+  nama_genre text not null,
+  slug text
+);
+create table public.penulis (
+  id_penulis bigint generated always as identity primary key,
+  nama_penulis text not null
+);
+create table public.buku (
+  id_buku bigint generated always as identity primary key,
+  judul text not null,
+  isbn text,
+  harga numeric not null default 0,
+  stok integer not null default 0,
+  deskripsi text,
+  status text not null default 'aktif',
+  id_genre bigint references public.genre (id_genre),
+  id_penulis bigint references public.penulis (id_penulis),
+  created_at timestamptz not null default now(),
+  updated_at timestamptz
+);
+
+-- migration dipasang sebelum data masuk -> trigger ikut terukur saat insert
+\i sql/002_books_search.sql
+
+-- ===========================
+-- DATA SINTETIS
+-- ===========================
+create temporary table kata (i int, w text);
+insert into kata
+select row_number() over () - 1, w
+  from unnest(string_to_array(
+    'laskar pelangi bumi manusia cantik itu luka ronggeng dukuh paruk negeri lima menara '
+    'perahu kertas supernova filosofi kopi ayat ayat cinta sang pemimpi edensor hujan '
+    'pulang pergi rindu senja matahari bulan bintang laut gunung sungai kota desa rumah '
+    'jalan cerita kisah rahasia perjalanan petualangan sejarah nusantara budaya bahasa '
+    'pemrograman python data algoritma jaringan sistem basis ekonomi bisnis manajemen '
+    'psikologi filsafat agama hukum politik sains fisika kimia biologi matematika anak', ' ')) as w;
+
+select count(*) as nk from kata \gset
+
+insert into public.genre (nama_genre, slug)
+select g, lower(replace(g, ' ', '-'))
+  from unnest(array['Fiksi', 'Novel', 'Sejarah', 'Teknologi', 'Bisnis', 'Sains', 'Agama', 'Anak',
+                    'Psikologi', 'Filsafat', 'Hukum', 'Politik', 'Biografi', 'Puisi', 'Komik']) as g;
+
+insert into public.penulis (nama_penulis)
+select initcap(a.w || ' ' || b.w)
+  from kata a, kata b
+ where a.i <> b.i
+ limit 2000;
+
+select count(*) as np from public.penulis \gset
+
+insert into public.buku (judul, isbn, harga, stok, deskripsi, status, id_genre, id_penulis, created_at)
+select initcap(k1.w || ' ' || k2.w || ' ' || k3.w),
+       '978' || lpad((n * 7919 % 1000000000)::text, 10, '0'),
+       (20000 + (n * 37 % 300) * 1000),
+       n % 50,
+       'Buku tentang ' || k2.w || ' dan ' || k4.w || ' yang membahas ' || k3.w || ' ' || k1.w
+         || ' secara mendalam untuk pembaca ' || k4.w || '.',
+       case when n % 10 = 0 then 'nonaktif' else 'aktif' end,
+       1 + n % 15,
+       1 + (n * 31) % :np,
+       now() - (n || ' minutes')::interval
+  from generate_series(1, 100000) as n
+  join kata k1 on k1.i = n % :nk
+  join kata k2 on k2.i = (n / :nk) % :nk
+  join kata k3 on k3.i = (n * 7 + n / (:nk * :nk)) % :nk
+  join kata k4 on k4.i = (n * 13) % :nk;
+
+analyze public.buku;
+analyze public.penulis;
+analyze public.genre;
+
+select count(*) as total_buku,
+       pg_size_pretty(pg_relation_size('public.buku_search_tsv_idx')) as tsv_idx,
+       pg_size_pretty(pg_relation_size('public.buku_search_text_trgm_idx')) as trgm_idx
+  from public.buku;
+
+-- ===========================
+-- LAMA: ilike '%q%' di judul (count + 1 halaman, seperti /books/paged sebelumnya)
+-- ===========================
+\timing on
+\echo '--- ilike: count'
+explain (analyze, buffers, costs off, summary on)
+select count(*) from public.buku where status = 'aktif' and judul ilike '%laskar pelangi%';
+
+\echo '--- ilike: halaman 1'
+explain (analyze, buffers, costs off, summary on)
+select * from public.buku
+ where status = 'aktif' and judul ilike '%laskar pelangi%'
+ order by created_at desc limit 20;
+
+\echo '--- ilike: typo (tidak ketemu apa-apa)'
+select count(*) from public.buku where status = 'aktif' and judul ilike '%laskr pelangy%';
+
+-- ===========================
+-- BARU: search_books (match + ranking + total + headline dalam 1 call)
+-- ===========================
+\echo '--- search_books: judul'
+explain (analyze, buffers, costs off, summary on)
+select * from public.search_books('laskar pelangi', null, null, 'aktif', 20, 0);
+
+\echo '--- search_books: typo'
+select count(*) as hasil, max(total_count) as total
+  from public.search_books('laskr pelangy', null, null, 'aktif', 20, 0);
+explain (analyze, buffers, costs off, summary on)
+select * from public.search_books('laskr pelangy', null, null, 'aktif', 20, 0);
+
+\echo '--- search_books: nama penulis + filter genre'
+explain (analyze, buffers, costs off, summary on)
+select * from public.search_books('hujan senja', 2, null, 'aktif', 20, 0);
+
+\echo '--- search_books: halaman dalam (offset 200)'
+explain (analyze, buffers, costs off, summary on)
+select * from public.search_books('cerita', null, null, 'aktif', 20, 200);
+
+\echo '--- contoh hasil'
+select hit ->> 'judul' as judul,
+       hit -> 'penulis' ->> 'nama_penulis' as penulis,
+       round((hit ->> 'search_rank')::numeric, 3) as rank,
+       hit ->> 'search_headline' as headline,
+       total_count
+  from public.search_books('laskr pelangy', null, null, 'aktif', 5, 0);
+\timing off
@@ -0,0 +1,182 @@
+# benchmarks/bench_serialization.py
+#
+# Microbenchmark serialisasi response (app/schemas.py) untuk payload besar:
+#   - 1 halaman /books/paged (100 buku + penulis + genre)
+#   - riwayat order (50 order x 5 order_item + buku)
+#   - keranjang (30 item + buku)
+#
+# Jalur yang dibandingkan:
+#   fastapi        : validasi response_model -> dump_python(mode="json") -> json stdlib (JSONResponse)
+#   fastapi+orjson : sama, tapi render pakai orjson (JSON_FAST_RESPONSE=true)
+#   serializer     : ResponseSerializer (validasi -> dump_json pydantic-core, tanpa dict perantara)
+#   trusted        : ResponseSerializer trusted (tanpa validasi, pangkas ke field model -> orjson)
+#
+# Jalankan dari folder CMS_Project_Backend:
+#   python benchmarks/bench_serialization.py
+
+import json
+import os
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py fail-fast kalau env kosong; benchmark tidak butuh koneksi asli
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.routers.books import BooksPagedResponse  # noqa: E402
+from app.schemas import CartResponse, OrderResponse  # noqa: E402
+from app.utils.fast_json import ResponseSerializer, dumps, orjson  # noqa: E402
+
+
+def _book(i: int) -> dict:
+    return {
+        "id_buku": i,
+        "judul": f"Laskar Pelangi Jilid {i}",
+        "isbn": f"978{i:010d}",
+        "harga": 85000 + i,
+        "stok": i % 20,
+        "berat": 0.4,
+        "deskripsi": "Kisah sepuluh anak Belitung yang bersekolah di SD Muhammadiyah. " * 6,
+        "cover_image": f"https://example.supabase.co/storage/v1/object/public/book-covers/covers/{i}.webp",
+        "status": "aktif",
+        "id_genre": 1 + i % 10,
+        "id_penulis": 1 + i % 50,
+        "created_at": "2025-01-02T03:04:05.123456+00:00",
+        "updated_at": "2025-02-03T04:05:06.654321+00:00",
+        "penulis": {
+            "id_penulis": 1 + i % 50,
+            "nama_penulis": "Andrea Hirata",
+            "biografi": "Penulis asal Belitung. " * 20,
+            "foto_penulis": None,
+        },
+        "genre": {"id_genre": 1 + i % 10, "nama_genre": "Fiksi", "deskripsi_genre": "Novel & cerita", "slug": "fiksi"},
+    }
+
+
+def _order(i: int) -> dict:
+    items = [
+        {
+            "id_order_item": i * 10 + j,
+            "id_order": i,
+            "id_buku": j + 1,
+            "jumlah": 1 + j % 3,
+            "harga_satuan": 85000,
+            "subtotal": 85000 * (1 + j % 3),
+            "created_at": "2025-01-02T03:04:05+00:00",
+            "buku": {"judul": f"Buku {j}", "cover_image": None},
+        }
+        for j in range(5)
+    ]
+    return {
+        "id_order": i,
+        "kode_order": f"ORD-2025-{i:06d}",
+        "id_user": 7,
+        "tanggal_order": "2025-01-02T03:04:05+00:00",
+        "alamat_pengiriman": "Jl. Merdeka No. 1, Bandung",
+        "total_harga": 425000,
+        "ongkir": 15000,
+        "catatan": None,
+        "id_jenis_pembayaran": 1,
+        "id_status_pembayaran": 2,
+        "id_status_order": 3,
+        "status_order": {"nama_status": "Dikirim"},
+        "status_pembayaran": {"nama_status": "Lunas"},
+        "order_item": items,
+        "created_at": "2025-01-02T03:04:05+00:00",
+        "updated_at": None,
+        "is_archived": False,
+    }
+
+
+def _cart() -> dict:
+    items = [
+        {
+            "id_keranjang_item": j,
+            "id_keranjang": 1,
+            "id_buku": j,
+            "jumlah": 2,
+            "harga_satuan": 85000,
+            "subtotal": 170000,
+            "created_at": "2025-01-02T03:04:05+00:00",
+            "buku": {"judul": f"Buku {j}", "harga": 85000, "cover_image": None, "berat": 0.4, "status": "aktif"},
+        }
+        for j in range(30)
+    ]
+    return {
+        "id_keranjang": 1,
+        "status_keranjang": "aktif",
+        "created_at": "2025-01-02T03:04:05+00:00",
+        "summary": {"total_qty": 60, "total_price": 5100000},
+        "items": items,
+    }
+
+
+CASES = [
+    (
+        "books/paged x100",
+        BooksPagedResponse,
+        {
+            "meta": {"page": 1, "limit": 100, "total": 5000, "total_pages": 50, "sort_by": "created_at", "order": "desc"},
+            "data": [_book(i) for i in range(1, 101)],
+        },
+    ),
+    ("orders x50", List[OrderResponse], [_order(i) for i in range(1, 51)]),
+    ("cart x30", CartResponse, _cart()),
+]
+
+
+def _stdlib_render(content) -> bytes:
+    # sama dengan starlette JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _bench(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    print(f"orjson: {'ya' if orjson is not None else 'tidak terpasang (fallback json stdlib)'}\n")
+    header = f"{'payload':<18} {'jalur':<16} {'us/op':>10} {'speedup':>8} {'bytes':>8}"
+    print(header)
+    print("-" * len(header))
+
+    for name, tp, data in CASES:
+        ser = ResponseSerializer(tp)
+        adapter = ser.adapter
+
+        def fastapi_default():
+            return _stdlib_render(adapter.dump_python(adapter.validate_python(data), mode="json"))
+
+        def fastapi_orjson():
+            return dumps(adapter.dump_python(adapter.validate_python(data), mode="json"))
+
+        def serializer():
+            return ser.dump(data, trusted=False)
+
+        def trusted():
+            return ser.dump(data, trusted=True)
+
+        # field yang terkirim harus sama dengan jalur validasi (format angka/datetime boleh beda)
+        if isinstance(data, dict):
+            assert json.loads(trusted()).keys() == json.loads(serializer()).keys()
+
+        number = 200
+        base = None
+        for label, fn in (
+            ("fastapi", fastapi_default),
+            ("fastapi+orjson", fastapi_orjson),
+            ("serializer", serializer),
+            ("trusted", trusted),
+        ):
+            us = _bench(fn, number)
+            base = base or us
+            print(f"{name:<18} {label:<16} {us:>10.1f} {base / us:>7.2f}x {len(fn()):>8}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
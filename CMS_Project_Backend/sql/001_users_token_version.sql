@@ -0,0 +1,21 @@
+-- sql/001_users_token_version.sql
+-- Dipakai mode AUTH_STATELESS: token_version dinaikkan tiap role / is_active berubah,
+-- token lama (claim "tv" lebih kecil) otomatis ditolak.
+
+alter table public.users
+  add column if not exists token_version integer not null default 0;
+
+-- index parsial: tabel versi di backend cuma memuat user yang pernah di-bump
+create index if not exists users_token_version_bumped_idx
+  on public.users (id_user)
+  where token_version > 0;
+
+create or replace function public.bump_token_version(p_id_user bigint)
+returns integer
+language sql
+as $$
+  update public.users
+     set token_version = token_version + 1
+   where id_user = p_id_user
+  returning token_version;
+$$;
@@ -0,0 +1,154 @@
+-- sql/002_books_search.sql
+-- Full-text search katalog (search_mode=fulltext di /books, /books/paged, /admin/books/paged).
+-- - buku.search_tsv  : tsvector berbobot (A judul+isbn, B penulis, C genre, D deskripsi)
+-- - buku.search_text : teks pendek (judul, isbn, penulis, genre) untuk trigram -> fallback typo
+-- Keduanya diisi trigger (tsvector tidak bisa generated column karena ambil dari penulis/genre).
+
+create extension if not exists pg_trgm;
+
+alter table public.buku
+  add column if not exists search_tsv tsvector,
+  add column if not exists search_text text;
+
+-- ===========================
+-- ISI KOLOM SEARCH
+-- ===========================
+create or replace function public.buku_search_refresh()
+returns trigger
+language plpgsql
+as $$
+declare
+  v_penulis text;
+  v_genre text;
+begin
+  if tg_op = 'UPDATE'
+     and new.search_tsv is not null
+     and new.judul is not distinct from old.judul
+     and new.isbn is not distinct from old.isbn
+     and new.deskripsi is not distinct from old.deskripsi
+     and new.id_penulis is not distinct from old.id_penulis
+     and new.id_genre is not distinct from old.id_genre then
+    return new;
+  end if;
+
+  select p.nama_penulis into v_penulis from public.penulis p where p.id_penulis = new.id_penulis;
+  select g.nama_genre into v_genre from public.genre g where g.id_genre = new.id_genre;
+
+  new.search_tsv :=
+       setweight(to_tsvector('indonesian', coalesce(new.judul, '')), 'A')
+    || setweight(to_tsvector('simple', coalesce(new.isbn, '')), 'A')
+    || setweight(to_tsvector('indonesian', coalesce(v_penulis, '')), 'B')
+    || setweight(to_tsvector('indonesian', coalesce(v_genre, '')), 'C')
+    || setweight(to_tsvector('indonesian', coalesce(new.deskripsi, '')), 'D');
+  new.search_text := lower(concat_ws(' ', new.judul, new.isbn, v_penulis, v_genre));
+  return new;
+end;
+$$;
+
+drop trigger if exists trg_buku_search_refresh on public.buku;
+create trigger trg_buku_search_refresh
+  before insert or update on public.buku
+  for each row execute function public.buku_search_refresh();
+
+-- nama penulis / genre berubah -> kosongkan search_tsv buku terkait, trigger di atas mengisi ulang
+create or replace function public.buku_search_touch_related()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_table_name = 'penulis' and new.nama_penulis is distinct from old.nama_penulis then
+    update public.buku set search_tsv = null where id_penulis = new.id_penulis;
+  elsif tg_table_name = 'genre' and new.nama_genre is distinct from old.nama_genre then
+    update public.buku set search_tsv = null where id_genre = new.id_genre;
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists trg_penulis_search_touch on public.penulis;
+create trigger trg_penulis_search_touch
+  after update of nama_penulis on public.penulis
+  for each row execute function public.buku_search_touch_related();
+
+drop trigger if exists trg_genre_search_touch on public.genre;
+create trigger trg_genre_search_touch
+  after update of nama_genre on public.genre
+  for each row execute function public.buku_search_touch_related();
+
+-- backfill data lama
+update public.buku set search_tsv = null;
+
+create index if not exists buku_search_tsv_idx on public.buku using gin (search_tsv);
+create index if not exists buku_search_text_trgm_idx on public.buku using gin (search_text gin_trgm_ops);
+
+-- ===========================
+-- RPC search_books
+-- ===========================
+-- 1) full-text (tsquery, index GIN search_tsv), ranking ts_rank_cd
+-- 2) kalau full-text tidak menemukan apa pun -> fallback trigram (typo: "laskr pelangy"),
+--    ranking strict_word_similarity. Fallback hanya jalan kalau (1) kosong (InitPlan sekali).
+-- Headline (<mark>) hanya dihitung untuk 1 halaman.
+-- Return 1 baris per buku: hit = row buku + penulis + genre + search_rank + search_headline,
+-- total_count = jumlah seluruh match (sama di tiap baris).
+create or replace function public.search_books(
+  p_query text,
+  p_genre_id bigint default null,
+  p_id_penulis bigint default null,
+  p_status text default 'aktif',
+  p_limit integer default 20,
+  p_offset integer default 0
+)
+returns table (hit jsonb, total_count bigint)
+language sql
+stable
+set pg_trgm.strict_word_similarity_threshold = 0.5
+as $$
+  -- filter & tsquery ditulis langsung (bukan CTE bersama) supaya planner tetap pakai index GIN
+  with fts as (
+    select b.id_buku, ts_rank_cd(b.search_tsv, websearch_to_tsquery('indonesian', p_query), 32)::real as rank
+      from public.buku b
+     where b.search_tsv @@ websearch_to_tsquery('indonesian', p_query)
+       and (p_status is null or b.status = p_status)
+       and (p_genre_id is null or b.id_genre = p_genre_id)
+       and (p_id_penulis is null or b.id_penulis = p_id_penulis)
+  ),
+  fuzzy as (
+    select b.id_buku, strict_word_similarity(lower(btrim(p_query)), b.search_text)::real as rank
+      from public.buku b
+     where not exists (select 1 from fts)
+       and lower(btrim(p_query)) <<% b.search_text
+       and (p_status is null or b.status = p_status)
+       and (p_genre_id is null or b.id_genre = p_genre_id)
+       and (p_id_penulis is null or b.id_penulis = p_id_penulis)
+  ),
+  matches as (
+    select * from fts
+    union all
+    select * from fuzzy
+  ),
+  page as (
+    select m.id_buku, m.rank, count(*) over () as total_count
+      from matches m
+     order by m.rank desc, m.id_buku desc
+     limit greatest(p_limit, 0)
+    offset greatest(p_offset, 0)
+  )
+  select (to_jsonb(b) - 'search_tsv' - 'search_text')
+           || jsonb_build_object(
+                'penulis', to_jsonb(p),
+                'genre', to_jsonb(g),
+                'search_rank', pg.rank,
+                'search_headline', ts_headline(
+                  'indonesian',
+                  concat_ws(' — ', b.judul, b.deskripsi),
+                  websearch_to_tsquery('indonesian', p_query),
+                  'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=1'
+                )
+              ) as hit,
+         pg.total_count
+    from page pg
+    join public.buku b on b.id_buku = pg.id_buku
+    left join public.penulis p on p.id_penulis = b.id_penulis
+    left join public.genre g on g.id_genre = b.id_genre
+   order by pg.rank desc, pg.id_buku desc;
+$$;
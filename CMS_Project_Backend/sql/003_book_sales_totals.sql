@@ -0,0 +1,18 @@
+-- sql/003_book_sales_totals.sql
+-- Total buku terjual per id_buku (order yang tidak dibatalkan).
+-- Dipakai ranking /books/suggest: agregasi di database, backend cukup terima 1 baris per buku.
+
+create or replace function public.book_sales_totals()
+returns table (id_buku bigint, terjual bigint)
+language sql
+stable
+as $$
+  select oi.id_buku, sum(oi.jumlah)::bigint as terjual
+    from public.order_item oi
+    join public.orders o on o.id_order = oi.id_order
+    left join public.status_order so on so.id_status_order = o.id_status_order
+   where so.nama_status is distinct from 'Dibatalkan'
+   group by oi.id_buku;
+$$;
+
+create index if not exists order_item_id_buku_idx on public.order_item (id_buku);
@@ -0,0 +1,31 @@
+-- sql/004_book_copurchase.sql
+-- Pasangan buku yang dibeli dalam order yang sama (order tidak dibatalkan).
+-- Dipakai /books/{id}/related: matriks co-purchase dibangun sekali di backend,
+-- selanjutnya di-update incremental dari order baru.
+-- Hasil 1 baris jsonb [[id_buku_a, id_buku_b, jumlah_order], ...] (a < b) supaya
+-- tidak terpotong batas max-rows PostgREST.
+
+create or replace function public.book_copurchase_pairs(p_min_count integer default 1)
+returns jsonb
+language sql
+stable
+as $$
+  with basket as (
+    select distinct oi.id_order, oi.id_buku
+      from public.order_item oi
+      join public.orders o on o.id_order = oi.id_order
+      left join public.status_order so on so.id_status_order = o.id_status_order
+     where so.nama_status is distinct from 'Dibatalkan'
+  ),
+  pairs as (
+    select a.id_buku as id_buku_a, b.id_buku as id_buku_b, count(*) as jumlah
+      from basket a
+      join basket b on b.id_order = a.id_order and b.id_buku > a.id_buku
+     group by a.id_buku, b.id_buku
+    having count(*) >= greatest(p_min_count, 1)
+  )
+  select coalesce(jsonb_agg(jsonb_build_array(id_buku_a, id_buku_b, jumlah)), '[]'::jsonb)
+    from pairs;
+$$;
+
+create index if not exists order_item_id_order_idx on public.order_item (id_order);
@@ -0,0 +1,31 @@
+-- sql/005_master_data.sql
+-- 1) Natural key master data unik -> seed pakai upsert on_conflict (aman dijalankan beberapa worker sekaligus).
+--    Kalau index gagal dibuat karena data dobel, bersihkan dulu:
+--      select nama_status, count(*) from public.status_order group by 1 having count(*) > 1;
+-- 2) get_master_data(): semua master (status_order, status_pembayaran, jenis_pembayaran, genre)
+--    dalam 1 query -> warmup registry + self-check seed saat startup cukup 1 round trip.
+
+create unique index if not exists status_order_nama_status_key on public.status_order (nama_status);
+create unique index if not exists status_pembayaran_nama_status_key on public.status_pembayaran (nama_status);
+create unique index if not exists jenis_pembayaran_nama_pembayaran_key on public.jenis_pembayaran (nama_pembayaran);
+
+create or replace function public.get_master_data()
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'status_order', coalesce(
+      (select jsonb_agg(to_jsonb(s) order by s.urutan_status, s.id_status_order) from public.status_order s),
+      '[]'::jsonb),
+    'status_pembayaran', coalesce(
+      (select jsonb_agg(to_jsonb(s) order by s.id_status_pembayaran) from public.status_pembayaran s),
+      '[]'::jsonb),
+    'jenis_pembayaran', coalesce(
+      (select jsonb_agg(to_jsonb(j) order by j.id_jenis_pembayaran) from public.jenis_pembayaran j),
+      '[]'::jsonb),
+    'genre', coalesce(
+      (select jsonb_agg(to_jsonb(g) order by g.nama_genre) from public.genre g),
+      '[]'::jsonb)
+  );
+$$;
@@ -0,0 +1,164 @@
+-- sql/006_cart_rpc.sql
+-- Mutasi keranjang dalam 1 transaksi / 1 round trip (dipanggil lewat supabase.rpc):
+--   cart_add_item          : get-or-create keranjang aktif + cek status & stok + upsert jumlah
+--   cart_update_item_qty   : set jumlah item (cek status & stok)
+--   cart_remove_item       : hapus item dari keranjang aktif user
+-- Semua mutasi 1 user diserialkan dengan advisory lock per user (2 tab / double click tidak bisa
+-- melewati stok atau membuat 2 keranjang aktif).
+-- Pesan error sama dengan HTTPException lama (dipetakan di app/routers/cart.py).
+
+-- key (7301, hashint8(id_user)): id bigint > 2^31-1 aman (tidak di-cast ke integer);
+-- 2 user dengan hash sama hanya ikut antre, tidak salah data.
+create or replace function public._cart_lock_user(p_id_user bigint)
+returns void
+language sql
+as $$
+  select pg_advisory_xact_lock(7301, hashint8(p_id_user));
+$$;
+
+create or replace function public.cart_add_item(p_id_user bigint, p_id_buku bigint, p_jumlah integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_buku record;
+  v_cart bigint;
+  v_item record;
+  v_jumlah integer;
+  v_id_item bigint;
+  v_action text;
+begin
+  if p_jumlah is null or p_jumlah < 1 then
+    raise exception 'Jumlah minimal 1';
+  end if;
+
+  perform public._cart_lock_user(p_id_user);
+
+  select id_buku, harga, stok, status into v_buku from public.buku where id_buku = p_id_buku;
+  if not found then
+    raise exception 'Buku tidak ditemukan';
+  end if;
+  if v_buku.status is distinct from 'aktif' then
+    raise exception 'Buku sedang tidak aktif';
+  end if;
+  if coalesce(v_buku.stok, 0) <= 0 then
+    raise exception 'Stok buku habis';
+  end if;
+
+  select id_keranjang into v_cart
+    from public.keranjang
+   where id_user = p_id_user and status_keranjang = 'aktif'
+   order by id_keranjang
+   limit 1;
+  if v_cart is null then
+    insert into public.keranjang (id_user, status_keranjang) values (p_id_user, 'aktif')
+    returning id_keranjang into v_cart;
+  end if;
+
+  select id_keranjang_item, jumlah into v_item
+    from public.keranjang_item
+   where id_keranjang = v_cart and id_buku = p_id_buku
+   limit 1;
+
+  v_jumlah := coalesce(v_item.jumlah, 0) + p_jumlah;
+  if v_jumlah > v_buku.stok then
+    raise exception 'Stok tidak cukup. Sisa stok: %', v_buku.stok;
+  end if;
+
+  if v_item.id_keranjang_item is not null then
+    update public.keranjang_item
+       set jumlah = v_jumlah, harga_satuan = v_buku.harga, subtotal = v_buku.harga * v_jumlah
+     where id_keranjang_item = v_item.id_keranjang_item;
+    v_id_item := v_item.id_keranjang_item;
+    v_action := 'updated';
+  else
+    insert into public.keranjang_item (id_keranjang, id_buku, jumlah, harga_satuan, subtotal)
+    values (v_cart, p_id_buku, v_jumlah, v_buku.harga, v_buku.harga * v_jumlah)
+    returning id_keranjang_item into v_id_item;
+    v_action := 'inserted';
+  end if;
+
+  return jsonb_build_object(
+    'id_keranjang', v_cart,
+    'id_keranjang_item', v_id_item,
+    'jumlah', v_jumlah,
+    'action', v_action
+  );
+end;
+$$;
+
+create or replace function public.cart_update_item_qty(p_id_user bigint, p_id_keranjang_item bigint, p_jumlah integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_cart bigint;
+  v_row record;
+begin
+  if p_jumlah is null or p_jumlah < 1 then
+    raise exception 'Jumlah minimal 1';
+  end if;
+
+  perform public._cart_lock_user(p_id_user);
+
+  select id_keranjang into v_cart
+    from public.keranjang
+   where id_user = p_id_user and status_keranjang = 'aktif'
+   order by id_keranjang
+   limit 1;
+  if v_cart is null then
+    raise exception 'Keranjang tidak ditemukan';
+  end if;
+
+  select ki.id_keranjang_item, b.harga, b.stok, b.status into v_row
+    from public.keranjang_item ki
+    join public.buku b on b.id_buku = ki.id_buku
+   where ki.id_keranjang = v_cart and ki.id_keranjang_item = p_id_keranjang_item;
+  if not found then
+    raise exception 'Item tidak ditemukan';
+  end if;
+  if v_row.status is distinct from 'aktif' then
+    raise exception 'Buku sedang tidak aktif';
+  end if;
+  if p_jumlah > coalesce(v_row.stok, 0) then
+    raise exception 'Stok tidak cukup. Sisa stok: %', coalesce(v_row.stok, 0);
+  end if;
+
+  update public.keranjang_item
+     set jumlah = p_jumlah, harga_satuan = v_row.harga, subtotal = v_row.harga * p_jumlah
+   where id_keranjang_item = p_id_keranjang_item;
+
+  return jsonb_build_object('id_keranjang', v_cart, 'id_keranjang_item', p_id_keranjang_item, 'jumlah', p_jumlah);
+end;
+$$;
+
+create or replace function public.cart_remove_item(p_id_user bigint, p_id_keranjang_item bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_cart bigint;
+begin
+  perform public._cart_lock_user(p_id_user);
+
+  select id_keranjang into v_cart
+    from public.keranjang
+   where id_user = p_id_user and status_keranjang = 'aktif'
+   order by id_keranjang
+   limit 1;
+  if v_cart is null then
+    raise exception 'Keranjang tidak ditemukan';
+  end if;
+
+  delete from public.keranjang_item
+   where id_keranjang = v_cart and id_keranjang_item = p_id_keranjang_item;
+  if not found then
+    raise exception 'Item tidak ditemukan';
+  end if;
+
+  return jsonb_build_object('id_keranjang', v_cart, 'id_keranjang_item', p_id_keranjang_item);
+end;
+$$;
+
+create index if not exists keranjang_id_user_status_idx on public.keranjang (id_user, status_keranjang);
+create index if not exists keranjang_item_keranjang_buku_idx on public.keranjang_item (id_keranjang, id_buku);
@@ -0,0 +1,18 @@
+-- sql/007_cart_summary.sql
+-- Ringkasan keranjang aktif (jumlah item, total qty, total harga) dihitung di database.
+-- Dipakai GET /cart/summary (badge header, di-poll): 1 baris, tanpa kirim semua item.
+-- id_user ikut GROUP BY supaya filter id_user=eq.X dari PostgREST turun ke scan keranjang.
+
+create or replace view public.v_keranjang_summary
+with (security_invoker = true)
+as
+select k.id_keranjang,
+       k.id_user,
+       k.status_keranjang,
+       count(ki.id_keranjang_item)::integer as item_count,
+       coalesce(sum(ki.jumlah), 0)::integer as total_qty,
+       coalesce(sum(ki.subtotal), 0)::numeric as total_price
+  from public.keranjang k
+  left join public.keranjang_item ki on ki.id_keranjang = k.id_keranjang
+ where k.status_keranjang = 'aktif'
+ group by k.id_keranjang, k.id_user, k.status_keranjang;
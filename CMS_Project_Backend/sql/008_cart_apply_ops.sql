@@ -0,0 +1,98 @@
+-- sql/008_cart_apply_ops.sql
+-- PATCH /cart/items: banyak operasi keranjang dalam 1 transaksi / 1 round trip.
+--   p_ops = [{"id_buku": 1, "jumlah": 2, "op": "set" | "add" | "remove"}, ...]  (diproses berurutan)
+--   set    : jumlah item = jumlah (0 -> item dihapus), item dibuat kalau belum ada
+--   add    : jumlah item + jumlah
+--   remove : hapus item (tidak error kalau memang tidak ada)
+-- Status & stok semua buku yang berubah dicek sekali (1 query) setelah semua operasi;
+-- 1 saja gagal -> raise -> seluruh operasi di-rollback.
+-- Diserialkan dengan advisory lock per user yang sama dengan sql/006 (_cart_lock_user).
+
+create or replace function public.cart_apply_ops(p_id_user bigint, p_ops jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_cart bigint;
+  v_ids bigint[];
+  v_op record;
+  v_bad record;
+  v_applied integer := 0;
+begin
+  if p_ops is null or jsonb_typeof(p_ops) <> 'array' or jsonb_array_length(p_ops) = 0 then
+    raise exception 'Operasi keranjang kosong';
+  end if;
+
+  perform public._cart_lock_user(p_id_user);
+
+  select array_agg(distinct (o->>'id_buku')::bigint) into v_ids
+    from jsonb_array_elements(p_ops) o;
+
+  select x.id into v_bad
+    from unnest(v_ids) as x(id)
+   where not exists (select 1 from public.buku b where b.id_buku = x.id)
+   limit 1;
+  if found then
+    raise exception 'Buku tidak ditemukan (id_buku %)', v_bad.id;
+  end if;
+
+  select id_keranjang into v_cart
+    from public.keranjang
+   where id_user = p_id_user and status_keranjang = 'aktif'
+   order by id_keranjang
+   limit 1;
+  if v_cart is null then
+    insert into public.keranjang (id_user, status_keranjang) values (p_id_user, 'aktif')
+    returning id_keranjang into v_cart;
+  end if;
+
+  for v_op in
+    select (o->>'id_buku')::bigint as id_buku,
+           greatest(coalesce((o->>'jumlah')::integer, 0), 0) as jumlah,
+           coalesce(o->>'op', 'set') as op
+      from jsonb_array_elements(p_ops) with ordinality as t(o, n)
+     order by n
+  loop
+    if v_op.op = 'remove' or (v_op.op = 'set' and v_op.jumlah = 0) then
+      delete from public.keranjang_item where id_keranjang = v_cart and id_buku = v_op.id_buku;
+    elsif v_op.op in ('set', 'add') then
+      update public.keranjang_item
+         set jumlah = case when v_op.op = 'set' then v_op.jumlah else jumlah + v_op.jumlah end
+       where id_keranjang = v_cart and id_buku = v_op.id_buku;
+      if not found and v_op.jumlah > 0 then
+        -- harga_satuan / subtotal diisi di akhir dari harga buku terbaru
+        insert into public.keranjang_item (id_keranjang, id_buku, jumlah, harga_satuan, subtotal)
+        values (v_cart, v_op.id_buku, v_op.jumlah, 0, 0);
+      end if;
+    else
+      raise exception 'Operasi tidak dikenal: %', v_op.op;
+    end if;
+    v_applied := v_applied + 1;
+  end loop;
+
+  -- validasi semua buku yang berubah dalam 1 query
+  select ki.id_buku, b.status, coalesce(b.stok, 0) as stok into v_bad
+    from public.keranjang_item ki
+    join public.buku b on b.id_buku = ki.id_buku
+   where ki.id_keranjang = v_cart
+     and ki.id_buku = any(v_ids)
+     and (b.status is distinct from 'aktif' or ki.jumlah > coalesce(b.stok, 0))
+   order by ki.id_buku
+   limit 1;
+  if found then
+    if v_bad.status is distinct from 'aktif' then
+      raise exception 'Buku sedang tidak aktif (id_buku %)', v_bad.id_buku;
+    end if;
+    raise exception 'Stok tidak cukup (id_buku %). Sisa stok: %', v_bad.id_buku, v_bad.stok;
+  end if;
+
+  update public.keranjang_item ki
+     set harga_satuan = b.harga, subtotal = b.harga * ki.jumlah
+    from public.buku b
+   where b.id_buku = ki.id_buku
+     and ki.id_keranjang = v_cart
+     and ki.id_buku = any(v_ids);
+
+  return jsonb_build_object('id_keranjang', v_cart, 'applied', v_applied);
+end;
+$$;